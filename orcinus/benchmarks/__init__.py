@@ -0,0 +1,8 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+from orcinus.benchmarks.generators import GENERATORS, SIZES
+from orcinus.benchmarks.runner import BenchmarkCase, BenchmarkComparison, BenchmarkResult, PHASES
+from orcinus.benchmarks.runner import compare_results, create_cases, load_results, run_benchmarks, save_results
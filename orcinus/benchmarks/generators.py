@@ -0,0 +1,114 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import io
+from typing import Callable, Mapping
+
+# Generator of source with given size
+SourceGenerator = Callable[[int], str]
+
+
+def generate_deep_nesting(size: int) -> str:
+    """ Generate function with `size` nested conditions and loops """
+    stream = io.StringIO()
+    stream.write("def main() -> int:\n")
+    stream.write("    value = 0\n")
+    for level in range(size):
+        indent = '    ' * (level + 1)
+        if level % 2:
+            stream.write(f"{indent}while False:\n")
+        else:
+            stream.write(f"{indent}if True:\n")
+        stream.write(f"{indent}    value = value + 1\n")
+    stream.write("    return value\n")
+    return stream.getvalue()
+
+
+def generate_many_functions(size: int) -> str:
+    """ Generate `size` functions, each of them calls previous function """
+    stream = io.StringIO()
+    stream.write("def function_0(value: int) -> int:\n")
+    stream.write("    return value\n")
+    for index in range(1, size):
+        stream.write(f"def function_{index}(value: int) -> int:\n")
+        stream.write(f"    result = function_{index - 1}({index})\n")
+        stream.write("    return result + value\n")
+    stream.write("def main() -> int:\n")
+    stream.write(f"    return function_{size - 1}(0)\n")
+    return stream.getvalue()
+
+
+def generate_wide_classes(size: int) -> str:
+    """ Generate class and struct with `size` fields, that are assigned and read in main function """
+    stream = io.StringIO()
+    stream.write("class Wide:\n")
+    for index in range(size):
+        stream.write(f"    field_{index}: int\n")
+    stream.write("struct Flat:\n")
+    for index in range(size):
+        stream.write(f"    field_{index}: int\n")
+    stream.write("def main() -> int:\n")
+    stream.write("    wide = Wide()\n")
+    for index in range(size):
+        stream.write(f"    wide.field_{index} = {index}\n")
+    stream.write("    result = 0\n")
+    for index in range(size):
+        stream.write(f"    result = result + wide.field_{index}\n")
+    stream.write("    return result\n")
+    return stream.getvalue()
+
+
+def generate_generic_instances(size: int) -> str:
+    """ Generate `size` generic functions and classes, each of them is instantiated with different types """
+    stream = io.StringIO()
+    for index in range(size):
+        stream.write(f"def identity_{index}[T](value: T) -> T:\n")
+        stream.write("    return value\n")
+        stream.write(f"class Box_{index}[T]:\n")
+        stream.write("    value: T\n")
+    stream.write("def main() -> int:\n")
+    stream.write("    result = 0\n")
+    for index in range(size):
+        stream.write(f"    box_{index} = Box_{index}[int]()\n")
+        stream.write(f"    box_{index}.value = identity_{index}({index})\n")
+        stream.write(f"    flag_{index} = Box_{index}[bool]()\n")
+        stream.write(f"    flag_{index}.value = identity_{index}(True)\n")
+        stream.write(f"    result = result + box_{index}.value\n")
+    stream.write("    return result\n")
+    return stream.getvalue()
+
+
+def generate_long_expressions(size: int) -> str:
+    """ Generate function with expression of `size` operands """
+    operands = ('{}', '-{}', '({} * value)')
+    stream = io.StringIO()
+    stream.write("def main() -> int:\n")
+    stream.write("    value = 1\n")
+    stream.write("    return value")
+    for index in range(size):
+        operand = operands[index % len(operands)].format(index % 10)
+        stream.write(f" {'+-'[index % 2]} {operand}")
+    stream.write("\n")
+    return stream.getvalue()
+
+
+# Generators of synthetic sources, by shape
+GENERATORS: Mapping[str, SourceGenerator] = {
+    'deep_nesting': generate_deep_nesting,
+    'many_functions': generate_many_functions,
+    'wide_classes': generate_wide_classes,
+    'generic_instances': generate_generic_instances,
+    'long_expressions': generate_long_expressions,
+}
+
+# Default sizes of sources, by shape. Each size is scaled by benchmark's scale
+SIZES: Mapping[str, tuple] = {
+    'deep_nesting': (10, 100),
+    'many_functions': (100, 1000),
+    'wide_classes': (50, 500),
+    'generic_instances': (10, 100),
+    'long_expressions': (20, 150),
+}
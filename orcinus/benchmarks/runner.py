@@ -0,0 +1,202 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import json
+import os
+import platform
+import tempfile
+from typing import Dict, Mapping, Sequence, Tuple
+
+from orcinus import __version__ as version
+from orcinus.benchmarks.generators import GENERATORS, SIZES
+from orcinus.builder import emit_document, initialize_llvm
+from orcinus.core.diagnostics import DiagnosticSeverity
+from orcinus.language.semantic import BUILTINS_MODULE
+from orcinus.profiling import time_report
+from orcinus.workspace import Workspace
+
+# Measured phases of compiler. Statistics of nested phases, e.g. `semantic.declare`, are added to outer phase
+PHASES = ('scan', 'parse', 'semantic', 'codegen')
+
+# Module name of generated source
+MODULE_NAME = 'benchmark'
+
+
+class BenchmarkCase:
+    """
+    Attributes:
+        shape   - The shape of generated source, see `GENERATORS`
+        size    - The size of generated source
+    """
+
+    def __init__(self, shape: str, size: int):
+        self.shape = shape
+        self.size = size
+
+    @property
+    def name(self) -> str:
+        return f'{self.shape}-{self.size}'
+
+    def generate(self) -> str:
+        return GENERATORS[self.shape](self.size)
+
+
+class BenchmarkResult:
+    """
+    Attributes:
+        name        - The name of benchmark
+        lines       - The count of lines in generated source
+        timings     - The best wall time of each phase, in seconds
+        net_blocks  - The net change of count of allocated memory blocks of each phase in best run
+        error       - The error message, if source is not compiled
+    """
+
+    def __init__(self, name: str, lines: int, timings: Mapping[str, float] = None,
+                 net_blocks: Mapping[str, int] = None, error: str = None):
+        self.name = name
+        self.lines = lines
+        self.timings = dict(timings or {})
+        self.net_blocks = dict(net_blocks or {})
+        self.error = error
+
+    def to_json(self) -> dict:
+        return {
+            'name': self.name,
+            'lines': self.lines,
+            'timings': self.timings,
+            'net_blocks': self.net_blocks,
+            'error': self.error,
+        }
+
+    @staticmethod
+    def from_json(data: dict) -> BenchmarkResult:
+        return BenchmarkResult(data['name'], data['lines'], data['timings'], data.get('net_blocks'), data.get('error'))
+
+
+class BenchmarkComparison:
+    """
+    Attributes:
+        name        - The name of benchmark
+        phase       - The name of phase
+        base_time   - The wall time of phase in base run, in seconds
+        time        - The wall time of phase in current run, in seconds
+    """
+
+    def __init__(self, name: str, phase: str, base_time: float, time: float):
+        self.name = name
+        self.phase = phase
+        self.base_time = base_time
+        self.time = time
+
+    @property
+    def ratio(self) -> float:
+        return self.time / self.base_time
+
+    def is_regression(self, threshold: float) -> bool:
+        return self.ratio > 1.0 + threshold
+
+
+def create_cases(shapes: Sequence[str] = None, scale: float = 1.0) -> Sequence[BenchmarkCase]:
+    """ Create benchmarks for shapes with default sizes, that are multiplied by scale """
+    return [
+        BenchmarkCase(shape, max(1, int(size * scale)))
+        for shape in (shapes or GENERATORS)
+        for size in SIZES[shape]
+    ]
+
+
+def measure_case(path: str, source: str) -> Mapping[str, Tuple[float, int]]:
+    """ Compile source once and returns wall time and net count of allocated blocks of each phase """
+    filename = os.path.join(path, f'{MODULE_NAME}.orx')
+    workspace = Workspace(paths=[path])
+    workspace.load_document(BUILTINS_MODULE).model  # builtins are analyzed before measurement
+    workspace.create_document(filename, source)
+
+    time_report.enabled = True
+    try:
+        diagnostics, _ = emit_document(workspace, filename)
+    finally:
+        time_report.enabled = False
+    statistics = time_report.collect()
+
+    for diagnostic in diagnostics:
+        if diagnostic.severity == DiagnosticSeverity.Error:
+            raise ValueError(diagnostic.message)
+
+    timings = {phase: (0.0, 0) for phase in PHASES}
+    for (phase, module_name), statistic in statistics.items():
+        phase = phase.partition('.')[0]
+        if module_name == MODULE_NAME and phase in timings:
+            wall_time, net_blocks = timings[phase]
+            timings[phase] = (wall_time + statistic.wall_time, net_blocks + statistic.net_blocks)
+    return timings
+
+
+def run_benchmark(case: BenchmarkCase, repeat: int = 3) -> BenchmarkResult:
+    """ Compile generated source `repeat` times and returns best timings of each phase """
+    source = case.generate()
+    lines = source.count('\n')
+    timings: Dict[str, float] = {}
+    net_blocks: Dict[str, int] = {}
+
+    with tempfile.TemporaryDirectory() as path:
+        for _ in range(repeat):
+            try:
+                measures = measure_case(path, source)
+            except (ValueError, RecursionError) as ex:
+                return BenchmarkResult(case.name, lines, error=str(ex) or type(ex).__name__)
+
+            for phase, (wall_time, phase_blocks) in measures.items():
+                if phase not in timings or wall_time < timings[phase]:
+                    timings[phase] = wall_time
+                    net_blocks[phase] = phase_blocks
+
+    return BenchmarkResult(case.name, lines, timings, net_blocks)
+
+
+def run_benchmarks(cases: Sequence[BenchmarkCase], repeat: int = 3) -> Sequence[BenchmarkResult]:
+    initialize_llvm()
+    return [run_benchmark(case, repeat) for case in cases]
+
+
+def save_results(filename: str, results: Sequence[BenchmarkResult], repeat: int = None):
+    """ Save results of benchmarks in JSON """
+    data = {
+        'version': version,
+        'python': platform.python_version(),
+        'repeat': repeat,
+        'benchmarks': [result.to_json() for result in results],
+    }
+    with open(filename, 'w', encoding='utf-8') as stream:
+        json.dump(data, stream, indent=2)
+
+
+def load_results(filename: str) -> Sequence[BenchmarkResult]:
+    """ Load results of benchmarks from JSON """
+    with open(filename, 'r', encoding='utf-8') as stream:
+        data = json.load(stream)
+    return [BenchmarkResult.from_json(item) for item in data['benchmarks']]
+
+
+def compare_results(base: Sequence[BenchmarkResult], results: Sequence[BenchmarkResult],
+                    min_time: float = 1e-4) -> Sequence[BenchmarkComparison]:
+    """
+    Compare timings of phases in two runs. Benchmarks, that are not presented in both runs, are skipped.
+
+    :param min_time: Phases with lesser wall time in base run are skipped, because their timings are mostly noise
+    """
+    base_results = {result.name: result for result in base}
+    comparisons = []
+    for result in results:
+        base_result = base_results.get(result.name)
+        if not base_result:
+            continue
+        for phase in PHASES:
+            base_time = base_result.timings.get(phase)
+            time = result.timings.get(phase)
+            if base_time is not None and time is not None and base_time >= min_time:
+                comparisons.append(BenchmarkComparison(result.name, phase, base_time, time))
+    return comparisons
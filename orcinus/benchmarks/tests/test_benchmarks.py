@@ -0,0 +1,41 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import pytest
+
+from orcinus.benchmarks import GENERATORS, PHASES, BenchmarkCase, BenchmarkResult
+from orcinus.benchmarks import compare_results, create_cases, load_results, run_benchmarks, save_results
+
+
+@pytest.mark.parametrize('shape', GENERATORS)
+def test_run_benchmark(shape):
+    result, = run_benchmarks([BenchmarkCase(shape, 5)], repeat=1)
+    assert result.error is None
+    assert set(result.timings) == set(PHASES)
+
+
+def test_create_cases():
+    cases = create_cases(['many_functions'], scale=0.5)
+    assert [case.name for case in cases] == ['many_functions-50', 'many_functions-500']
+
+
+def test_save_and_load_results(tmpdir):
+    filename = str(tmpdir.join('results.json'))
+    results = [BenchmarkResult('example-1', 10, {'scan': 0.5}, {'scan': 10})]
+    save_results(filename, results, repeat=1)
+
+    result, = load_results(filename)
+    assert result.name == 'example-1'
+    assert result.timings == {'scan': 0.5}
+
+
+def test_compare_results():
+    base = [BenchmarkResult('example-1', 10, {'scan': 0.010, 'parse': 0.010, 'semantic': 0.00001})]
+    results = [BenchmarkResult('example-1', 10, {'scan': 0.020, 'parse': 0.0105, 'semantic': 0.001})]
+    comparisons = compare_results(base, results)
+
+    assert [comparison.phase for comparison in comparisons] == ['scan', 'parse']
+    assert [comparison.is_regression(0.1) for comparison in comparisons] == [True, False]
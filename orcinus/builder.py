@@ -0,0 +1,422 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import concurrent.futures
+import ctypes
+import heapq
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from llvmlite import binding
+
+from orcinus.codegen import ModuleCodegen
+from orcinus.core.diagnostics import Diagnostic, DiagnosticSeverity
+from orcinus.exceptions import OrcinusError
+from orcinus.language.syntax import ImportFromAST
+from orcinus.profiling import StatisticKey, PhaseStatistic, time_report
+from orcinus.workspace import Workspace
+
+# Workspace of worker process, that is shared between all built documents in this process
+_workspace: Optional[Workspace] = None
+
+# Kinds of output files: LLVM IR, LLVM bitcode, native assembly, object file and executable
+OUTPUT_KINDS = ('ir', 'bc', 'asm', 'obj', 'exe')
+OUTPUT_EXTENSIONS = {'ir': '.ll', 'bc': '.bc', 'asm': '.s', 'obj': '.o', 'exe': ''}
+
+# Optimization levels: `-O0` .. `-O3`, `-Os` and `-Oz`. Each level is pair of optimization level and size level
+OPT_LEVELS = {'0': (0, 0), '1': (1, 0), '2': (2, 0), '3': (3, 0), 's': (2, 1), 'z': (2, 2)}
+
+
+class BuildOptions:
+    """
+    Attributes:
+        opt_level   - The optimization level, 0-3
+        size_level  - The size optimization level, 0-2
+        time_passes - Collect timings of LLVM passes
+        time_report - Collect timings, call counts and net allocated blocks of compiler phases
+    """
+
+    def __init__(self, opt_level: int = 0, size_level: int = 0, time_passes: bool = False, time_report: bool = False):
+        self.opt_level = opt_level
+        self.size_level = size_level
+        self.time_passes = time_passes
+        self.time_report = time_report
+
+    @staticmethod
+    def from_level(level: str, time_passes: bool = False, time_report: bool = False) -> BuildOptions:
+        """ Create options from command line optimization level, e.g. `2` for `-O2` or `s` for `-Os` """
+        opt_level, size_level = OPT_LEVELS[level]
+        return BuildOptions(opt_level, size_level, time_passes, time_report)
+
+    @property
+    def is_optimized(self) -> bool:
+        return bool(self.opt_level or self.size_level)
+
+    @property
+    def inlining_threshold(self) -> int:
+        """ Returns threshold of inlining, same as used by `clang` for optimization level """
+        if self.opt_level > 2:
+            return 250
+        elif self.size_level == 1:
+            return 75
+        elif self.size_level == 2:
+            return 25
+        return 225
+
+
+class BuildResult:
+    """
+    Attributes:
+        filename    - The built filename
+        diagnostics - The diagnostics, that were reported during build
+        llvm_ir     - The emitted LLVM IR, if output file is not requested
+        output      - The written output filename
+        timings     - The report of LLVM passes timings, if it was requested
+        statistics  - The statistics of compiler phases, if it was requested. See `TimeReport`
+    """
+
+    def __init__(self, filename: str, diagnostics: Sequence[Diagnostic], llvm_ir: str = None, output: str = None,
+                 timings: str = None, statistics: Mapping[StatisticKey, PhaseStatistic] = None):
+        self.filename = filename
+        self.diagnostics = diagnostics
+        self.llvm_ir = llvm_ir
+        self.output = output
+        self.timings = timings
+        self.statistics = statistics or {}
+
+    @property
+    def has_error(self) -> bool:
+        return any(diagnostic.severity == DiagnosticSeverity.Error for diagnostic in self.diagnostics)
+
+
+def initialize_llvm():
+    """ Initialize llvm targets """
+    binding.initialize()
+    binding.initialize_native_target()
+    binding.initialize_native_asmparser()
+    binding.initialize_native_asmprinter()
+
+
+def initialize_worker(path: str, cache_path: Optional[str]):
+    """ Initialize worker process """
+    global _workspace
+
+    initialize_llvm()
+    _workspace = Workspace(paths=[path], cache_path=cache_path)
+
+
+def get_output_kind(output: str) -> str:
+    """ Returns kind of output file by it's extension. Files without known extension are executables """
+    _, extension = os.path.splitext(output)
+    for kind, kind_extension in OUTPUT_EXTENSIONS.items():
+        if kind_extension and kind_extension == extension:
+            return kind
+    return 'exe'
+
+
+def get_outputs(filenames: Sequence[str], output: str = None, kind: str = None) -> Sequence[Tuple[str, str]]:
+    """
+    Returns output filename and kind for each document.
+
+    If single document is built, then output is filename. Otherwise output is directory for output files, and
+    directories of documents relative to current directory are kept in it, e.g. `a/main.orx` is built to
+    `output/a/main.o`.
+    """
+    if not output:
+        return [(None, None)] * len(filenames)
+
+    kind = kind or get_output_kind(output)
+    if len(filenames) == 1:
+        return [(output, kind)]
+
+    results = []
+    sources: Dict[str, str] = {}
+    for filename in filenames:
+        name, _ = os.path.splitext(os.path.relpath(os.path.abspath(filename)))
+        if name.startswith(os.pardir + os.sep):
+            raise OrcinusError(f'Can not build `{filename}` to directory, because it is outside of current directory')
+
+        output_filename = os.path.join(output, name + OUTPUT_EXTENSIONS[kind])
+        if output_filename in sources:
+            other = sources[output_filename]
+            raise OrcinusError(f'Output file `{output_filename}` of `{filename}` collides with output of `{other}`')
+        sources[output_filename] = filename
+        results.append((output_filename, kind))
+
+    for output_filename in sources:
+        os.makedirs(os.path.dirname(output_filename), exist_ok=True)
+    return results
+
+
+def create_target_machine() -> binding.TargetMachine:
+    """ Create target machine for host """
+    target = binding.Target.from_default_triple()
+    return target.create_target_machine(reloc='pic', codemodel='default')
+
+
+def optimize_module(llvm_module: binding.ModuleRef, machine: binding.TargetMachine, options: BuildOptions):
+    """ Run module and function passes for optimization level on module """
+    if not options.is_optimized:
+        return
+
+    builder = binding.PassManagerBuilder()
+    builder.opt_level = options.opt_level
+    builder.size_level = options.size_level
+    builder.inlining_threshold = options.inlining_threshold
+    builder.loop_vectorize = options.opt_level > 1 and options.size_level < 2
+    builder.slp_vectorize = options.opt_level > 1 and options.size_level < 2
+
+    function_passes = binding.create_function_pass_manager(llvm_module)
+    machine.add_analysis_passes(function_passes)
+    builder.populate(function_passes)
+
+    module_passes = binding.create_module_pass_manager()
+    machine.add_analysis_passes(module_passes)
+    builder.populate(module_passes)
+
+    function_passes.initialize()
+    for llvm_function in llvm_module.functions:
+        if not llvm_function.is_declaration:
+            function_passes.run(llvm_function)
+    function_passes.finalize()
+    module_passes.run(llvm_module)
+
+
+def compile_module(llvm_ir: str, options: BuildOptions) -> Tuple[binding.ModuleRef, binding.TargetMachine]:
+    """ Parse, verify and optimize LLVM IR for host target machine """
+    machine = create_target_machine()
+    llvm_module = binding.parse_assembly(llvm_ir)
+    llvm_module.triple = machine.triple
+    llvm_module.data_layout = str(machine.target_data)
+    llvm_module.verify()
+    optimize_module(llvm_module, machine, options)
+    return llvm_module, machine
+
+
+def emit_output(llvm_module: binding.ModuleRef, machine: binding.TargetMachine, output: str, kind: str):
+    """ Emit LLVM module to output file """
+    if kind == 'ir':
+        with open(output, 'w', encoding='utf-8') as stream:
+            stream.write(str(llvm_module))
+    elif kind == 'bc':
+        with open(output, 'wb') as stream:
+            stream.write(llvm_module.as_bitcode())
+    elif kind == 'asm':
+        with open(output, 'w', encoding='utf-8') as stream:
+            stream.write(machine.emit_assembly(llvm_module))
+    elif kind == 'obj':
+        with open(output, 'wb') as stream:
+            stream.write(machine.emit_object(llvm_module))
+    elif kind == 'exe':
+        with tempfile.TemporaryDirectory() as path:
+            filename = os.path.join(path, 'module.o')
+            with open(filename, 'wb') as stream:
+                stream.write(machine.emit_object(llvm_module))
+            link_executable([filename], output)
+    else:
+        raise OrcinusError(f'Unknown output kind `{kind}`')
+
+
+def link_executable(objects: Sequence[str], output: str):
+    """ Link object files to native executable with system compiler driver, e.g. `$CC` or `cc` """
+    linker = os.environ.get('CC', 'cc')
+    process = subprocess.run([linker, *objects, '-o', output], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode:
+        message = process.stderr.decode('utf-8', errors='replace').strip()
+        raise OrcinusError(f'Can not link executable `{output}`: {message}')
+
+
+def emit_document(workspace: Workspace, filename: str) -> Tuple[Sequence[Diagnostic], Optional[str]]:
+    """ Parse, analyze and emit LLVM IR for single document. Returns diagnostics and LLVM IR if document is valid """
+    document = workspace.get_or_create_document(filename)
+    try:
+        module = document.module
+    except Diagnostic as ex:
+        document.diagnostics.add(ex.location, ex.severity, ex.message, ex.source)
+        module = None
+
+    diagnostics = tuple(document.diagnostics)
+    if not module or document.diagnostics.has_error:
+        return diagnostics, None
+
+    with time_report.measure('codegen', document.name):
+        generator = ModuleCodegen(document.model.context, document.name)
+        generator.emit(module)
+    with time_report.measure('codegen.print', document.name):
+        return diagnostics, str(generator)
+
+
+def build_document(workspace: Workspace, filename: str, output: str = None, kind: str = None,
+                   options: BuildOptions = None) -> BuildResult:
+    """ Build single document. If output is set, then document is written to it """
+    options = options or BuildOptions()
+    if not options.time_report:
+        return compile_document(workspace, filename, output, kind, options)
+
+    time_report.enabled = True
+    try:
+        result = compile_document(workspace, filename, output, kind, options)
+    finally:
+        time_report.enabled = False
+    result.statistics = time_report.collect()
+    return result
+
+
+def compile_document(workspace: Workspace, filename: str, output: str, kind: str,
+                     options: BuildOptions) -> BuildResult:
+    """ Build single document, see `build_document` """
+    diagnostics, llvm_ir = emit_document(workspace, filename)
+    if llvm_ir is None:
+        return BuildResult(filename, diagnostics)
+    if not output and not options.is_optimized:
+        return BuildResult(filename, diagnostics, llvm_ir=llvm_ir)
+
+    timings = None
+    if options.time_passes:
+        binding.set_time_passes(True)
+    try:
+        name = workspace.get_or_create_document(filename).name
+        with time_report.measure('llvm.compile', name):
+            llvm_module, machine = compile_module(llvm_ir, options)
+        if output:
+            with time_report.measure('llvm.emit', name):
+                emit_output(llvm_module, machine, output, kind)
+            llvm_ir = None
+        else:
+            llvm_ir = str(llvm_module)
+    finally:
+        if options.time_passes:
+            timings = binding.report_and_reset_timings()
+            binding.set_time_passes(False)
+    return BuildResult(filename, diagnostics, llvm_ir=llvm_ir, output=output, timings=timings)
+
+
+def execute_module(llvm_module: binding.ModuleRef, machine: binding.TargetMachine, arguments: Sequence[str]) -> int:
+    """
+    Compile module with MCJIT in current process and call it's `main` function.
+
+    :param arguments:   Command line arguments of program, include program name
+    :return:            Exit code of program
+    """
+    engine = binding.create_mcjit_compiler(llvm_module, machine)
+    engine.finalize_object()
+    engine.run_static_constructors()
+
+    address = engine.get_function_address('main')
+    if not address:
+        raise OrcinusError(f'Not found `main` function in module')
+
+    argv = (ctypes.c_char_p * (len(arguments) + 1))(*(argument.encode('utf-8') for argument in arguments), None)
+    main = ctypes.CFUNCTYPE(ctypes.c_int32, ctypes.c_int32, ctypes.POINTER(ctypes.c_char_p))(address)
+
+    # program can terminate process, e.g. with `exit`
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        return main(len(arguments), argv)
+    finally:
+        engine.run_static_destructors()
+
+
+def run_document(workspace: Workspace, filename: str, arguments: Sequence[str], options: BuildOptions = None,
+                 name: str = None) -> Tuple[Sequence[Diagnostic], Optional[int]]:
+    """
+    Build document and execute it in current process.
+
+    :return: diagnostics and exit code of program, or None if document contains errors
+    """
+    diagnostics, llvm_ir = emit_document(workspace, filename)
+    if llvm_ir is None:
+        return diagnostics, None
+
+    llvm_module, machine = compile_module(llvm_ir, options or BuildOptions())
+    return diagnostics, execute_module(llvm_module, machine, [name or filename, *arguments])
+
+
+def build_worker_document(filename: str, output: str = None, kind: str = None,
+                          options: BuildOptions = None) -> BuildResult:
+    """ Build document in worker process """
+    return build_document(_workspace, filename, output, kind, options)
+
+
+def sort_by_imports(workspace: Workspace, filenames: Sequence[str]) -> Sequence[str]:
+    """
+    Sort documents in order of imports, e.g. imported documents are placed before dependent documents.
+
+    Documents without dependencies between them are kept in original order. Documents with import cycles are placed
+    after all other documents.
+    """
+    names: Dict[str, int] = {}
+    imports: List[List[str]] = []
+    for index, filename in enumerate(filenames):
+        try:
+            document = workspace.get_or_create_document(filename)
+            names[document.name] = index
+            tree = document.tree
+        except Exception:
+            imports.append([])  # errors are reported on build
+        else:
+            imports.append([child.module for child in tree.imports if isinstance(child, ImportFromAST)])
+
+    dependents: List[List[int]] = [[] for _ in filenames]
+    degrees = [0] * len(filenames)
+    for index, modules in enumerate(imports):
+        for module_name in set(modules):
+            dependency = names.get(module_name)
+            if dependency is not None and dependency != index:
+                dependents[dependency].append(index)
+                degrees[index] += 1
+
+    queue = [index for index, degree in enumerate(degrees) if not degree]
+    heapq.heapify(queue)
+    order = []
+    while queue:
+        index = heapq.heappop(queue)
+        order.append(index)
+        for dependent in dependents[index]:
+            degrees[dependent] -= 1
+            if not degrees[dependent]:
+                heapq.heappush(queue, dependent)
+
+    visited = set(order)
+    order.extend(index for index in range(len(filenames)) if index not in visited)
+    return [filenames[index] for index in order]
+
+
+def build_documents(filenames: Sequence[str], *, jobs: int = 1, cache_path: str = None, output: str = None,
+                    kind: str = None, options: BuildOptions = None) -> Sequence[BuildResult]:
+    """
+    Build documents and returns results in order of filenames.
+
+    If `output` is set, then documents are written to output files, see `get_outputs`.
+
+    If `jobs` is greater than one, then documents are built in process pool. Each worker has own workspace, therefore
+    imported modules are analyzed once per worker and documents are scheduled in order of imports.
+    """
+    path = os.getcwd()
+    outputs = dict(zip(filenames, get_outputs(filenames, output, kind)))
+    if jobs <= 1 or len(filenames) <= 1:
+        initialize_llvm()
+        workspace = Workspace(paths=[path], cache_path=cache_path)
+        return [build_document(workspace, filename, *outputs[filename], options) for filename in filenames]
+
+    workspace = Workspace(paths=[path], cache_path=cache_path)
+    scheduled = sort_by_imports(workspace, filenames)
+    results: Dict[str, BuildResult] = {}
+
+    executor = concurrent.futures.ProcessPoolExecutor(jobs, initializer=initialize_worker, initargs=(path, cache_path))
+    with executor as pool:
+        futures = {
+            pool.submit(build_worker_document, filename, *outputs[filename], options): filename
+            for filename in scheduled
+        }
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.result()
+
+    return [results[filename] for filename in filenames]
@@ -12,13 +12,13 @@ import sys
 from typing import Sequence
 
 from colorlog import ColoredFormatter
-from llvmlite import binding
 
-from orcinus import __version__ as version
-from orcinus.codegen import ModuleCodegen
+from orcinus import __version__ as version, profiling
+from orcinus.builder import OPT_LEVELS, OUTPUT_KINDS, BuildOptions, build_documents, initialize_llvm, run_document
 from orcinus.core.diagnostics import Diagnostic, DiagnosticSeverity, DiagnosticManager
-from orcinus.server.server import LanguageTCPServer
+from orcinus.server.server import LanguageServer
 from orcinus.workspace import Workspace
+from orcinus.workspace.cache import get_default_cache_path
 
 logger = logging.getLogger('orcinus')
 
@@ -119,29 +119,107 @@ def process_pdb(action):
     return wrapper
 
 
-def build(filenames: Sequence[str]):
-    # initialize llvm targets
-    binding.initialize()
-    binding.initialize_native_target()
-    binding.initialize_native_asmparser()
-    binding.initialize_native_asmprinter()
-
-    # initialize workspace context
-    workspace = Workspace(paths=[os.getcwd()])
-    for filename in filenames:
-        document = workspace.get_or_create_document(filename)
-        module = document.module
-        exit_diagnostics(document.diagnostics)
-
-        if module:
-            generator = ModuleCodegen(document.model.context, document.name)
-            generator.emit(module)
-            print(generator)
-
-
-def start_server(hostname, port):
-    server = LanguageTCPServer()
-    server.listen(hostname, port)
+def build(filenames: Sequence[str], jobs: int = 1, output: str = None, kind: str = None, opt_level: str = '0',
+          time_passes: bool = False, time_report: bool = False, profile_path: str = None, trace_path: str = None,
+          cache_path: str = None, use_cache: bool = True):
+    cache_path = (cache_path or get_default_cache_path()) if use_cache else None
+    options = BuildOptions.from_level(opt_level, time_passes, time_report)
+    with profiling.profile(profile_path, trace_filename=trace_path):
+        results = build_documents(filenames, jobs=jobs, cache_path=cache_path, output=output, kind=kind,
+                                  options=options)
+
+    if time_report:
+        report = profiling.TimeReport()
+        for result in results:
+            report.merge(result.statistics)
+        sys.stderr.write(report.format())
+
+    for result in results:
+        log_diagnostics(result.diagnostics)
+        if result.timings:
+            sys.stderr.write(result.timings)
+        if result.has_error:
+            sys.exit(1)
+        if result.llvm_ir is not None:
+            print(result.llvm_ir)
+
+
+def run(filename: str, arguments: Sequence[str], opt_level: str = '0', cache_path: str = None,
+        use_cache: bool = True) -> int:
+    initialize_llvm()
+    cache_path = (cache_path or get_default_cache_path()) if use_cache else None
+    workspace = Workspace(paths=[os.getcwd()], cache_path=cache_path)
+    diagnostics, code = run_document(workspace, filename, arguments, BuildOptions.from_level(opt_level))
+    log_diagnostics(diagnostics)
+    return 1 if code is None else code
+
+
+def test(paths: Sequence[str], jobs: int = None, opt_level: str = '0', timeout: float = None) -> int:
+    from orcinus.testing import DEFAULT_TIMEOUT, FixtureCase, FixtureEngine, find_fixtures
+
+    filenames = []
+    for path in paths:
+        filenames.extend(sorted(find_fixtures(path)) if os.path.isdir(path) else [path])
+
+    cases = [FixtureCase.load(filename) for filename in filenames]
+    engine = FixtureEngine(jobs=jobs, options=BuildOptions.from_level(opt_level), timeout=timeout or DEFAULT_TIMEOUT)
+    results = engine.run(cases)
+
+    for result in results:
+        status = 'PASS' if result.is_passed else 'FAIL'
+        timings = f'compile {result.compile_time * 1000:8.2f} ms, ' \
+                  f'link {result.link_time * 1000:8.2f} ms, ' \
+                  f'run {result.run_time * 1000:8.2f} ms'
+        print(f'{status} {result.case.filename} [{timings}]')
+        for failure in result.failures:
+            print(f'    {failure}')
+        if result.failures and result.error:
+            print(f'    {result.error}')
+
+    failed = sum(not result.is_passed for result in results)
+    print(f'{len(results)} fixtures, {failed} failed')
+    return 1 if failed else 0
+
+
+def benchmark(shapes: Sequence[str] = None, scale: float = 1.0, repeat: int = 3, output: str = None,
+              compare: str = None, threshold: float = 0.1) -> int:
+    from orcinus.benchmarks import GENERATORS, compare_results, create_cases, load_results, run_benchmarks, save_results
+
+    unknown = [shape for shape in shapes or () if shape not in GENERATORS]
+    if unknown:
+        logger.error(f"Unknown shapes: {', '.join(unknown)}. Available shapes: {', '.join(GENERATORS)}")
+        return 1
+
+    results = run_benchmarks(create_cases(shapes, scale), repeat)
+    for result in results:
+        if result.error:
+            print(f'FAIL {result.name} [{result.error}]')
+            continue
+        timings = ', '.join(f'{phase} {wall_time * 1000:8.2f} ms' for phase, wall_time in result.timings.items())
+        print(f'{result.name:<24} {result.lines:>6} lines [{timings}]')
+
+    if output:
+        save_results(output, results, repeat)
+    if not compare:
+        return 1 if any(result.error for result in results) else 0
+
+    regressions = 0
+    for comparison in compare_results(load_results(compare), results):
+        if comparison.is_regression(threshold):
+            regressions += 1
+            print(f'REGRESSION {comparison.name} {comparison.phase}: '
+                  f'{comparison.base_time * 1000:.2f} ms -> {comparison.time * 1000:.2f} ms ({comparison.ratio:.2f}x)')
+    print(f'{len(results)} benchmarks, {regressions} regressions')
+    return 1 if regressions else 0
+
+
+def start_server(hostname, port, time_report: bool = False, stdio: bool = False):
+    profiling.time_report.enabled = time_report
+    server = LanguageServer()
+    if stdio:
+        server.listen_stdio()
+    else:
+        server.listen(hostname, port)
 
 
 def main():
@@ -160,16 +238,68 @@ def main():
     # build package
     build_cmd = subparsers.add_parser('build')
     build_cmd.add_argument('filenames', type=str, nargs='+', help="files")
+    build_cmd.add_argument('-j', '--jobs', type=int, default=1, help="number of parallel jobs")
+    build_cmd.add_argument('-o', '--output', type=str,
+                           help="output file, or output directory if multiple files are built")
+    build_cmd.add_argument('--emit', dest='kind', choices=OUTPUT_KINDS,
+                           help="kind of output file. By default is selected by extension of output file")
+    build_cmd.add_argument('-O', dest='opt_level', choices=OPT_LEVELS, default='0', help="optimization level")
+    build_cmd.add_argument('--time-passes', action='store_true', help="report timings of LLVM passes")
+    build_cmd.add_argument('--time-report', action='store_true',
+                           help="report wall time, call counts and net allocated blocks of compiler phases per module")
+    build_cmd.add_argument('--profile', dest='profile_path', type=str,
+                           help="write cProfile statistics of current process to file")
+    build_cmd.add_argument('--trace-malloc', dest='trace_path', type=str,
+                           help="write tracemalloc snapshot of current process to file")
+    build_cmd.add_argument('--cache-dir', dest='cache_path', type=str, help="directory of parse cache")
+    build_cmd.add_argument('--no-cache', dest='use_cache', action='store_false', help="disable parse cache")
     build_cmd.add_argument('--pdb', dest=KEY_PDB, action='store_true', help="post-mortem mode")
     build_cmd.add_argument('-l', '--level', dest=KEY_LEVEL, choices=LEVELS, default=DEFAULT_LEVEL)
     build_cmd.add_argument(dest=KEY_ACTION, help=argparse.SUPPRESS, action='store_const', const=build)
 
+    # run program
+    run_cmd = subparsers.add_parser('run', help='Compile and execute program in current process')
+    run_cmd.add_argument('filename', type=str, help="file")
+    run_cmd.add_argument('arguments', type=str, nargs=argparse.REMAINDER, help="arguments of program")
+    run_cmd.add_argument('-O', dest='opt_level', choices=OPT_LEVELS, default='0', help="optimization level")
+    run_cmd.add_argument('--cache-dir', dest='cache_path', type=str, help="directory of parse cache")
+    run_cmd.add_argument('--no-cache', dest='use_cache', action='store_false', help="disable parse cache")
+    run_cmd.add_argument('--pdb', dest=KEY_PDB, action='store_true', help="post-mortem mode")
+    run_cmd.add_argument('-l', '--level', dest=KEY_LEVEL, choices=LEVELS, default=DEFAULT_LEVEL)
+    run_cmd.add_argument(dest=KEY_ACTION, help=argparse.SUPPRESS, action='store_const', const=run)
+
+    # run test programs
+    test_cmd = subparsers.add_parser('test', help='Compile and execute test programs')
+    test_cmd.add_argument('paths', type=str, nargs='+', help="files or directories with test programs")
+    test_cmd.add_argument('-j', '--jobs', type=int, help="number of parallel jobs")
+    test_cmd.add_argument('-O', dest='opt_level', choices=OPT_LEVELS, default='0', help="optimization level")
+    test_cmd.add_argument('--timeout', type=float, help="limit of execution time of single program, in seconds")
+    test_cmd.add_argument('--pdb', dest=KEY_PDB, action='store_true', help="post-mortem mode")
+    test_cmd.add_argument('-l', '--level', dest=KEY_LEVEL, choices=LEVELS, default=DEFAULT_LEVEL)
+    test_cmd.add_argument(dest=KEY_ACTION, help=argparse.SUPPRESS, action='store_const', const=test)
+
+    # run benchmarks
+    benchmark_cmd = subparsers.add_parser('benchmark', help='Measure compiler phases on generated sources')
+    benchmark_cmd.add_argument('--shape', dest='shapes', action='append',
+                               help="shape of generated sources. By default all shapes are measured")
+    benchmark_cmd.add_argument('--scale', type=float, default=1.0, help="multiplier of generated sources size")
+    benchmark_cmd.add_argument('--repeat', type=int, default=3, help="count of runs for each benchmark")
+    benchmark_cmd.add_argument('-o', '--output', type=str, help="write results to JSON file")
+    benchmark_cmd.add_argument('--compare', type=str, help="compare results with previous run from JSON file")
+    benchmark_cmd.add_argument('--threshold', type=float, default=0.1,
+                               help="relative slowdown of phase, that is reported as regression")
+    benchmark_cmd.add_argument('--pdb', dest=KEY_PDB, action='store_true', help="post-mortem mode")
+    benchmark_cmd.add_argument('-l', '--level', dest=KEY_LEVEL, choices=LEVELS, default=DEFAULT_LEVEL)
+    benchmark_cmd.add_argument(dest=KEY_ACTION, help=argparse.SUPPRESS, action='store_const', const=benchmark)
+
     # add command: Run LSP server
     server_cmd = subparsers.add_parser('server', help='Run server language server protocol')
     server_cmd.add_argument('--pdb', dest=KEY_PDB, action='store_true', help="post-mortem mode")
     server_cmd.add_argument('-l', '--level', dest=KEY_LEVEL, choices=LEVELS, default=DEFAULT_LEVEL)
     server_cmd.add_argument('--hostname', type=str, default='0.0.0.0')
     server_cmd.add_argument('--port', type=int, default=55290)
+    server_cmd.add_argument('--time-report', action='store_true', help="log timings of compiler phases per request")
+    server_cmd.add_argument('--stdio', action='store_true', help="serve single client on standard input and output")
     server_cmd.add_argument(dest=KEY_ACTION, help=argparse.SUPPRESS, action='store_const', const=start_server)
 
     # parse arguments
@@ -4,6 +4,7 @@
 # of the MIT license.  See the LICENSE file for details.
 from __future__ import annotations
 
+import collections
 from typing import Sequence, Mapping
 
 from llvmlite import binding
@@ -11,7 +12,7 @@ from llvmlite import ir
 from multidict import MultiDict
 
 from orcinus.language.semantic import *
-from orcinus.utils import cached_property
+from orcinus.utils import cached_property, dispatchmethod
 
 
 class LazyDict(dict):
@@ -41,7 +42,7 @@ class LazyDict(dict):
 
 class ModuleCodegen:
     def __init__(self, context: SemanticContext, name='<stdin>'):
-        self.llvm_module = ir.Module(name)
+        self.llvm_module = ir.Module(name, context=ir.Context())
         self.llvm_module.triple = binding.Target.from_default_triple().triple
 
         # names to symbol
@@ -52,6 +53,9 @@ class ModuleCodegen:
         self.llvm_types = LazyDict(builder=self.declare_type, initializer=self.initialize_type)
         self.llvm_functions = LazyDict(builder=self.declare_function)
 
+        # instances of generic functions, that are declared in module, but not emitted yet
+        self.instances = collections.deque()
+
         # builtins functions
         self.context = context
         self.builtins = BuiltinsCodegen(self)
@@ -80,23 +84,23 @@ class ModuleCodegen:
         llvm_type = ir.FunctionType(self.llvm_opaque, [self.llvm_size])
         return ir.Function(self.llvm_module, llvm_type, 'malloc')
 
-    @multimethod
+    @dispatchmethod
     def declare_type(self, type_symbol: Type):
         raise Diagnostic(type_symbol.location, DiagnosticSeverity.Error, "Not implemented type conversion to LLVM")
 
-    @multimethod
+    @dispatchmethod
     def declare_type(self, _: VoidType):
         return ir.VoidType()
 
-    @multimethod
+    @dispatchmethod
     def declare_type(self, _: BooleanType):
         return ir.IntType(1)
 
-    @multimethod
+    @dispatchmethod
     def declare_type(self, _: IntegerType):
         return ir.IntType(64)
 
-    @multimethod
+    @dispatchmethod
     def declare_type(self, type_symbol: ClassType):
         """ class = pointer to struct { fields... } """
         llvm_struct = self.llvm_context.get_identified_type(type_symbol.mangled_name)
@@ -107,18 +111,23 @@ class ModuleCodegen:
         llvm_params = [self.llvm_types[param.type] for param in func.parameters]
         llvm_type = ir.FunctionType(llvm_return, llvm_params)
         llvm_func = ir.Function(self.llvm_module, llvm_type, func.mangled_name)
-        llvm_func.linkage = 'internal'
+        if func.is_instance:
+            # instance is emitted in each module, that uses it, and duplicates are merged by linker
+            llvm_func.linkage = 'linkonce_odr'
+            self.instances.append(func)
+        else:
+            llvm_func.linkage = 'internal'
 
         for llvm_arg, param in zip(llvm_func.args, func.parameters):
             llvm_arg.name = param.name
 
         return llvm_func
 
-    @multimethod
+    @dispatchmethod
     def initialize_type(self, _: Type):
         pass
 
-    @multimethod
+    @dispatchmethod
     def initialize_type(self, type_symbol: ClassType):
         llvm_struct = self.llvm_context.get_identified_type(type_symbol.mangled_name)
         llvm_fields = (self.llvm_types[field.type] for field in type_symbol.fields)
@@ -126,9 +135,13 @@ class ModuleCodegen:
 
     def emit(self, module: Module):
         for func in module.functions:
-            if not func.is_generic:
+            if not func.is_generic and not func.is_instance:
                 self.emit_function(func)
 
+        # instances are shared between modules, therefore they are emitted only if they are used in this module
+        while self.instances:
+            self.emit_function(self.instances.popleft())
+
     def emit_function(self, func: Function):
         llvm_func = self.llvm_functions[func]
         if func.statement:
@@ -208,7 +221,7 @@ class FunctionCodegen:
         llvm_size = self.llvm_builder.gep(ir.Constant(llvm_pointer, None), [ir.Constant(ir.IntType(32), 0)])
         return self.llvm_builder.ptrtoint(llvm_size, self.parent.llvm_size)
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, statement: Statement) -> bool:
         """
 
@@ -217,17 +230,17 @@ class FunctionCodegen:
         """
         raise Diagnostic(statement.location, DiagnosticSeverity.Error, "Not implemented statement conversion to LLVM")
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, statement: BlockStatement) -> bool:
         for child in statement.statements:
             if self.emit_statement(child):
                 return True
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, statement: PassStatement) -> bool:
         return False  # :D
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, statement: ReturnStatement) -> bool:
         if statement.value:
             llvm_value = self.emit_value(statement.value)
@@ -236,12 +249,12 @@ class FunctionCodegen:
             self.llvm_builder.ret_void()
         return True
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, statement: ExpressionStatement) -> bool:
         self.emit_value(statement.value)
         return False
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, statement: ConditionStatement) -> bool:
         llvm_cond = self.emit_value(statement.condition)
 
@@ -261,7 +274,7 @@ class FunctionCodegen:
             self.llvm_function.blocks.remove(self.llvm_builder.basic_block)
         return is_terminated
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, statement: WhileStatement) -> bool:
         # condition block
         llvm_cond_block = self.llvm_builder.append_basic_block('while.cond')
@@ -311,43 +324,43 @@ class FunctionCodegen:
 
         return False
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, statement: AssignStatement) -> bool:
         llvm_source = self.emit_value(statement.source)
         llvm_target = self.emit_target(statement.target)
         self.llvm_builder.store(llvm_source, llvm_target)
         return False
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, value: Value):
         raise Diagnostic(value.location, DiagnosticSeverity.Error, "Not implemented value conversion to LLVM")
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, value: Parameter):
         llvm_alloca = self.llvm_variables[value]
         return self.llvm_builder.load(llvm_alloca)
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, value: Variable):
         llvm_alloca = self.llvm_variables[value]
         return self.llvm_builder.load(llvm_alloca)
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, value: BoundedField):
         llvm_offset = self.emit_offset(value)
         return self.llvm_builder.load(llvm_offset)
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, value: IntegerConstant):
         llvm_type = self.llvm_types[value.type]
         return ir.Constant(llvm_type, value.value)
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, value: BooleanConstant):
         llvm_type = self.llvm_types[value.type]
         return ir.Constant(llvm_type, value.value)
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, value: CallInstruction):
         emitter = self.parent.builtins.emitters.get(value.function)
         if emitter:
@@ -357,7 +370,7 @@ class FunctionCodegen:
         llvm_func = self.llvm_functions[value.function]
         return self.llvm_builder.call(llvm_func, llvm_args)
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, value: NewInstruction):
         if value.arguments:
             raise Diagnostic(value.location, DiagnosticSeverity.Error, "Not implemented constructors")
@@ -372,19 +385,19 @@ class FunctionCodegen:
         else:
             return ir.Constant(llvm_type, None)
 
-    @multimethod
+    @dispatchmethod
     def emit_target(self, value: TargetValue):
         raise Diagnostic(value.location, DiagnosticSeverity.Error, "Not implemented target conversion to LLVM")
 
-    @multimethod
+    @dispatchmethod
     def emit_target(self, value: Parameter):
         return self.llvm_variables[value]
 
-    @multimethod
+    @dispatchmethod
     def emit_target(self, value: Variable):
         return self.llvm_variables[value]
 
-    @multimethod
+    @dispatchmethod
     def emit_target(self, value: BoundedField):
         return self.emit_offset(value)
 
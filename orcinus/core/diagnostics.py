@@ -92,3 +92,5 @@ class DiagnosticManager(Sequence):
 
     def clear(self):
         self.__diagnostics.clear()
+        self.has_error = False
+        self.has_warnings = False
@@ -4,6 +4,10 @@
 # of the MIT license.  See the LICENSE file for details.
 from __future__ import annotations
 
+import bisect
+from array import array
+from typing import Tuple
+
 import attr
 
 
@@ -75,3 +79,89 @@ class Location:
             return f"{self.filename}:{self.begin}-{self.end.column}"
         else:
             return f"{self.filename}:{self.begin}-{self.end}"
+
+
+class LineIndex:
+    """
+    The LineIndex class is represented table of line starts in source, and used for lazy conversion of offsets in
+    source to positions and locations.
+
+    Attributes:
+        filename - The source's filename
+        starts   - Offsets of line starts in source
+    """
+
+    # Line index is built for single source and never relocated, see `LineAnchor`
+    version = 0
+
+    def __init__(self, filename: str, content: str = None, *, starts: array = None):
+        """
+        :param filename:    Source filename
+        :param content:     Source content
+        :param starts:      Already computed offsets of line starts, e.g. maintained by text buffer
+        """
+        self.filename = filename
+        if starts is not None:
+            self.starts = starts
+            return
+
+        self.starts = array('I', [0])
+        offset = content.find('\n')
+        while offset != -1:
+            self.starts.append(offset + 1)
+            offset = content.find('\n', offset + 1)
+
+    def position(self, offset: int) -> Position:
+        """ Convert offset in source to position """
+        line = bisect.bisect_right(self.starts, offset)
+        return Position(line, offset - self.starts[line - 1] + 1)
+
+    def span(self, begin: int, end: int) -> Tuple[int, int]:
+        """ Convert span in source to current span in source """
+        return begin, end
+
+    def location(self, begin: int, end: int) -> Location:
+        """ Convert span [begin, end) in source to location. Location's end is position of last character in span """
+        if begin < end:
+            return Location(self.filename, self.position(begin), self.position(end - 1))
+        position = self.position(begin)
+        return Location(self.filename, position, position)
+
+
+class LineAnchor:
+    """
+    The LineAnchor class is represented relocatable view of line index.
+
+    Syntax symbols of single top-level member are resolved through own anchor, therefore after edit of source before
+    member only anchor is moved and symbols are not changed.
+
+    Attributes:
+        lines   - The current line index
+        delta   - The shift of offsets from moment when symbols were created
+        version - The counter of relocations, used for invalidation of resolved locations
+    """
+
+    def __init__(self, lines: LineIndex):
+        self.lines = lines
+        self.delta = 0
+        self.version = 0
+
+    @property
+    def filename(self) -> str:
+        return self.lines.filename
+
+    def relocate(self, lines: LineIndex, delta: int = 0):
+        """ Move anchor to new line index and shift offsets of symbols by delta """
+        # lines of symbols can be moved by edit, that doesn't change length of source
+        if delta or lines is not self.lines:
+            self.version += 1
+        self.lines = lines
+        self.delta += delta
+
+    def span(self, begin: int, end: int) -> Tuple[int, int]:
+        """ Convert span in source to current span in source """
+        return begin + self.delta, end + self.delta
+
+    def location(self, begin: int, end: int) -> Location:
+        """ Convert span [begin, end) in source to location """
+        return self.lines.location(begin + self.delta, end + self.delta)
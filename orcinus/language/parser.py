@@ -5,6 +5,7 @@
 from __future__ import annotations
 
 from orcinus.core.diagnostics import DiagnosticManager
+from orcinus.core.locations import LineAnchor, LineIndex
 from orcinus.language.scanner import Scanner
 from orcinus.language.syntax import *
 from orcinus.utils import camel_case_to_lower_space
@@ -18,20 +19,31 @@ class Parser:
     )
     STATEMENT_STARTS = EXPRESSION_STARTS + (TokenID.Pass, TokenID.Return, TokenID.While, TokenID.If)
 
-    def __init__(self, filename, stream, *, diagnostics: DiagnosticManager = None):
+    def __init__(self, filename, stream, *, diagnostics: DiagnosticManager = None, lines: LineIndex = None,
+                 offset: int = 0):
         self.diagnostics = diagnostics if diagnostics is not None else DiagnosticManager()
-        self.tokens = list(Scanner(filename, stream, diagnostics=diagnostics))
+        self.tokens = Scanner(filename, stream, diagnostics=diagnostics, lines=lines, offset=offset).tokenize()
         self.index = 0
         self.is_error_mode = False  # marker for error mode
+        self.anchor = LineAnchor(self.tokens.lines)  # anchor for imports and end of file
+        self.anchors = []  # anchors for top-level members
+
+    @property
+    def current_id(self) -> TokenID:
+        return TokenID(self.tokens.kinds[self.index])
 
     @property
     def current_token(self) -> SyntaxToken:
         return self.tokens[self.index]
 
+    @property
+    def current_location(self) -> Location:
+        return self.tokens.location(self.index)
+
     @property
     def previous_location(self) -> Location:
-        location = self.current_token.location
-        return Location(location.filename, location.begin, location.begin)
+        offset = self.tokens.begins[self.index]
+        return self.tokens.lines.location(offset, offset)
 
     def match(self, *indices: TokenID) -> bool:
         """
@@ -40,7 +52,7 @@ class Parser:
         :param indices:     Token identifiers
         :return: True, if current token is matched passed identifiers
         """
-        return self.current_token.id in indices
+        return self.tokens.kinds[self.index] in indices
 
     def consume(self, *indices: TokenID) -> SyntaxToken:
         """
@@ -53,31 +65,52 @@ class Parser:
 
         # check
         if not indices or self.match(*indices):
-            token = self.current_token
-            if self.index < len(self.tokens) - 1:
-                self.index += 1
+            token = self.tokens.token(self.index, self.anchor)
+            self.advance()
             return token
 
         # generate exception message
         if not self.is_error_mode:
             self.is_error_mode = True
             message = self.get_error_message(*indices)
-            self.diagnostics.error(self.current_token.location, message)
+            self.diagnostics.error(self.current_location, message)
 
         # return error token
-        return SyntaxToken(TokenID.Error, '', self.previous_location)
+        offset = self.tokens.begins[self.index]
+        return SyntaxToken(TokenID.Error, '', span=(offset, offset), lines=self.anchor)
+
+    def skip(self, *indices: TokenID):
+        """
+        Consume current token, that is not stored in syntax tree. If token is not matched required IDs then go to
+        error mode
+
+        :param indices:     Token identifiers
+        """
+        if self.match(*indices):
+            self.advance()
+        else:
+            self.consume(*indices)
+
+    def make_collection(self, children: Sequence[SyntaxSymbol] = None) -> SyntaxCollection:
+        """ Create syntax collection. Location of empty collection is begin of current token """
+        offset = self.tokens.begins[self.index]
+        return SyntaxCollection(children, span=(offset, offset), lines=self.anchor)
+
+    def advance(self):
+        """ Skip current token without creation of syntax token """
+        if self.index < len(self.tokens) - 1:
+            self.index += 1
 
     def resume(self, *indices: TokenID):
         """ Resume normal mode by set of synchronizing tokens """
-        trivia = []
         while not self.match(*indices):
-            trivia.append(self.consume())
+            self.advance()
 
         self.is_error_mode = False
         return self.consume(*indices)
 
     def get_error_message(self, *indices: TokenID):
-        existed_name = camel_case_to_lower_space(self.current_token.id.name)
+        existed_name = camel_case_to_lower_space(self.current_id.name)
         if len(indices) > 1:
             required_names = ', '.join(f'‘{camel_case_to_lower_space(x.name)}’' for x in indices)
             return f"Expected one of {required_names}, but got ‘{existed_name}’"
@@ -93,7 +126,7 @@ class Parser:
             members EndFile
         """
         imports = self.parse_imports()
-        members = self.parse_members()
+        members = self.parse_module_members()
         tok_eof = self.consume(TokenID.EndFile)
 
         # noinspection PyArgumentList
@@ -128,7 +161,7 @@ class Parser:
             : [ '[' generic_parameter { ',' generic_parameter } ] ']' ]
         """
         if not self.match(TokenID.LeftSquare):
-            return SyntaxCollection(location=self.previous_location)
+            return self.make_collection()
 
         parameters = [
             self.consume(TokenID.LeftSquare),
@@ -156,12 +189,12 @@ class Parser:
         generic_arguments:
             '[' type { ',' type} ']'
         """
-        self.consume(TokenID.LeftSquare)
+        self.skip(TokenID.LeftSquare)
         arguments = [self.parse_type()]
         while self.match(TokenID.Comma):
-            self.consume(TokenID.Comma)
+            self.skip(TokenID.Comma)
             arguments.append(self.parse_type())
-        self.consume(TokenID.RightSquare)
+        self.skip(TokenID.RightSquare)
         return tuple(arguments)
 
     def parse_imports(self) -> Sequence[ImportAST]:
@@ -172,7 +205,7 @@ class Parser:
         imports = []
         while self.match(*self.IMPORTS_STARTS):
             imports.append(self.parse_import())
-        return SyntaxCollection(imports, location=self.previous_location)
+        return self.make_collection(imports)
 
     def parse_import(self) -> ImportAST:
         """
@@ -248,7 +281,7 @@ class Parser:
             [ '[' '[' attribute { ',' attribute } ']' ']' new_line ] '\n'
         """
         if not self.match(TokenID.LeftSquare):
-            return SyntaxCollection(location=self.previous_location)
+            return self.make_collection()
 
         attributes = [
             self.consume(TokenID.LeftSquare),
@@ -277,7 +310,7 @@ class Parser:
             tok_close = self.consume(TokenID.RightParenthesis)
         else:
             tok_open = None
-            arguments = SyntaxCollection(location=self.previous_location)
+            arguments = self.make_collection()
             tok_close = None
 
         # noinspection PyArgumentList
@@ -291,7 +324,24 @@ class Parser:
         members = []
         while self.match(*self.MEMBERS_STARTS):
             members.append(self.parse_member())
-        return SyntaxCollection(members, location=self.previous_location)
+        return self.make_collection(members)
+
+    def parse_module_members(self) -> Sequence[MemberAST]:
+        """
+        Parse top-level members. Each top-level member has own anchor, e.g. it can be relocated in source
+        independently from other members.
+
+        module_members:
+            { member }
+        """
+        module_anchor = self.anchor
+        members = []
+        while self.match(*self.MEMBERS_STARTS):
+            self.anchor = LineAnchor(self.tokens.lines)
+            members.append(self.parse_member())
+            self.anchors.append(self.anchor)
+        self.anchor = module_anchor
+        return self.make_collection(members)
 
     def parse_member(self) -> MemberAST:
         """
@@ -308,7 +358,7 @@ class Parser:
             # Check required tokens
             self.match(TokenID.Def, TokenID.Class, TokenID.String, TokenID.Name)
         else:
-            attributes = SyntaxCollection(location=self.previous_location)
+            attributes = self.make_collection()
 
         if self.match(TokenID.Def):
             return self.parse_function(attributes)
@@ -367,7 +417,7 @@ class Parser:
             ':' '...' '\n'
             ':' '\n' Indent members Undent
         """
-        self.consume(TokenID.Colon)
+        self.skip(TokenID.Colon)
 
         if self.match(TokenID.Ellipsis):
             tok_ellipsis = self.consume(TokenID.Ellipsis)
@@ -425,7 +475,7 @@ class Parser:
         else:
             # noinspection PyArgumentList
             tok_then = None
-            return_type = AutoTypeAST(location=tok_name.location)
+            return_type = AutoTypeAST(span=tok_name.span, lines=self.anchor)
         tok_colon = self.consume(TokenID.Colon)
         statement = self.parse_function_statement()
 
@@ -456,7 +506,7 @@ class Parser:
                 parameters.append(self.consume(TokenID.Comma))
                 parameters.append(self.parse_parameter())
 
-        return SyntaxCollection(parameters, location=self.previous_location)
+        return self.make_collection(parameters)
 
     def parse_parameter(self) -> ParameterAST:
         """
@@ -470,7 +520,7 @@ class Parser:
         else:
             tok_colon = None
             # noinspection PyArgumentList
-            param_type = AutoTypeAST(location=tok_name.location)
+            param_type = AutoTypeAST(span=tok_name.span, lines=self.anchor)
 
         # noinspection PyArgumentList
         return ParameterAST(tok_name=tok_name, tok_colon=tok_colon, type=param_type)
@@ -486,7 +536,7 @@ class Parser:
             tok_newline = self.consume(TokenID.NewLine)
             return EllipsisStatementAST(tok_ellipsis=tok_ellipsis, tok_newline=tok_newline)
 
-        self.consume(TokenID.NewLine)
+        self.skip(TokenID.NewLine)
         return self.parse_block_statement()
 
     def parse_block_statement(self) -> StatementAST:
@@ -542,7 +592,7 @@ class Parser:
         """
         tok_return = self.consume(TokenID.Return)
         value = self.parse_expression() if self.match(*self.EXPRESSION_STARTS) else None
-        self.consume(TokenID.NewLine)
+        self.skip(TokenID.NewLine)
 
         # noinspection PyArgumentList
         return ReturnStatementAST(tok_return, value=value)
@@ -658,7 +708,7 @@ class Parser:
 
         arguments = [self.parse_expression()]
         while self.match(TokenID.Comma):
-            self.consume(TokenID.Comma)
+            self.skip(TokenID.Comma)
             if self.match(*self.EXPRESSION_STARTS):
                 arguments.append(self.parse_expression())
             else:
@@ -823,7 +873,9 @@ class Parser:
         elif self.match(TokenID.LeftParenthesis):
             expression = self.parse_parenthesis_expression()
         else:
-            raise self.match(*self.EXPRESSION_STARTS)  # Make linter happy
+            # report error and continue with error token as expression
+            # noinspection PyArgumentList
+            expression = NamedExpressionAST(tok_name=self.consume(*self.EXPRESSION_STARTS))
 
         while self.match(TokenID.LeftParenthesis, TokenID.LeftSquare, TokenID.Dot):
             if self.match(TokenID.LeftParenthesis):
@@ -894,7 +946,7 @@ class Parser:
         parenthesis_expression:
             '(' expression ')'
         """
-        self.consume(TokenID.LeftParenthesis)
+        self.skip(TokenID.LeftParenthesis)
         expression = self.parse_expression()
-        self.consume(TokenID.RightParenthesis)
+        self.skip(TokenID.RightParenthesis)
         return expression
@@ -6,13 +6,65 @@ from __future__ import annotations
 
 import collections
 import re
-from typing import Iterator
+import sys
+from array import array
+from typing import Iterator, Tuple, Union
 
 from orcinus.core.diagnostics import DiagnosticSeverity, Diagnostic, DiagnosticManager
-from orcinus.core.locations import Location
+from orcinus.core.locations import LineAnchor, LineIndex, Location
 from orcinus.language.syntax import SyntaxToken, TokenID
 
 
+class TokenStream(collections.abc.Sequence):
+    """
+    The TokenStream class is represented compact buffer of scanned tokens.
+
+    Tokens are stored as struct of arrays: identifiers of tokens, offsets of begins and ends of tokens in source.
+    Values of tokens are slices of source and syntax tokens are created only on demand. Values of names are interned,
+    therefore symbol names are hashed once and compared by identity in lookups.
+    """
+
+    # This tuple contains tokens without value, e.g. produced by scanner and not presented in source
+    EMPTY_TOKENS = (TokenID.Indent, TokenID.Undent, TokenID.EndFile)
+
+    def __init__(self, source: str, lines: LineIndex, offset: int = 0):
+        self.source = source
+        self.lines = lines
+        self.offset = offset
+        self.kinds = array('b')
+        self.begins = array('I')
+        self.ends = array('I')
+
+    def append(self, token_id: TokenID, begin: int, end: int):
+        self.kinds.append(token_id)
+        self.begins.append(begin)
+        self.ends.append(end)
+
+    def value(self, index: int) -> str:
+        """ Returns value of token """
+        kind = self.kinds[index]
+        if kind in self.EMPTY_TOKENS:
+            return ''
+        value = self.source[self.begins[index] - self.offset:self.ends[index] - self.offset]
+        return sys.intern(value) if kind == TokenID.Name else value
+
+    def location(self, index: int) -> Location:
+        """ Returns location of token """
+        return self.lines.location(self.begins[index], self.ends[index])
+
+    def token(self, index: int, lines: Union[LineIndex, LineAnchor] = None) -> SyntaxToken:
+        """ Create syntax token, that is resolved location by passed line index or anchor """
+        span = (self.begins[index], self.ends[index])
+        return SyntaxToken(TokenID(self.kinds[index]), self.value(index), span=span, lines=lines or self.lines)
+
+    def __getitem__(self, index: int) -> SyntaxToken:
+        """ Create syntax token """
+        return self.token(index)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+
 class Scanner:
     # This list contains regex for tokens
     TOKENS = [
@@ -68,12 +120,21 @@ class Scanner:
     OPEN_BRACKETS = (TokenID.LeftParenthesis,)
     CLOSE_BRACKETS = (TokenID.RightParenthesis,)
 
-    def __init__(self, filename, stream, *, diagnostics: DiagnosticManager = None):
+    def __init__(self, filename, stream, *, diagnostics: DiagnosticManager = None, lines: LineIndex = None,
+                 offset: int = 0):
+        """
+        :param filename:    Source filename
+        :param stream:      Source stream
+        :param diagnostics: Diagnostics manager
+        :param lines:       Line index of source. Required if stream contains only part of source
+        :param offset:      Offset of stream's content in source
+        """
         self.diagnostics = diagnostics if diagnostics is not None else DiagnosticManager()
         self.index = 0
         self.buffer = stream.read()
         self.length = len(self.buffer)
-        self.location = Location(filename)
+        self.offset = offset
+        self.lines = lines if lines is not None else LineIndex(filename, self.buffer)
 
     # noinspection PyMethodParameters
     def __make_regex(patterns):
@@ -90,103 +151,87 @@ class Scanner:
     # noinspection PyArgumentList
     regex_pattern, regex_groups = __make_regex(TOKENS)
 
-    def tokenize(self) -> Iterator[SyntaxToken]:
+    def tokenize(self) -> TokenStream:
+        tokens = TokenStream(self.buffer, self.lines, self.offset)
         indentions = collections.deque([0])
         is_new = True  # new line
         is_empty = True  # empty line
         whitespace = None
         level = 0  # disable indentation
 
-        for token in self.tokenize_all():
+        for token_id, begin, end in self.tokenize_all():
             # new line
-            if token.id == TokenID.NewLine:
+            if token_id == TokenID.NewLine:
                 if level:
                     continue
 
                 if not is_empty:
-                    yield token
+                    tokens.append(token_id, begin, end)
 
                 is_new = True
                 is_empty = True
                 continue
 
-            elif token.id == TokenID.Whitespace:
+            elif token_id == TokenID.Whitespace:
                 if is_new:
-                    whitespace = token
+                    whitespace = (begin, end)
                 continue
 
-            elif token.id == TokenID.EndFile:
-                location = Location(token.location.filename, token.location.end, token.location.end)
+            elif token_id == TokenID.EndFile:
                 while indentions[-1] > 0:
-                    yield SyntaxToken(TokenID.Undent, '', location)
+                    tokens.append(TokenID.Undent, begin, end)
                     indentions.pop()
 
-                yield token
+                tokens.append(token_id, begin, end)
                 continue
 
-            elif token.id in self.TRIVIA_TOKENS:
+            elif token_id in self.TRIVIA_TOKENS:
                 continue
 
             if is_new:
                 if whitespace:
-                    indent = len(whitespace.value)
-                    location = whitespace.location
+                    indent_begin, indent_end = whitespace
+                    indent = indent_end - indent_begin
                     whitespace = None
                 else:
                     indent = 0
-                    location = Location(token.location.filename, token.location.begin, token.location.begin)
+                    indent_begin, indent_end = begin, begin
 
                 if indentions[-1] < indent:
-                    yield SyntaxToken(TokenID.Indent, '', location)
+                    tokens.append(TokenID.Indent, indent_begin, indent_end)
                     indentions.append(indent)
 
                 while indentions[-1] > indent:
-                    yield SyntaxToken(TokenID.Undent, '', location)
+                    tokens.append(TokenID.Undent, indent_begin, indent_end)
                     indentions.pop()
 
             is_new = False
             is_empty = False
 
-            if token.id in self.OPEN_BRACKETS:
+            if token_id in self.OPEN_BRACKETS:
                 level += 1
-            elif token.id in self.CLOSE_BRACKETS:
+            elif token_id in self.CLOSE_BRACKETS:
                 level -= 1
 
-            yield token
+            tokens.append(token_id, begin, end)
+
+        return tokens
 
-    def tokenize_all(self) -> Iterator[SyntaxToken]:
+    def tokenize_all(self) -> Iterator[Tuple[TokenID, int, int]]:
+        """ Scan all tokens from source, include trivia. Returns token identifier and span in source """
         while self.index < self.length:
             yield self.__match()
-        yield SyntaxToken(TokenID.EndFile, "", self.location)
+        end = self.offset + self.length
+        yield TokenID.EndFile, end, end
 
     def __match(self):
-        self.location.columns(1)
-        self.location = self.location.step()
-
-        # other tokens
         match = self.regex_pattern.match(self.buffer, self.index)
         if not match:
-            raise Diagnostic(self.location, DiagnosticSeverity.Error, "Unknown symbol")
-
-        group_name = match.lastgroup
-        symbol_id = self.regex_groups[group_name]
-        value = match.group(group_name)
-        self.index += len(value)
-        location = self.__consume_location(value)
-        return SyntaxToken(symbol_id, value, location)
-
-    def __consume_location(self, value):
-        for c in value[:-1]:
-            if c == '\n':
-                self.location = self.location.lines(1)
-            elif len(value) > 1:
-                self.location = self.location.columns(1)
-        location = self.location
-        if value[-1] == '\n':
-            self.location = self.location.lines(1)
-        else:
-            self.location = self.location.columns(1)
-        return location
-
-    def __iter__(self):
-        return self.tokenize()
+            offset = self.offset + self.index
+            raise Diagnostic(self.lines.location(offset, offset), DiagnosticSeverity.Error, "Unknown symbol")
+
+        begin, self.index = match.span()
+        return self.regex_groups[match.lastgroup], self.offset + begin, self.offset + self.index
+
+    def __iter__(self) -> Iterator[SyntaxToken]:
+        return iter(self.tokenize())
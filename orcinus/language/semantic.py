@@ -4,17 +4,17 @@
 # of the MIT license.  See the LICENSE file for details.
 from __future__ import annotations
 
+import collections
 import heapq
 import logging
 from contextlib import contextmanager
-from typing import Tuple
-
-from multimethod import multimethod
+from typing import List, Mapping, MutableMapping, Optional, Set, Tuple
 
 from orcinus.core.diagnostics import DiagnosticSeverity, Diagnostic, DiagnosticManager
 from orcinus.exceptions import OrcinusError
 from orcinus.language.syntax import *
-from orcinus.utils import cached_property
+from orcinus.profiling import time_report
+from orcinus.utils import cached_property, dispatchmethod
 
 logger = logging.getLogger('orcinus')
 
@@ -24,11 +24,27 @@ class LexicalScope:
         self.__parent = parent
         self.__defined = dict()  # Defined symbols
         self.__resolved = dict()  # Resolved symbols
+        self.__version = 0  # Version of defined symbols, it's changed after each definition of symbol
 
     @property
     def parent(self) -> LexicalScope:
         return self.__parent
 
+    @property
+    def defined(self) -> Mapping[str, NamedSymbol]:
+        """ Returns symbols, that are defined in current scope """
+        return self.__defined
+
+    @property
+    def versions(self) -> Tuple[int, ...]:
+        """ Returns versions of current and ascendant scopes """
+        versions = [self.__version]
+        scope = self.__parent
+        while scope is not None:
+            versions.append(scope.__version)
+            scope = scope.__parent
+        return tuple(versions)
+
     def resolve(self, name: str) -> Optional[NamedSymbol]:
         """
         Resolve symbol by name in current scope.
@@ -72,6 +88,7 @@ class LexicalScope:
 
     def append(self, symbol: NamedSymbol, name: str = None) -> None:
         name = name or symbol.name
+        self.__version += 1
         try:
             existed_symbol = self.__defined[name]
         except KeyError:
@@ -82,15 +99,205 @@ class LexicalScope:
             existed_symbol.append(symbol)
 
 
+BUILTINS_MODULE = '__builtins__'
+
+
+class SemanticCacheEntry:
+    """
+    Attributes:
+        digest          - Hash of analyzed source
+        model           - Analyzed semantic model
+        diagnostics     - Diagnostics, that are reported during analysis of model
+        dependencies    - Names of modules, that are used by model
+    """
+
+    def __init__(self, digest: int, model: SemanticModel, diagnostics: DiagnosticManager, dependencies: Set[str]):
+        self.digest = digest
+        self.model = model
+        self.diagnostics = diagnostics
+        self.dependencies = dependencies
+
+
+class InstanceTable:
+    """
+    The InstanceTable class is represented workspace-level table of generic instances, that are shared between modules.
+
+    Instances are keyed by mangled name of generic definition and generic arguments. Instance is removed from table, if
+    module that created it is invalidated.
+    """
+
+    def __init__(self):
+        self.__instances: MutableMapping[Tuple[str, Tuple[Type, ...]], GenericSymbol] = {}
+        self.__owned: MutableMapping[str, Set[Tuple[str, Tuple[Type, ...]]]] = collections.defaultdict(set)
+
+    def find(self, generic: GenericSymbol, generic_arguments: Sequence[Type]) -> Optional[GenericSymbol]:
+        instance = self.__instances.get((generic.mangled_name, tuple(generic_arguments)))
+        if instance is not None and instance.definition is not generic:
+            return None  # instance of changed definition, it's replaced by new instance
+        return instance
+
+    def register(self, generic: GenericSymbol, generic_arguments: Sequence[Type], instance: GenericSymbol):
+        key = (generic.mangled_name, tuple(generic_arguments))
+        self.__instances[key] = instance
+        self.__owned[instance.module.name].add(key)
+
+    def invalidate(self, module_name: str):
+        """ Remove all instances, that are created by module """
+        for key in self.__owned.pop(module_name, ()):
+            self.__instances.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.__instances)
+
+
+class TypeInterner:
+    """
+    The TypeInterner class is represented workspace-level cache of mangled names of structural types.
+
+    Structurally equal types, e.g. function types with same parameter and return types, share single mangled name,
+    that is computed once. Name is removed from cache, if module that requested it is invalidated.
+    """
+
+    def __init__(self):
+        self.__names: MutableMapping[Tuple, str] = {}
+        self.__owned: MutableMapping[str, Set[Tuple]] = collections.defaultdict(set)
+
+    def mangled_name(self, module: Module, func_type: FunctionType) -> str:
+        """ Returns mangled name of function type """
+        key = (FunctionType, tuple(func_type.parameters), func_type.return_type)
+        try:
+            return self.__names[key]
+        except KeyError:
+            name = MangledContext().mangle(func_type)
+            self.__names[key] = name
+            self.__owned[module.name].add(key)
+            return name
+
+    def invalidate(self, module_name: str):
+        """ Remove all names, that are requested by module """
+        for key in self.__owned.pop(module_name, ()):
+            self.__names.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+
+class SymbolTable:
+    """
+    The SymbolTable class is represented workspace-level table of symbols, that are declared in analyzed modules.
+
+    Symbols are keyed by name. Symbols of module are removed from table, if module is invalidated.
+    """
+
+    def __init__(self):
+        self.__symbols: MutableMapping[str, List[NamedSymbol]] = collections.defaultdict(list)
+        self.__owned: MutableMapping[str, Sequence[NamedSymbol]] = {}
+
+    def register(self, module: Module):
+        """ Add symbols, that are declared in module and in it's types """
+        self.invalidate(module.name)
+
+        symbols = []
+        containers = [module]
+        while containers:
+            for member in containers.pop().members:
+                if isinstance(member, NamedSymbol):
+                    symbols.append(member)
+                    self.__symbols[member.name].append(member)
+                if isinstance(member, Type):
+                    containers.append(member)
+        self.__owned[module.name] = symbols
+
+    def find(self, name: str) -> Sequence[NamedSymbol]:
+        """ Returns symbols with name """
+        return tuple(self.__symbols.get(name, ()))
+
+    def search(self, query: str) -> Sequence[NamedSymbol]:
+        """ Returns symbols, which names contain query. Names are compared case-insensitive """
+        query = query.lower()
+        return [symbol for name, symbols in self.__symbols.items() if query in name.lower() for symbol in symbols]
+
+    def invalidate(self, module_name: str):
+        """ Remove all symbols, that are declared in module """
+        owned = self.__owned.pop(module_name, ())
+        identities = {id(symbol) for symbol in owned}
+        for name in {symbol.name for symbol in owned}:
+            symbols = [symbol for symbol in self.__symbols[name] if id(symbol) not in identities]
+            if symbols:
+                self.__symbols[name] = symbols
+            else:
+                del self.__symbols[name]
+
+    def __len__(self) -> int:
+        return sum(map(len, self.__symbols.values()))
+
+
+class SemanticCache:
+    """
+    The SemanticCache class is represented workspace-level cache of analyzed semantic models.
+
+    Models are stored by module name and hash of source. If module is changed, then models of all modules that
+    directly or transitively imported it are invalidated.
+    """
+
+    def __init__(self):
+        self.__entries: MutableMapping[str, SemanticCacheEntry] = {}
+        self.__dependents: MutableMapping[str, Set[str]] = collections.defaultdict(set)
+        self.instances = InstanceTable()
+        self.types = TypeInterner()
+        self.symbols = SymbolTable()
+
+    def get(self, document: Document) -> Optional[SemanticCacheEntry]:
+        """ Returns analyzed model for document, if it's source is not changed """
+        entry = self.__entries.get(document.name)
+        if entry and entry.digest != hash(document.source):
+            self.invalidate(document.name)
+            return None
+        return entry
+
+    def put(self, document: Document, entry: SemanticCacheEntry):
+        self.__entries[document.name] = entry
+        self.symbols.register(entry.model.module)
+        for dependency in entry.dependencies:
+            self.__dependents[dependency].add(document.name)
+
+    def invalidate(self, module_name: str):
+        """ Remove model of module and all dependent models """
+        self.__entries.pop(module_name, None)
+        self.instances.invalidate(module_name)
+        self.types.invalidate(module_name)
+        self.symbols.invalidate(module_name)
+        for dependent in self.__dependents.pop(module_name, ()):
+            self.invalidate(dependent)
+
+    def __contains__(self, module_name: str) -> bool:
+        return module_name in self.__entries
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
 class SemanticContext:
     def __init__(self, workspace: Workspace, *, diagnostics: DiagnosticManager = None):
         self.diagnostics = diagnostics if diagnostics is not None else DiagnosticManager()
         self.workspace = workspace
         self.models = {}
+        self.__reported = set()  # names of modules, which diagnostics are reported in this context
+        self.__dependencies = collections.deque()  # dependencies of currently analyzed models
+
+    @property
+    def instances(self) -> InstanceTable:
+        """ Returns generic instances, that are shared between all modules of workspace """
+        return self.workspace.semantic_cache.instances
+
+    @property
+    def types(self) -> TypeInterner:
+        """ Returns mangled names of types, that are shared between all modules of workspace """
+        return self.workspace.semantic_cache.types
 
     @cached_property
     def builtins_model(self) -> SemanticModel:
-        return self.load('__builtins__')
+        return self.load(BUILTINS_MODULE)
 
     @cached_property
     def builtins_module(self) -> Module:
@@ -114,14 +321,55 @@ class SemanticContext:
 
     def open(self, document: Document) -> SemanticModel:
         """ Open module from file """
+        if self.__dependencies:
+            self.__dependencies[-1].add(document.name)
         if document.uri in self.models:
             return self.models[document.uri]
 
-        model = SemanticModel(self, document.name, document.tree, diagnostics=self.diagnostics)
+        cache = self.workspace.semantic_cache
+        entry = cache.get(document)
+        if entry:
+            self.models[document.uri] = entry.model
+            self.__report(entry)
+            return entry.model
+
+        # all modules, except builtins, are implicitly dependent from builtins
+        dependencies = {BUILTINS_MODULE} if document.name != BUILTINS_MODULE else set()
+        diagnostics = DiagnosticManager()
+        model = SemanticModel(self, document.name, document.tree, diagnostics=diagnostics)
         self.models[document.uri] = model
-        model.analyze()
+
+        self.__dependencies.append(dependencies)
+        try:
+            model.analyze()
+        except BaseException:
+            # failed model is not stored in cache and is not invalidated with dependencies, therefore instances and
+            # types that are created by it are removed now
+            cache.invalidate(document.name)
+            raise
+        finally:
+            self.__dependencies.pop()
+            for diagnostic in diagnostics:
+                self.diagnostics.add(diagnostic.location, diagnostic.severity, diagnostic.message, diagnostic.source)
+
+        entry = SemanticCacheEntry(hash(document.source), model, diagnostics, dependencies)
+        cache.put(document, entry)
+        self.__reported.add(document.name)
         return model
 
+    def __report(self, entry: SemanticCacheEntry):
+        """ Report diagnostics of cached model and it's dependencies """
+        if entry.model.module_name in self.__reported:
+            return
+        self.__reported.add(entry.model.module_name)
+
+        for diagnostic in entry.diagnostics:
+            self.diagnostics.add(diagnostic.location, diagnostic.severity, diagnostic.message, diagnostic.source)
+        for dependency in entry.dependencies:
+            dependency_entry = self.workspace.semantic_cache.get(self.workspace.load_document(dependency))
+            if dependency_entry:
+                self.__report(dependency_entry)
+
     def load(self, module_name) -> SemanticModel:
         document = self.workspace.load_document(module_name)
         return self.open(document)
@@ -136,6 +384,7 @@ class SemanticModel:
         self.tree = tree
         self.symbols = {}
         self.scopes = {}
+        self.overloads = {}  # resolved overloads: (scope, name, argument types) -> (versions, function, generic args)
 
         self.__functions = collections.deque()
 
@@ -154,10 +403,14 @@ class SemanticModel:
         return self.__functions[0]
 
     def analyze(self):
-        self.annotate_recursive_scope(self.tree)
-        self.import_symbols(self.tree)
-        self.declare_symbol(self.tree, None)
-        self.emit_functions(self.tree)
+        with time_report.measure('semantic.annotate', self.module_name):
+            self.annotate_recursive_scope(self.tree)
+        with time_report.measure('semantic.import', self.module_name):
+            self.import_symbols(self.tree)
+        with time_report.measure('semantic.declare', self.module_name):
+            self.declare_symbol(self.tree, None)
+        with time_report.measure('semantic.emit', self.module_name):
+            self.emit_functions(self.tree)
 
     def annotate_recursive_scope(self, node: SyntaxNode, parent=None):
         scope = self.scopes.get(node) or self.annotate_scope(node, parent)
@@ -165,27 +418,27 @@ class SemanticModel:
         for child in node:
             self.annotate_recursive_scope(child, scope)
 
-    @multimethod
+    @dispatchmethod
     def annotate_scope(self, _: SyntaxNode, parent: LexicalScope) -> LexicalScope:
         return parent
 
-    @multimethod
+    @dispatchmethod
     def annotate_scope(self, _1: SyntaxTree, _2=None) -> LexicalScope:
         return LexicalScope()
 
-    @multimethod
+    @dispatchmethod
     def annotate_scope(self, _: FunctionAST, parent: LexicalScope) -> LexicalScope:
         return LexicalScope(parent)
 
-    @multimethod
+    @dispatchmethod
     def annotate_scope(self, _: BlockStatementAST, parent: LexicalScope) -> LexicalScope:
         return LexicalScope(parent)
 
-    @multimethod
+    @dispatchmethod
     def annotate_scope(self, _: ClassAST, parent: LexicalScope) -> LexicalScope:
         return LexicalScope(parent)
 
-    @multimethod
+    @dispatchmethod
     def annotate_scope(self, _: StructAST, parent: LexicalScope) -> LexicalScope:
         return LexicalScope(parent)
 
@@ -243,12 +496,12 @@ class SemanticModel:
 
         return symbol
 
-    @multimethod
+    @dispatchmethod
     def resolve_type(self, node: TypeAST) -> Type:
         self.diagnostics.error(node.location, "Not implemented type resolving")
         return ErrorType(self.module, node.location)
 
-    @multimethod
+    @dispatchmethod
     def resolve_type(self, node: NamedTypeAST) -> Type:
         if node.name == 'void':
             return self.context.void_type
@@ -264,7 +517,7 @@ class SemanticModel:
         self.diagnostics.error(node.location, f"Not found symbol `{node.name} in current scope`")
         return ErrorType(self.module, node.location)
 
-    @multimethod
+    @dispatchmethod
     def resolve_type(self, node: ParameterizedTypeAST) -> Type:
         instance_type = self.resolve_type(node.type)
         arguments = [self.resolve_type(arg) for arg in node.arguments]
@@ -287,21 +540,21 @@ class SemanticModel:
             parameters.append(generic)
         return parameters
 
-    @multimethod
+    @dispatchmethod
     def annotate_symbol(self, node: SyntaxNode, parent: ContainerSymbol) -> Symbol:
         self.diagnostics.error(node.location, "Not implemented member declaration")
         return ErrorSymbol(node.location)
 
     # noinspection PyUnusedLocal
-    @multimethod
+    @dispatchmethod
     def annotate_symbol(self, node: SyntaxTree, parent=None) -> Module:
         return Module(self.context, self.module_name, Location(node.location.filename))
 
-    @multimethod
+    @dispatchmethod
     def annotate_symbol(self, node: PassMemberAST, parent: ContainerSymbol) -> Optional[Symbol]:
         return None
 
-    @multimethod
+    @dispatchmethod
     def annotate_symbol(self, node: FunctionAST, parent: ContainerSymbol) -> Function:
         scope = self.scopes[node]
         generic_parameters = self.annotate_generics(scope, node.generic_parameters)
@@ -334,7 +587,7 @@ class SemanticModel:
 
         return func
 
-    @multimethod
+    @dispatchmethod
     def annotate_symbol(self, node: StructAST, parent: ContainerSymbol) -> Type:
         if self.module == self.context.builtins_module:
             if node.name == "int":
@@ -347,7 +600,7 @@ class SemanticModel:
         generic_parameters = self.annotate_generics(self.scopes[node], node.generic_parameters)
         return StructType(parent, node.name, node.location, generic_parameters=generic_parameters)
 
-    @multimethod
+    @dispatchmethod
     def annotate_symbol(self, node: ClassAST, parent: ContainerSymbol) -> Type:
         if self.module == self.context.builtins_module:
             if node.name == "str":
@@ -356,11 +609,11 @@ class SemanticModel:
         generic_parameters = self.annotate_generics(self.scopes[node], node.generic_parameters)
         return ClassType(parent, node.name, node.location, generic_parameters=generic_parameters)
 
-    @multimethod
+    @dispatchmethod
     def annotate_symbol(self, node: GenericParameterAST, parent: ContainerSymbol) -> Symbol:
         return GenericType(parent, node.name, node.location)
 
-    @multimethod
+    @dispatchmethod
     def annotate_symbol(self, node: FieldAST, parent: ContainerSymbol) -> Symbol:
         if not isinstance(parent, Type):
             self.diagnostics.error(node.location, "Field member must be declared in type")
@@ -396,7 +649,8 @@ class SemanticModel:
         return functions
 
     @staticmethod
-    def check_naive_function(func: Function, arguments: Sequence[Value]) -> Tuple[Optional[int], Function]:
+    def check_naive_function(func: Function, arguments: Sequence[Value]) \
+            -> Tuple[Optional[int], Optional[Sequence[Type]]]:
         """
         Returns:
 
@@ -408,39 +662,67 @@ class SemanticModel:
         :return:
         """
         if len(func.parameters) != len(arguments):
-            return None, func
+            return None, None
 
         priority = 0
         for param, arg in zip(func.parameters, arguments):
             if arg.type != param.type:
-                return None, func
+                return None, None
             priority += 2
-        return priority, func
+        return priority, None
 
-    def check_generic_function(self, func: Function, arguments: Sequence[Value], location: Location) \
-            -> Tuple[Optional[int], Function]:
+    def check_generic_function(self, func: Function, arguments: Sequence[Value]) \
+            -> Tuple[Optional[int], Optional[Sequence[Type]]]:
+        """ Returns priority and inferred generic arguments. Function is instantiated only if it's selected """
         if len(func.parameters) != len(arguments):
-            return None, func
+            return None, None
 
         context = InferenceContext()
         instance_types = [context.add_generic_parameter(parameter) for parameter in func.generic_parameters]
         parameter_types = [context.add_type(parameter.type) for parameter in func.parameters]
         argument_types = [context.add_type(arg.type) for arg in arguments]
-        for param_type, arg_type in zip(parameter_types, argument_types):
-            context.unify(param_type, arg_type)
-
-        generic_arguments = [var_type.instantiate(self.module) for var_type in instance_types]
-        instance = func.instantiate(self.module, generic_arguments, location)
-        return -1, instance
 
-    def check_function(self, func: Function, arguments: Sequence[Value], location: Location) \
-            -> Optional[Tuple[int, Function]]:
+        # function is not applicable, if types of arguments are not unified or generic arguments are not inferred
+        try:
+            for param_type, arg_type in zip(parameter_types, argument_types):
+                context.unify(param_type, arg_type)
+            generic_arguments = [var_type.instantiate(self.module) for var_type in instance_types]
+        except Diagnostic as ex:
+            logger.debug(f"Can not infer generic arguments of ‘{func}’: {ex.message}")
+            return None, None
+        return -1, generic_arguments
+
+    def check_function(self, func: Function, arguments: Sequence[Value]) \
+            -> Tuple[Optional[int], Optional[Sequence[Type]]]:
         if func.is_generic:
-            return self.check_generic_function(func, arguments, location)
+            return self.check_generic_function(func, arguments)
         return self.check_naive_function(func, arguments)
 
     def find_function(self, scope: LexicalScope, name: str, arguments: Sequence[Value], location: Location) \
             -> Optional[Function]:
+        """
+        Find function for call with arguments. Result is cached until symbols of scope or type of first argument
+        (and it's ascendant scopes) are changed
+        """
+        self_type = arguments[0].type if arguments else None
+        key = (scope, name, tuple(arg.type for arg in arguments))
+        versions = scope.versions + (self_type.scope.versions if self_type else ())
+
+        entry = self.overloads.get(key)
+        if entry and entry[0] == versions:
+            _, func, generic_arguments = entry
+        else:
+            func, generic_arguments = self.find_overload(scope, name, arguments)
+            self.overloads[key] = versions, func, generic_arguments
+
+        # generic function is instantiated for current call site, instance is shared by `InstanceTable`
+        if func and generic_arguments is not None:
+            return func.instantiate(self.module, generic_arguments, location)
+        return func
+
+    def find_overload(self, scope: LexicalScope, name: str, arguments: Sequence[Value]) \
+            -> Tuple[Optional[Function], Optional[Sequence[Type]]]:
+        """ Find function for call with arguments. Returns function and generic arguments, if function is generic """
         # find candidates
         functions = self.get_functions(scope, name, arguments[0].type if arguments else None)
 
@@ -448,24 +730,24 @@ class SemanticModel:
         counter = itertools.count()
         candidates = []
         for func in functions:
-            priority, instance = self.check_function(func, arguments, location)
+            priority, generic_arguments = self.check_function(func, arguments)
             if priority is not None:
-                heapq.heappush(candidates, (priority, next(counter), instance))
+                heapq.heappush(candidates, (priority, next(counter), func, generic_arguments))
 
         # pop all function with minimal priority
         functions = []
         current_priority = None
         while candidates:
-            priority, _, func = heapq.heappop(candidates)
+            priority, _, func, generic_arguments = heapq.heappop(candidates)
             if current_priority is not None and current_priority != priority:
                 break
 
             current_priority = priority
-            functions.append(func)
+            functions.append((func, generic_arguments))
 
-        if functions:
-            return functions[0]
-        return None
+        if not functions:
+            return None, None
+        return functions[0]
 
     def resolve_function(self, scope: LexicalScope, name: str, arguments: Sequence[Value], location: Location) \
             -> Optional[Function]:
@@ -477,24 +759,24 @@ class SemanticModel:
             return None
         return func
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, node: StatementAST) -> Statement:
         raise Diagnostic(node.location, DiagnosticSeverity.Error, "Not implemented statement emitting")
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, node: BlockStatementAST) -> Statement:
         statements = [self.emit_statement(statement) for statement in node.statements]
         return BlockStatement(statements, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, node: ElseStatementAST) -> Statement:
         return self.emit_statement(node.statement)
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, node: PassStatementAST) -> Statement:
         return PassStatement(node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, node: ReturnStatementAST) -> Statement:
         value = self.emit_value(node.value) if node.value else None
         return_type = self.current_function.return_type
@@ -508,12 +790,12 @@ class SemanticModel:
             raise Diagnostic(node.location, DiagnosticSeverity.Error, message)
         return ReturnStatement(value, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, node: ExpressionStatementAST) -> Statement:
         value = self.emit_value(node.value)
         return ExpressionStatement(value)
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, node: ConditionStatementAST) -> Statement:
         condition = self.emit_value(node.condition)
         then_statement = self.emit_statement(node.then_statement)
@@ -526,7 +808,7 @@ class SemanticModel:
 
         return ConditionStatement(condition, then_statement, else_statement, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, node: WhileStatementAST) -> Statement:
         condition = self.emit_value(node.condition)
         then_statement = self.emit_statement(node.then_statement)
@@ -539,16 +821,16 @@ class SemanticModel:
 
         return WhileStatement(condition, then_statement, else_statement, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_statement(self, node: AssignStatementAST) -> Statement:
         value = self.emit_value(node.source)
         return self.emit_assignment(node.target, value, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_assignment(self, node: ExpressionAST, value: Value, location: Location) -> Statement:
         raise Diagnostic(node.location, DiagnosticSeverity.Error, "Not implemented target assignement emitting")
 
-    @multimethod
+    @dispatchmethod
     def emit_assignment(self, node: NamedExpressionAST, value: Value, location: Location) -> Statement:
         symbol = self.emit_symbol(node, False)
         if not isinstance(symbol, TargetValue):
@@ -563,7 +845,7 @@ class SemanticModel:
 
         return AssignStatement(symbol, value, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_assignment(self, node: AttributeExpressionAST, value: Value, location: Location) -> Statement:
         symbol = self.emit_symbol(node, True)
         if not isinstance(symbol, TargetValue):
@@ -576,15 +858,15 @@ class SemanticModel:
 
         return AssignStatement(symbol, value, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, node: ExpressionAST) -> Value:
         raise Diagnostic(node.location, DiagnosticSeverity.Error, "Not implemented value emitting")
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, node: IntegerExpressionAST) -> Value:
         return cast(Value, self.emit_symbol(node, True))
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, node: NamedExpressionAST) -> Value:
         value = self.emit_symbol(node, True)
         if isinstance(value, Value):
@@ -592,7 +874,7 @@ class SemanticModel:
 
         raise Diagnostic(node.location, DiagnosticSeverity.Error, "Required value, but got another object")
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, node: AttributeExpressionAST) -> Value:
         value = self.emit_symbol(node, True)
         if isinstance(value, Value):
@@ -600,7 +882,7 @@ class SemanticModel:
 
         raise Diagnostic(node.location, DiagnosticSeverity.Error, "Required value, but got another object")
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, node: CallExpressionAST) -> Value:
         arguments = [self.emit_value(arg) for arg in node.arguments]
         if any(isinstance(arg.type, ErrorType) for arg in arguments):
@@ -629,7 +911,7 @@ class SemanticModel:
         self.diagnostics.error(node.location, f'Not found function for call')
         return ErrorValue(self.module, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, node: UnaryExpressionAST) -> Value:
         arguments = [self.emit_value(node.operand)]
         if any(isinstance(arg.type, ErrorType) for arg in arguments):
@@ -649,7 +931,7 @@ class SemanticModel:
             return ErrorValue(self.module, node.location)
         return CallInstruction(func, arguments, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_value(self, node: BinaryExpressionAST) -> Value:
         arguments = [self.emit_value(node.left_operand), self.emit_value(node.right_operand)]
         if any(isinstance(arg.type, ErrorType) for arg in arguments):
@@ -671,16 +953,16 @@ class SemanticModel:
             return ErrorValue(self.module, node.location)
         return CallInstruction(func, arguments, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_symbol(self, node: ExpressionAST, is_exists: bool) -> Symbol:
         self.diagnostics.error(node.location, "Not implemented symbol emitting")
         return ErrorSymbol(node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_symbol(self, node: IntegerExpressionAST, is_exists: bool) -> Symbol:
         return IntegerConstant(self.context.integer_type, node.value, node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_symbol(self, node: NamedExpressionAST, is_exists: bool) -> Symbol:
         if node.name in ['True', 'False']:
             return BooleanConstant(self.context.boolean_type, node.name == 'True', node.location)
@@ -698,7 +980,7 @@ class SemanticModel:
             return ErrorSymbol(node.location)
         return symbol
 
-    @multimethod
+    @dispatchmethod
     def emit_symbol(self, node: AttributeExpressionAST, is_exists: bool) -> Symbol:
         instance = self.emit_symbol(node.value, True)
         if isinstance(instance, Value):
@@ -716,7 +998,7 @@ class SemanticModel:
         self.diagnostics.error(node.location, "Not implemented symbol emitting")
         return ErrorSymbol(node.location)
 
-    @multimethod
+    @dispatchmethod
     def emit_symbol(self, node: SubscribeExpressionAST, is_exists: bool) -> Symbol:
         symbol = self.emit_symbol(node.value, True)
         arguments = [self.emit_symbol(arg, True) for arg in node.arguments]
@@ -742,7 +1024,7 @@ class InstantiateContext:
     def register(self, param, arg):
         self.__mapping[param] = arg
 
-    @multimethod
+    @dispatchmethod
     def instantiate(self, generic: Type, location: Location):
         if generic in self.__mapping:
             return self.__mapping[generic]
@@ -765,7 +1047,7 @@ class InstantiateContext:
         self.register(generic, result_type)
         return result_type
 
-    @multimethod
+    @dispatchmethod
     def instantiate(self, field: Field, location: Location) -> Field:
         if field in self.__mapping:
             return self.__mapping[field]
@@ -777,37 +1059,37 @@ class InstantiateContext:
         self.register(field, new_field)
         return new_field
 
-    @multimethod
+    @dispatchmethod
     def instantiate(self, statement: Statement, location: Location):
         raise Diagnostic(statement.location, DiagnosticSeverity.Error, "Not implemented statement instantiation")
 
-    @multimethod
+    @dispatchmethod
     def instantiate(self, statement: BlockStatement, location: Location):
         return BlockStatement(
             [self.instantiate(child, location) for child in statement.statements],
             statement.location
         )
 
-    @multimethod
+    @dispatchmethod
     def instantiate(self, statement: ReturnStatement, location: Location):
         return ReturnStatement(
             self.instantiate(statement.value, location) if statement.value else None,
             statement.location
         )
 
-    @multimethod
+    @dispatchmethod
     def instantiate(self, value: Value, location: Location):
         raise Diagnostic(value.location, DiagnosticSeverity.Error, "Not implemented value instantiation")
 
-    @multimethod
+    @dispatchmethod
     def instantiate(self, value: IntegerConstant, location: Location):
         return value
 
-    @multimethod
+    @dispatchmethod
     def instantiate(self, value: BooleanConstant, location: Location):
         return value
 
-    @multimethod
+    @dispatchmethod
     def instantiate(self, value: Parameter, location: Location):
         return self.__mapping[value]
 
@@ -818,6 +1100,7 @@ class InferenceType(abc.ABC):
 
     @abc.abstractmethod
     def prune(self) -> InferenceType:
+        """ Returns representative of type: bound constructor or root variable """
         raise NotImplementedError
 
     @abc.abstractmethod
@@ -830,39 +1113,53 @@ class InferenceType(abc.ABC):
 
 
 class InferenceVariable(InferenceType):
+    """
+    The InferenceVariable class is node of disjoint set (union-find) of unified variables.
+
+    Attributes:
+        parent  - The parent variable in disjoint set, root variable has no parent
+        rank    - The upper bound of tree height, that is used for union by rank
+        bound   - The constructor, that is bound to disjoint set. Only root variable has bound constructor
+    """
+
     def __init__(self, name: str, location: Location):
         super(InferenceVariable, self).__init__(location)
 
         self.__name = name
-        self.__instance = None
+        self.parent: Optional[InferenceVariable] = None
+        self.rank = 0
+        self.bound: Optional[InferenceConstructor] = None
 
     @property
     def name(self):
         return self.__name
 
-    @property
-    def instance(self) -> InferenceType:
-        return self.__instance
+    def find(self) -> InferenceVariable:
+        """ Returns root variable of disjoint set. Paths to root are compressed """
+        root = self
+        while root.parent is not None:
+            root = root.parent
 
-    @instance.setter
-    def instance(self, value: InferenceType):
-        self.__instance = value
+        variable = self
+        while variable is not root:
+            variable.parent, variable = root, variable.parent
+        return root
 
     def prune(self) -> InferenceType:
-        if self.instance:
-            self.instance = self.instance.prune()
-            return self.instance
-        return self
+        root = self.find()
+        return root.bound or root
 
     def instantiate(self, module: Module) -> Type:
-        if self.instance:
-            return self.instance.instantiate(module)
+        pruned = self.prune()
+        if isinstance(pruned, InferenceConstructor):
+            return pruned.instantiate(module)
 
         raise Diagnostic(self.location, DiagnosticSeverity.Error, "Can not instantiate type variable")
 
     def __str__(self):
-        if self.instance:
-            return str(self.instance)
+        pruned = self.prune()
+        if isinstance(pruned, InferenceConstructor):
+            return str(pruned)
         return self.__name
 
 
@@ -874,9 +1171,6 @@ class InferenceConstructor(InferenceType):
         self.arguments = tuple(arguments)
 
     def prune(self) -> InferenceType:
-        arguments = [arg.prune() for arg in self.arguments]
-        if self.arguments != arguments:
-            return InferenceConstructor(self.constructor, arguments, self.location)
         return self
 
     def instantiate(self, module: Module) -> Type:
@@ -884,7 +1178,7 @@ class InferenceConstructor(InferenceType):
             return self.constructor
 
         arguments = [arg.instantiate(module) for arg in self.arguments]
-        return self.constructor.instantiate(module, arguments)
+        return self.constructor.instantiate(module, arguments, self.location)
 
     def __str__(self):
         if self.arguments:
@@ -893,11 +1187,15 @@ class InferenceConstructor(InferenceType):
         return self.constructor.name
 
 
-class InferenceError(OrcinusError):
-    pass
+class InferenceContext:
+    """
+    The InferenceContext class is used for unification of types.
 
+    Unified variables are merged in disjoint sets with union by rank and path compression, and unification and
+    occurs check are iterative, therefore inference time is almost linear by count of constraints and is not limited
+    by recursion limit.
+    """
 
-class InferenceContext:
     def __init__(self):
         self.__types = {}
 
@@ -921,57 +1219,33 @@ class InferenceContext:
         self.__types[param_type] = constructor
         return constructor
 
-    @classmethod
-    def is_generic(cls, v: InferenceType, non_generic):
-        """Checks whether a given variable occurs in a list of non-generic variables
-
-        Note that a variables in such a list may be instantiated to a type term,
-        in which case the variables contained in the type term are considered
-        non-generic.
-
-        Note: Must be called with v pre-pruned
-
-        Args:
-            v: The TypeVariable to be tested for genericity
-            non_generic: A set of non-generic TypeVariables
-
-        Returns:
-            True if v is a generic variable, otherwise False
+    @staticmethod
+    def occurs_in_type(variable: InferenceVariable, other: InferenceType) -> bool:
         """
-        return not cls.occurs_in(v, non_generic)
-
-    @classmethod
-    def occurs_in_type(cls, v: InferenceType, type2: InferenceType):
-        """Checks whether a type variable occurs in a type expression.
-
-        Note: Must be called with v pre-pruned
-
-        Args:
-            v:  The TypeVariable to be tested for
-            type2: The type in which to search
+        Checks whether a type variable occurs in a type expression.
 
-        Returns:
-            True if v occurs in type2, otherwise False
+        :param variable:    The root variable to be tested for
+        :param other:       The type in which to search
         """
-        pruned_type2 = type2.prune()
-        if pruned_type2 == v:
-            return True
-        elif isinstance(pruned_type2, InferenceConstructor):
-            return cls.occurs_in(v, pruned_type2.arguments)
+        visited = set()
+        stack = [other]
+        while stack:
+            pruned = stack.pop().prune()
+            if pruned is variable:
+                return True
+            if isinstance(pruned, InferenceConstructor) and id(pruned) not in visited:
+                visited.add(id(pruned))
+                stack.extend(pruned.arguments)
         return False
 
-    @classmethod
-    def occurs_in(cls, t: InferenceType, types: Sequence[InferenceType]):
-        """Checks whether a types variable occurs in any other types.
-
-        Args:
-            t:  The TypeVariable to be tested for
-            types: The sequence of types in which to search
-
-        Returns:
-            True if t occurs in any of types, otherwise False
-        """
-        return any(cls.occurs_in_type(t, t2) for t2 in types)
+    @staticmethod
+    def union(first: InferenceVariable, second: InferenceVariable):
+        """ Merge disjoint sets of root variables """
+        if first.rank < second.rank:
+            first, second = second, first
+        second.parent = first
+        if first.rank == second.rank:
+            first.rank += 1
 
     @classmethod
     def unify(cls, t1: InferenceType, t2: InferenceType):
@@ -980,42 +1254,45 @@ class InferenceContext:
 
         :param t1:  The first type to be made equivalent
         :param t2:  The second type to be be equivalent
-        :return: None
-        :raises InferenceError - Raised if the types cannot be unified.
+        :raises Diagnostic - Raised if the types cannot be unified.
         """
-
-        t1 = t1.prune()
-        t2 = t2.prune()
-        if isinstance(t1, InferenceVariable):
-            if t1 != t2:
-                if cls.occurs_in_type(t1, t2):
-                    raise InferenceError("recursive unification")
-                t1.instance = t2
-        elif isinstance(t1, InferenceConstructor) and isinstance(t2, InferenceVariable):
-            cls.unify(t2, t1)
-        elif isinstance(t1, InferenceConstructor) and isinstance(t2, InferenceConstructor):
-            if t1.constructor != t2.constructor or len(t1.arguments) != len(t2.arguments):
-                raise InferenceError("Type mismatch: {0} != {1}".format(str(t1), str(t2)))
-            for p, q in zip(t1.arguments, t2.arguments):
-                cls.unify(p, q)
-        else:
-            assert 0, "Not unified"
+        stack = [(t1, t2)]
+        while stack:
+            first, second = stack.pop()
+            first = first.prune()
+            second = second.prune()
+            if first is second:
+                continue
+
+            if isinstance(first, InferenceVariable) and isinstance(second, InferenceVariable):
+                cls.union(first, second)
+            elif isinstance(first, InferenceVariable) or isinstance(second, InferenceVariable):
+                variable, constructor = (first, second) if isinstance(first, InferenceVariable) else (second, first)
+                if cls.occurs_in_type(variable, constructor):
+                    message = f"Recursive unification of ‘{variable}’ and ‘{constructor}’"
+                    raise Diagnostic(constructor.location, DiagnosticSeverity.Error, message)
+                variable.bound = constructor
+            elif first.constructor != second.constructor or len(first.arguments) != len(second.arguments):
+                message = f"Type mismatch: ‘{first}’ != ‘{second}’"
+                raise Diagnostic(second.location, DiagnosticSeverity.Error, message)
+            else:
+                stack.extend(zip(first.arguments, second.arguments))
 
 
 class MangledContext:
     def __init__(self):
         self.parts = []
 
-    @multimethod
+    @dispatchmethod
     def append(self, name: str):
         self.parts.append(name)
         self.append(len(name))
 
-    @multimethod
+    @dispatchmethod
     def append(self, value: int):
         self.parts.append(str(value))
 
-    @multimethod
+    @dispatchmethod
     def append(self, module: Module):
         self.append(module.name)
         self.append("M")
@@ -1029,15 +1306,15 @@ class MangledContext:
     def construct(self):
         return ''.join(reversed(self.parts))
 
-    @multimethod
+    @dispatchmethod
     def append(self, type: Type):
         self.parts.append(str(type))
 
-    @multimethod
+    @dispatchmethod
     def mangle(self, symbol: MangledSymbol):
         raise Diagnostic(symbol.location, DiagnosticSeverity.Error, "Can not mangle symbol name")
 
-    @multimethod
+    @dispatchmethod
     def mangle(self, func: Function):
         definition = func.definition if func.definition else func
 
@@ -1063,19 +1340,19 @@ class MangledContext:
 
         return self.construct()
 
-    @multimethod
+    @dispatchmethod
     def mangle(self, symbol: IntegerType):
         return "i32"
 
-    @multimethod
+    @dispatchmethod
     def mangle(self, symbol: BooleanType):
         return "b"
 
-    @multimethod
+    @dispatchmethod
     def mangle(self, symbol: VoidType):
         return "v"
 
-    @multimethod
+    @dispatchmethod
     def mangle(self, type_symbol: Type):
         definition = type_symbol.definition if type_symbol.definition else type_symbol
 
@@ -1095,7 +1372,14 @@ class MangledContext:
 
 
 class Symbol(abc.ABC):
-    """ Abstract base for all symbols """
+    """
+    Abstract base for all symbols.
+
+    Symbols, values and statements, that are created in large amounts by semantic analysis, are declared with
+    `__slots__`. Types, functions and modules have cached properties and are kept with instance dictionary.
+    """
+
+    __slots__ = ()
 
     @property
     @abc.abstractmethod
@@ -1114,6 +1398,8 @@ class Symbol(abc.ABC):
 class NamedSymbol(Symbol, abc.ABC):
     """ Abstract base for all named symbols """
 
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def name(self) -> str:
@@ -1126,6 +1412,8 @@ class NamedSymbol(Symbol, abc.ABC):
 class OwnedSymbol(NamedSymbol, abc.ABC):
     """ Abstract base for all owned symbols """
 
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def owner(self) -> ContainerSymbol:
@@ -1139,6 +1427,8 @@ class OwnedSymbol(NamedSymbol, abc.ABC):
 
 
 class MangledSymbol(OwnedSymbol, abc.ABC):
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def mangled_name(self) -> str:
@@ -1167,12 +1457,19 @@ class ContainerSymbol(Symbol, abc.ABC):
 
 
 class GenericSymbol(NamedSymbol, abc.ABC):
+    __slots__ = ()
+
     @property
     def is_generic(self) -> bool:
         if self.generic_parameters:
             return True
         return any(arg.is_generic for arg in self.generic_arguments)
 
+    @property
+    def is_instance(self) -> bool:
+        """ Returns true, if symbol is instance of generic definition with concrete generic arguments """
+        return self.definition is not None and not self.is_generic
+
     @property
     @abc.abstractmethod
     def definition(self) -> GenericSymbol:
@@ -1205,7 +1502,7 @@ class GenericSymbol(NamedSymbol, abc.ABC):
 
 
 class ErrorSymbol(Symbol):
-    __location: Location
+    __slots__ = ('__location',)
 
     def __init__(self, location: Location):
         self.__location = location
@@ -1219,12 +1516,14 @@ class ErrorSymbol(Symbol):
 
 
 class GenericParameter(NamedSymbol, abc.ABC):
-    pass
+    __slots__ = ()
 
 
 class Value(Symbol, abc.ABC):
     """ Abstract base for all values """
 
+    __slots__ = ('__location', '__type')
+
     def __init__(self, value_type: Type, location: Location):
         self.__location = location
         self.__type = value_type
@@ -1243,6 +1542,8 @@ class Value(Symbol, abc.ABC):
 
 
 class Attribute(NamedSymbol):
+    __slots__ = ('__location', '__name', '__arguments')
+
     def __init__(self, name: str, arguments: Sequence[Value], location: Location):
         self.__location = location
         self.__name = name
@@ -1268,7 +1569,6 @@ class Module(NamedSymbol, ContainerSymbol):
         self.__context = context
         self.__name = name
         self.__location = location
-        self.__instances = {}  # Map of all generic instances
         self.__functions = []
         self.__types = []
 
@@ -1288,12 +1588,13 @@ class Module(NamedSymbol, ContainerSymbol):
         self.__functions.append(func)
 
     def find_instance(self, generic: GenericSymbol, generic_arguments):
-        key = (generic, tuple(generic_arguments))
-        return self.__instances.get(key)
+        return self.__context.instances.find(generic, generic_arguments)
 
     def register_instance(self, generic: GenericSymbol, generic_arguments, instance: GenericSymbol):
-        key = (generic, tuple(generic_arguments))
-        self.__instances[key] = instance
+        self.__context.instances.register(generic, generic_arguments, instance)
+
+    def mangle_type(self, func_type: FunctionType) -> str:
+        return self.__context.types.mangled_name(self, func_type)
 
 
 class Type(MangledSymbol, GenericSymbol, OwnedSymbol, ContainerSymbol, abc.ABC):
@@ -1414,12 +1715,14 @@ class StructType(Type):
         if not instance:
             context = InstantiateContext(module)
             context.aggregate(self.generic_parameters, generic_arguments)
-            return StructType(module, self.name, self.location, generic_arguments=generic_arguments, definition=self)
+            instance = StructType(module, self.name, self.location, generic_arguments=generic_arguments, definition=self)
         module.register_instance(self.definition or self, generic_arguments, instance)
         return instance
 
 
 class FunctionType(Type):
+    """ Function types are compared structurally and share mangled names through `TypeInterner` """
+
     def __init__(self, owner: ContainerSymbol, parameters: Sequence[Type], return_type: Type, location: Location):
         super(FunctionType, self).__init__(owner, "Function", location)
 
@@ -1437,15 +1740,17 @@ class FunctionType(Type):
     def parameters(self) -> Sequence[Type]:
         return self.__parameters
 
+    @cached_property
+    def mangled_name(self) -> str:
+        return self.module.mangle_type(self)
+
     def __eq__(self, other):
         if not isinstance(other, FunctionType):
             return False
-        is_return_equal = self.return_type == other.return_type
-        return is_return_equal and all(
-            param == other_param for param, other_param in zip(self.parameters, other.parameters))
+        return self.return_type == other.return_type and tuple(self.parameters) == tuple(other.parameters)
 
     def __hash__(self):
-        return id(self)
+        return hash((tuple(self.parameters), self.return_type))
 
     def __str__(self):
         parameters = ', '.join(str(param_type) for param_type in self.parameters)
@@ -1459,6 +1764,8 @@ class GenericType(GenericParameter, Type):
 class ErrorValue(Value):
     """ Instance of this class is represented errors in semantic analyze """
 
+    __slots__ = ()
+
     def __init__(self, module: Module, location: Location):
         super(ErrorValue, self).__init__(ErrorType(module, location), location)
 
@@ -1467,10 +1774,12 @@ class ErrorValue(Value):
 
 
 class TargetValue(Value, abc.ABC):
-    pass
+    __slots__ = ()
 
 
 class Parameter(OwnedSymbol, TargetValue):
+    __slots__ = ('__owner', '__name')
+
     def __init__(self, owner: Function, name: str, param_type: Type):
         super(Parameter, self).__init__(param_type, owner.location)
 
@@ -1494,6 +1803,8 @@ class Parameter(OwnedSymbol, TargetValue):
 
 
 class Variable(NamedSymbol, TargetValue):
+    __slots__ = ('__name',)
+
     def __init__(self, name: str, type: Type, location: Location):
         super(Variable, self).__init__(type, location)
 
@@ -1627,6 +1938,8 @@ class Function(MangledSymbol, GenericSymbol, OwnedSymbol, Value):
 
 
 class Overload(NamedSymbol):
+    __slots__ = ('__name', '__functions')
+
     def __init__(self, name: str, function: Function):
         self.__name = name
         self.__functions = [function]
@@ -1653,6 +1966,8 @@ class Overload(NamedSymbol):
 
 
 class Field(OwnedSymbol):
+    __slots__ = ('__owner', '__name', '__type', '__location')
+
     def __init__(self, owner: Type, name: str, field_type: Type, location: Location):
         self.__owner = owner
         self.__name = name
@@ -1677,6 +1992,8 @@ class Field(OwnedSymbol):
 
 
 class IntegerConstant(Value):
+    __slots__ = ('value',)
+
     def __init__(self, value_type: IntegerType, value: int, location: Location):
         super(IntegerConstant, self).__init__(value_type, location)
 
@@ -1687,6 +2004,8 @@ class IntegerConstant(Value):
 
 
 class BooleanConstant(Value):
+    __slots__ = ('value',)
+
     def __init__(self, value_type: BooleanType, value: bool, location: Location):
         super(BooleanConstant, self).__init__(value_type, location)
 
@@ -1697,6 +2016,8 @@ class BooleanConstant(Value):
 
 
 class StringConstant(Value):
+    __slots__ = ('value',)
+
     def __init__(self, value_type: StringType, value: str, location: Location):
         super(StringConstant, self).__init__(value_type, location)
 
@@ -1708,6 +2029,8 @@ class StringConstant(Value):
 
 
 class CallInstruction(Value):
+    __slots__ = ('function', 'arguments')
+
     def __init__(self, func: Function, arguments: Sequence[Value], location: Location):
         super(CallInstruction, self).__init__(func.return_type, location)
 
@@ -1720,6 +2043,8 @@ class CallInstruction(Value):
 
 
 class NewInstruction(Value):
+    __slots__ = ('arguments',)
+
     def __init__(self, return_type: Type, arguments: Sequence[Value], location: Location):
         super(NewInstruction, self).__init__(return_type, location)
 
@@ -1731,6 +2056,8 @@ class NewInstruction(Value):
 
 
 class BoundedValue(Value, abc.ABC):
+    __slots__ = ('instance',)
+
     def __init__(self, instance: Value, value_type: Type, location: Location):
         super(BoundedValue, self).__init__(value_type, location)
 
@@ -1738,6 +2065,8 @@ class BoundedValue(Value, abc.ABC):
 
 
 class BoundedField(BoundedValue, TargetValue):
+    __slots__ = ('field',)
+
     def __init__(self, instance: Value, field: Field, location: Location):
         super(BoundedField, self).__init__(instance, field.type, location)
 
@@ -1748,11 +2077,15 @@ class BoundedField(BoundedValue, TargetValue):
 
 
 class Statement:
+    __slots__ = ('location',)
+
     def __init__(self, location: Location):
         self.location = location
 
 
 class BlockStatement(Statement):
+    __slots__ = ('statements',)
+
     def __init__(self, statements: Sequence[Statement], location: Location):
         super(BlockStatement, self).__init__(location)
 
@@ -1760,10 +2093,12 @@ class BlockStatement(Statement):
 
 
 class PassStatement(Statement):
-    pass
+    __slots__ = ()
 
 
 class ReturnStatement(Statement):
+    __slots__ = ('value',)
+
     def __init__(self, value: Optional[Value], location=None):
         super(ReturnStatement, self).__init__(location)
 
@@ -1771,6 +2106,8 @@ class ReturnStatement(Statement):
 
 
 class ExpressionStatement(Statement):
+    __slots__ = ('value',)
+
     def __init__(self, value: Value):
         super(ExpressionStatement, self).__init__(value.location)
 
@@ -1778,6 +2115,8 @@ class ExpressionStatement(Statement):
 
 
 class ConditionStatement(Statement):
+    __slots__ = ('condition', 'then_statement', 'else_statement')
+
     def __init__(self, condition: Value, then_statement: Statement, else_statement: Optional[Statement], location):
         super(ConditionStatement, self).__init__(location)
 
@@ -1787,6 +2126,8 @@ class ConditionStatement(Statement):
 
 
 class WhileStatement(Statement):
+    __slots__ = ('condition', 'then_statement', 'else_statement')
+
     def __init__(self, condition: Value, then_statement: Statement, else_statement: Optional[Statement], location):
         super(WhileStatement, self).__init__(location)
 
@@ -1796,6 +2137,8 @@ class WhileStatement(Statement):
 
 
 class AssignStatement(Statement):
+    __slots__ = ('target', 'source')
+
     def __init__(self, target: TargetValue, source: Value, location: Location):
         super(AssignStatement, self).__init__(location)
 
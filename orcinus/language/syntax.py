@@ -5,19 +5,29 @@
 from __future__ import annotations
 
 import abc
+import bisect
 import collections
 import enum
 import itertools
-import weakref
-from dataclasses import dataclass
-from typing import Sequence, Optional, Iterator, cast
+from dataclasses import dataclass, fields
+from typing import Sequence, Optional, Iterator, Tuple, Union, cast
 
+from orcinus.core.locations import LineAnchor
+from orcinus.core.locations import LineIndex
 from orcinus.core.locations import Location
 from orcinus.core.locations import Position
-from orcinus.utils import cached_property
 
 
 class SyntaxSymbol(abc.ABC):
+    """
+    Abstract base for all syntax symbols.
+
+    Syntax symbols are slotted and don't keep references to parents, because trees are built for each source and are
+    kept in memory for each opened document. Parents are resolved on demand by `SyntaxTree.parents`.
+    """
+
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def location(self) -> Location:
@@ -100,11 +110,12 @@ class TriviaID(enum.IntEnum):
 
 
 class SyntaxTrivia(SyntaxSymbol):
+    __slots__ = ('__id', '__value', '__location')
+
     def __init__(self, trivia_id: TriviaID, value: str, location: Location):
         self.__id = trivia_id
         self.__value = value
         self.__location = location
-        self.__parent = None
 
     @property
     def id(self) -> TriviaID:
@@ -118,14 +129,6 @@ class SyntaxTrivia(SyntaxSymbol):
     def location(self) -> Location:
         return self.__location
 
-    @property
-    def parent(self) -> Optional[SyntaxToken]:
-        return self.__parent() if self.__parent else None
-
-    @parent.setter
-    def parent(self, value: SyntaxNode):
-        self.__parent = weakref.ref(value) if value else None
-
     def contains(self, position: Position) -> bool:
         return self.begin_location.begin <= position <= self.end_location.end
 
@@ -137,14 +140,24 @@ class SyntaxTrivia(SyntaxSymbol):
 
 
 class SyntaxToken(SyntaxSymbol):
-    def __init__(self, token_id: TokenID, value: str, location: Location, *,
+    __slots__ = (
+        '__id', '__value', '__location', '__span', '__lines', '__version', '__leading_trivia', '__trailing_trivia'
+    )
+
+    def __init__(self, token_id: TokenID, value: str, location: Location = None, *,
+                 span: Tuple[int, int] = None, lines: Union[LineIndex, LineAnchor] = None,
                  leading_trivia: Sequence[SyntaxTrivia] = None, trailing_trivia: Sequence[SyntaxTrivia] = None):
+        if location is None and (span is None or lines is None):
+            raise ValueError(u'Require location or span in source')
+
         self.__id = token_id
         self.__value = value
         self.__location = location
+        self.__span = span
+        self.__lines = lines
+        self.__version = lines.version if lines is not None else 0
         self.__leading_trivia = tuple(leading_trivia or [])
         self.__trailing_trivia = tuple(trailing_trivia or [])
-        self.__parent = None
 
     @property
     def id(self) -> TokenID:
@@ -154,14 +167,6 @@ class SyntaxToken(SyntaxSymbol):
     def value(self) -> str:
         return self.__value
 
-    @property
-    def parent(self) -> Optional[SyntaxNode]:
-        return self.__parent() if self.__parent else None
-
-    @parent.setter
-    def parent(self, value: SyntaxNode):
-        self.__parent = weakref.ref(value) if value else None
-
     @property
     def leading_trivia(self) -> Sequence[SyntaxTrivia]:
         return self.__leading_trivia
@@ -170,8 +175,18 @@ class SyntaxToken(SyntaxSymbol):
     def trailing_trivia(self) -> Sequence[SyntaxTrivia]:
         return self.__trailing_trivia
 
+    @property
+    def span(self) -> Optional[Tuple[int, int]]:
+        """ Offsets of begin and end of token in source, if token is scanned from source """
+        return self.__lines.span(*self.__span) if self.__span else None
+
     @property
     def location(self) -> Location:
+        # Location of scanned token is resolved from line index only on demand, and resolved again if token's anchor
+        # was relocated
+        if self.__location is None or (self.__lines is not None and self.__version != self.__lines.version):
+            self.__location = self.__lines.location(*self.__span)
+            self.__version = self.__lines.version
         return self.__location
 
     @property
@@ -197,21 +212,45 @@ class SyntaxToken(SyntaxSymbol):
             return f'[{self.location}] {self.id.name}: `{value}`'
         return f'[{self.location}] {self.id.name}'
 
-    def _propagate_parents(self):
-        for child in itertools.chain(self.leading_trivia, self.trailing_trivia):
-            child.parent = self
-
 
 class SyntaxNode(SyntaxSymbol):
-    __parent = None
-
-    @property
-    def parent(self) -> Optional[SyntaxNode]:
-        return self.__parent() if self.__parent else None
-
-    @parent.setter
-    def parent(self, value: SyntaxNode):
-        self.__parent = weakref.ref(value) if value else None
+    """
+    Abstract base for all syntax nodes.
+
+    Children nodes and tokens, and first and last leaf symbols of node are computed once on first access and stored in
+    node. Leaf is token or node without children. Locations are not stored, because tokens are relocated after changes
+    in source.
+    """
+
+    __slots__ = ('__nodes', '__tokens', '__begin', '__end')
+
+    def __initialize(self):
+        children = self.children
+        if children:
+            first, last = children[0], children[-1]
+            begin = first.__get_begin() if isinstance(first, SyntaxNode) else first
+            end = last.__get_end() if isinstance(last, SyntaxNode) else last
+        else:
+            begin = end = self
+
+        object.__setattr__(self, '_SyntaxNode__nodes', tuple(c for c in children if isinstance(c, SyntaxNode)))
+        object.__setattr__(self, '_SyntaxNode__tokens', tuple(c for c in children if isinstance(c, SyntaxToken)))
+        object.__setattr__(self, '_SyntaxNode__begin', begin)
+        object.__setattr__(self, '_SyntaxNode__end', end)
+
+    def __get_begin(self) -> SyntaxSymbol:
+        try:
+            return self.__begin
+        except AttributeError:
+            self.__initialize()
+            return self.__begin
+
+    def __get_end(self) -> SyntaxSymbol:
+        try:
+            return self.__end
+        except AttributeError:
+            self.__initialize()
+            return self.__end
 
     @property
     @abc.abstractmethod
@@ -221,26 +260,32 @@ class SyntaxNode(SyntaxSymbol):
     @property
     def nodes(self) -> Sequence[SyntaxNode]:
         """ Returns children syntax nodes """
-        return cast(Sequence[SyntaxNode], list(filter(lambda s: isinstance(s, SyntaxNode), self.children)))
+        try:
+            return self.__nodes
+        except AttributeError:
+            self.__initialize()
+            return self.__nodes
 
     @property
     def tokens(self) -> Sequence[SyntaxToken]:
         """ Returns children syntax tokens """
-        return cast(Sequence[SyntaxToken], list(filter(lambda s: isinstance(s, SyntaxToken), self.children)))
+        try:
+            return self.__tokens
+        except AttributeError:
+            self.__initialize()
+            return self.__tokens
 
     @property
     def begin_location(self) -> Location:
         """ Begin location in source, include leading tokens and trivia """
-        if self.children:
-            return self.children[0].begin_location
-        return self.location
+        begin = self.__get_begin()
+        return self.location if begin is self else begin.begin_location
 
     @property
     def end_location(self) -> Location:
         """ End location in source, include leading tokens and trivia """
-        if self.children:
-            return self.children[-1].end_location
-        return self.location
+        end = self.__get_end()
+        return self.location if end is self else end.end_location
 
     def contains(self, position: Position) -> bool:
         return self.begin_location.begin <= position <= self.end_location.end
@@ -258,34 +303,42 @@ class SyntaxNode(SyntaxSymbol):
             return self
         return None
 
-    def propagate_parents(self):
-        for child in self.children:
-            child.parent = self
-            child.propagate_parents()
-
     def __iter__(self) -> Iterator[SyntaxSymbol]:
         return iter(self.nodes)
 
+    def __setstate__(self, state):
+        # frozen nodes can not be unpickled by default, because values of slots are restored by `setattr`
+        _, slots = state
+        for name, value in slots.items():
+            object.__setattr__(self, name, value)
+
     def __str__(self) -> str:
         return type(self).__name__
 
     def _cleanup(self, *symbols: SyntaxSymbol) -> Sequence[SyntaxSymbol]:
-        return [n for n in symbols if isinstance(n, SyntaxSymbol)]
+        return tuple(n for n in symbols if isinstance(n, SyntaxSymbol))
 
 
 class SyntaxCollection(SyntaxNode, collections.abc.Sequence):
-    def __init__(self, children: Sequence[SyntaxSymbol] = None, location: Location = None):
-        if not children and not location:
+    __slots__ = ('__children', '__location', '__span', '__lines')
+
+    def __init__(self, children: Sequence[SyntaxSymbol] = None, location: Location = None, *,
+                 span: Tuple[int, int] = None, lines: Union[LineIndex, LineAnchor] = None):
+        if not children and not location and (span is None or lines is None):
             raise ValueError(u'Require children or location')
 
         self.__children = tuple(children or ())
         self.__location = location
+        self.__span = span
+        self.__lines = lines
 
     @property
     def location(self) -> Location:
         if self.__location:
             return self.__location
-        return self.__children[0].begin_location + self.__children[-1].end_location
+        elif not self.__children:
+            return self.__lines.location(*self.__span)
+        return self.begin_location + self.end_location
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
@@ -301,27 +354,153 @@ class SyntaxCollection(SyntaxNode, collections.abc.Sequence):
         return symbol in self.__children
 
 
+class ParentIndex:
+    """ The ParentIndex class is represented map from syntax symbols of tree to their parents """
+
+    __slots__ = ('__parents',)
+
+    def __init__(self, root: SyntaxNode):
+        self.__parents = {}  # symbols are keyed by identity, because syntax nodes are compared by value
+
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for child in node.children:
+                self.__parents[id(child)] = node
+                if isinstance(child, SyntaxNode):
+                    stack.append(child)
+                elif isinstance(child, SyntaxToken):
+                    for trivia in itertools.chain(child.leading_trivia, child.trailing_trivia):
+                        self.__parents[id(trivia)] = child
+
+    def parent(self, symbol: SyntaxSymbol) -> Optional[SyntaxSymbol]:
+        """ Returns parent of symbol, or `None` for root of tree """
+        return self.__parents.get(id(symbol))
+
+    def ancestors(self, symbol: SyntaxSymbol) -> Iterator[SyntaxSymbol]:
+        """ Returns parents of symbol from innermost to root of tree """
+        parent = self.parent(symbol)
+        while parent is not None:
+            yield parent
+            parent = self.parent(parent)
+
+
+class PositionIndex:
+    """
+    The PositionIndex class is represented sorted index of tree's segments in source, that is used for lookup of
+    innermost syntax symbol by position in O(log n).
+
+    Source is split to segments by begins and ends of tokens: each segment is mapped to innermost token, that contains
+    it, or innermost syntax node, if segment is placed between tokens. Tokens without value, e.g. indents, are not
+    presented in source and are not indexed.
+    """
+
+    __slots__ = ('__starts', '__symbols', '__nodes')
+
+    def __init__(self, root: SyntaxNode):
+        self.__starts = []  # begins of segments as pairs of line and column
+        self.__symbols = []  # innermost symbols of segments
+        self.__nodes = []  # innermost syntax nodes of segments
+
+        end = None  # end of last indexed token
+        count = 0  # count of indexed tokens
+        stack = [(root, None, None)]
+        while stack:
+            symbol, parent, entered = stack.pop()
+            if entered is not None:
+                # source after last token of node is belonged to parent, if node contains tokens. Source after last
+                # token of tree is belonged to root
+                if entered != count:
+                    self.__append(end, parent or root, parent or root)
+            elif isinstance(symbol, SyntaxToken):
+                if symbol.value:
+                    location = symbol.begin_location.begin
+                    self.__append((location.line, location.column), symbol, parent)
+                    location = symbol.end_location.end
+                    end = (location.line, location.column + 1)
+                    self.__append(end, parent, parent)
+                    count += 1
+            elif isinstance(symbol, SyntaxNode):
+                stack.append((symbol, parent, count))
+                stack.extend((child, symbol, None) for child in reversed(symbol.children))
+
+    def __append(self, start: Tuple[int, int], symbol: Optional[SyntaxSymbol], node: Optional[SyntaxNode]):
+        # segment that is started at same position is replaced, because it's empty
+        if self.__starts and start <= self.__starts[-1]:
+            self.__symbols[-1] = symbol
+            self.__nodes[-1] = node
+        else:
+            self.__starts.append(start)
+            self.__symbols.append(symbol)
+            self.__nodes.append(node)
+
+    def __find(self, position: Position) -> int:
+        return bisect.bisect_right(self.__starts, (position.line, position.column)) - 1
+
+    def find_symbol(self, position: Position) -> Optional[SyntaxSymbol]:
+        """ Returns innermost token or syntax node, that contains position """
+        index = self.__find(position)
+        return self.__symbols[index] if index >= 0 else None
+
+    def find_node(self, position: Position) -> Optional[SyntaxNode]:
+        """ Returns innermost syntax node, that contains position """
+        index = self.__find(position)
+        return self.__nodes[index] if index >= 0 else None
+
+    def __len__(self) -> int:
+        return len(self.__starts)
+
+
 @dataclass(unsafe_hash=True, frozen=True)
 class SyntaxTree(SyntaxNode):
+    __slots__ = ('imports', 'members', 'tok_eof', '__parents', '__positions')
+
     imports: Sequence[ImportAST]
     members: Sequence[MemberAST]
     tok_eof: SyntaxToken
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.members, self.tok_eof]
+        return (self.members, self.tok_eof)
 
     @property
     def location(self) -> Location:
         begin = cast(SyntaxCollection, self.members).begin_location
         return begin + self.tok_eof.end_location
 
+    @property
+    def parents(self) -> ParentIndex:
+        """ Returns index of parents, that is built on first access """
+        try:
+            return self.__parents
+        except AttributeError:
+            object.__setattr__(self, '_SyntaxTree__parents', ParentIndex(self))
+            return self.__parents
+
+    @property
+    def positions(self) -> PositionIndex:
+        """ Returns index of positions, that is built on first access """
+        try:
+            return self.__positions
+        except AttributeError:
+            object.__setattr__(self, '_SyntaxTree__positions', PositionIndex(self))
+            return self.__positions
+
+    def find_position(self, position: Position) -> Optional[SyntaxNode]:
+        return self.positions.find_node(position)
+
+    def __getstate__(self):
+        # indices are contained references to symbols, therefore they're not pickled
+        return None, {field.name: getattr(self, field.name) for field in fields(self)}
+
 
 @dataclass(unsafe_hash=True, frozen=True)
 class QualifiedNameAST(SyntaxNode):
+    __slots__ = ('names',)
+
     names: Sequence[SyntaxToken]
 
-    @cached_property
+    @property
     def full_name(self):
         return ''.join(token.value for token in self.tokens)
 
@@ -336,6 +515,8 @@ class QualifiedNameAST(SyntaxNode):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class AliasAST(SyntaxNode):
+    __slots__ = ('qualified_name', 'tok_as', 'tok_alias')
+
     qualified_name: QualifiedNameAST
     tok_as: Optional[SyntaxToken]
     tok_alias: SyntaxToken
@@ -359,6 +540,8 @@ class AliasAST(SyntaxNode):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class ImportAST(SyntaxNode):
+    __slots__ = ('tok_import', 'aliases', 'tok_newline')
+
     tok_import: SyntaxToken
     aliases: Sequence[AliasAST]
     tok_newline: SyntaxToken
@@ -369,11 +552,13 @@ class ImportAST(SyntaxNode):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_import, self.aliases, self.tok_newline]
+        return (self.tok_import, self.aliases, self.tok_newline)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class ImportFromAST(ImportAST):
+    __slots__ = ('tok_from', 'qualified_name')
+
     tok_from: SyntaxToken
     qualified_name: QualifiedNameAST
 
@@ -387,22 +572,26 @@ class ImportFromAST(ImportAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_from, self.qualified_name, self.tok_import, self.aliases]
+        return (self.tok_from, self.qualified_name, self.tok_import, self.aliases)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class TypeAST(SyntaxNode):
-    pass
+    __slots__ = ()
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class ParameterizedTypeAST(TypeAST):
+    __slots__ = ('type', 'arguments')
+
     type: TypeAST
     arguments: Sequence[TypeAST]
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class GenericParameterAST(SyntaxNode):
+    __slots__ = ('tok_name',)
+
     tok_name: SyntaxToken
 
     @property
@@ -415,11 +604,13 @@ class GenericParameterAST(SyntaxNode):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_name]
+        return (self.tok_name,)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class NamedTypeAST(TypeAST):
+    __slots__ = ('tok_name',)
+
     tok_name: SyntaxToken
 
     @property
@@ -432,28 +623,35 @@ class NamedTypeAST(TypeAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_name]
+        return (self.tok_name,)
 
 
 class AutoTypeAST(TypeAST):
-    __location: Location
+    __slots__ = ('__location', '__span', '__lines')
 
-    def __init__(self, location: Location):
+    def __init__(self, location: Location = None, *, span: Tuple[int, int] = None,
+                 lines: Union[LineIndex, LineAnchor] = None):
         super(AutoTypeAST, self).__init__()
 
         self.__location = location
+        self.__span = span
+        self.__lines = lines
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return []
+        return ()
 
     @property
     def location(self) -> Location:
-        return self.__location
+        if self.__location:
+            return self.__location
+        return self.__lines.location(*self.__span)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class AttributeAST(SyntaxNode):
+    __slots__ = ('tok_name', 'tok_open', 'arguments', 'tok_close')
+
     tok_name: SyntaxToken
     tok_open: Optional[SyntaxToken]
     arguments: Sequence[ExpressionAST]
@@ -474,11 +672,13 @@ class AttributeAST(SyntaxNode):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class MemberAST(SyntaxNode):
-    pass
+    __slots__ = ()
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class PassMemberAST(MemberAST):
+    __slots__ = ('tok_pass', 'tok_newline')
+
     tok_pass: SyntaxToken
     tok_newline: SyntaxToken
 
@@ -488,11 +688,13 @@ class PassMemberAST(MemberAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_pass, self.tok_newline]
+        return (self.tok_pass, self.tok_newline)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class TypeDeclarationAST(MemberAST):
+    __slots__ = ('tok_name', 'members', 'attributes')
+
     tok_name: SyntaxToken
     members: Sequence[MemberAST]
     attributes: Sequence[AttributeAST]
@@ -508,6 +710,8 @@ class TypeDeclarationAST(MemberAST):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class StructAST(TypeDeclarationAST):
+    __slots__ = ('tok_struct', 'generic_parameters')
+
     tok_struct: SyntaxToken
     generic_parameters: Sequence[GenericParameterAST]
 
@@ -518,6 +722,8 @@ class StructAST(TypeDeclarationAST):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class ClassAST(TypeDeclarationAST):
+    __slots__ = ('tok_class', 'generic_parameters')
+
     tok_class: SyntaxToken
     generic_parameters: Sequence[GenericParameterAST]
 
@@ -528,6 +734,8 @@ class ClassAST(TypeDeclarationAST):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class FieldAST(MemberAST):
+    __slots__ = ('attributes', 'tok_name', 'tok_colon', 'type', 'tok_newline')
+
     attributes: Sequence[AttributeAST]
     tok_name: SyntaxToken
     tok_colon: SyntaxToken
@@ -544,11 +752,13 @@ class FieldAST(MemberAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.attributes, self.tok_name, self.tok_colon, self.type, self.tok_newline]
+        return (self.attributes, self.tok_name, self.tok_colon, self.type, self.tok_newline)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class ParameterAST(SyntaxNode):
+    __slots__ = ('tok_name', 'tok_colon', 'type')
+
     tok_name: SyntaxToken
     tok_colon: SyntaxToken
     type: TypeAST
@@ -568,6 +778,11 @@ class ParameterAST(SyntaxNode):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class FunctionAST(MemberAST):
+    __slots__ = (
+        'attributes', 'tok_def', 'tok_name', 'generic_parameters', 'tok_open', 'parameters', 'tok_close', 'tok_then',
+        'return_type', 'tok_colon', 'statement'
+    )
+
     attributes: Sequence[AttributeAST]
     tok_def: SyntaxToken
     tok_name: SyntaxToken
@@ -607,11 +822,13 @@ class FunctionAST(MemberAST):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class StatementAST(SyntaxNode):
-    pass
+    __slots__ = ()
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class BlockStatementAST(StatementAST):
+    __slots__ = ('statements',)
+
     statements: Sequence[StatementAST]
 
     @property
@@ -625,6 +842,8 @@ class BlockStatementAST(StatementAST):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class EllipsisStatementAST(StatementAST):
+    __slots__ = ('tok_ellipsis', 'tok_newline')
+
     tok_ellipsis: SyntaxToken
     tok_newline: SyntaxToken
 
@@ -634,11 +853,13 @@ class EllipsisStatementAST(StatementAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_ellipsis, self.tok_newline]
+        return (self.tok_ellipsis, self.tok_newline)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class ElseStatementAST(StatementAST):
+    __slots__ = ('tok_else', 'tok_colon', 'tok_newline', 'statement')
+
     tok_else: SyntaxToken
     tok_colon: SyntaxToken
     tok_newline: SyntaxToken
@@ -650,11 +871,13 @@ class ElseStatementAST(StatementAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_else, self.tok_colon, self.tok_newline, self.statement]
+        return (self.tok_else, self.tok_colon, self.tok_newline, self.statement)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class PassStatementAST(StatementAST):
+    __slots__ = ('tok_pass', 'tok_newline')
+
     tok_pass: SyntaxToken
     tok_newline: SyntaxToken
 
@@ -664,13 +887,15 @@ class PassStatementAST(StatementAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_pass, self.tok_newline]
+        return (self.tok_pass, self.tok_newline)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class ReturnStatementAST(StatementAST):
+    __slots__ = ('tok_return', 'value')
+
     tok_return: SyntaxToken
-    value: Optional[ExpressionAST] = None
+    value: Optional[ExpressionAST]
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
@@ -683,6 +908,8 @@ class ReturnStatementAST(StatementAST):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class ConditionStatementAST(StatementAST):
+    __slots__ = ('tok_if', 'condition', 'tok_colon', 'tok_newline', 'then_statement', 'else_statement')
+
     tok_if: SyntaxToken
     condition: ExpressionAST
     tok_colon: SyntaxToken
@@ -706,6 +933,8 @@ class ConditionStatementAST(StatementAST):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class WhileStatementAST(StatementAST):
+    __slots__ = ('tok_while', 'condition', 'tok_colon', 'tok_newline', 'then_statement', 'else_statement')
+
     tok_while: SyntaxToken
     condition: ExpressionAST
     tok_colon: SyntaxToken
@@ -729,6 +958,8 @@ class WhileStatementAST(StatementAST):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class ExpressionStatementAST(StatementAST):
+    __slots__ = ('value', 'tok_newline')
+
     value: ExpressionAST
     tok_newline: SyntaxToken
 
@@ -738,11 +969,13 @@ class ExpressionStatementAST(StatementAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.value, self.tok_newline]
+        return (self.value, self.tok_newline)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class AssignStatementAST(StatementAST):
+    __slots__ = ('target', 'tok_equals', 'source')
+
     target: ExpressionAST
     tok_equals: SyntaxToken
     source: ExpressionAST
@@ -753,16 +986,18 @@ class AssignStatementAST(StatementAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.target, self.tok_equals, self.source]
+        return (self.target, self.tok_equals, self.source)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class ExpressionAST(SyntaxNode):
-    pass
+    __slots__ = ()
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class IntegerExpressionAST(ExpressionAST):
+    __slots__ = ('tok_number',)
+
     tok_number: SyntaxToken
 
     @property
@@ -775,11 +1010,13 @@ class IntegerExpressionAST(ExpressionAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_number]
+        return (self.tok_number,)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class NamedExpressionAST(ExpressionAST):
+    __slots__ = ('tok_name',)
+
     tok_name: SyntaxToken
 
     @property
@@ -792,7 +1029,7 @@ class NamedExpressionAST(ExpressionAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_name]
+        return (self.tok_name,)
 
 
 @enum.unique
@@ -805,6 +1042,8 @@ class UnaryID(enum.IntEnum):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class UnaryExpressionAST(ExpressionAST):
+    __slots__ = ('operator', 'tok_operator', 'operand')
+
     operator: UnaryID
     tok_operator: SyntaxToken
     operand: ExpressionAST
@@ -815,7 +1054,7 @@ class UnaryExpressionAST(ExpressionAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.tok_operator, self.operand]
+        return (self.tok_operator, self.operand)
 
 
 @enum.unique
@@ -830,6 +1069,8 @@ class BinaryID(enum.IntEnum):
 
 @dataclass(unsafe_hash=True, frozen=True)
 class BinaryExpressionAST(ExpressionAST):
+    __slots__ = ('operator', 'tok_operator', 'left_operand', 'right_operand')
+
     operator: BinaryID
     tok_operator: SyntaxToken
     left_operand: ExpressionAST
@@ -841,11 +1082,13 @@ class BinaryExpressionAST(ExpressionAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.left_operand, self.tok_operator, self.right_operand]
+        return (self.left_operand, self.tok_operator, self.right_operand)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class CallExpressionAST(ExpressionAST):
+    __slots__ = ('value', 'tok_open', 'arguments', 'tok_close')
+
     value: ExpressionAST
     tok_open: SyntaxToken
     arguments: Sequence[ExpressionAST]
@@ -857,11 +1100,13 @@ class CallExpressionAST(ExpressionAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.value, self.tok_open, self.arguments, self.tok_close]
+        return (self.value, self.tok_open, self.arguments, self.tok_close)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class SubscribeExpressionAST(ExpressionAST):
+    __slots__ = ('value', 'tok_open', 'arguments', 'tok_close')
+
     value: ExpressionAST
     tok_open: SyntaxToken
     arguments: Sequence[ExpressionAST]
@@ -873,11 +1118,13 @@ class SubscribeExpressionAST(ExpressionAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.value, self.tok_open, self.arguments, self.tok_close]
+        return (self.value, self.tok_open, self.arguments, self.tok_close)
 
 
 @dataclass(unsafe_hash=True, frozen=True)
 class AttributeExpressionAST(ExpressionAST):
+    __slots__ = ('value', 'tok_dot', 'tok_name')
+
     value: ExpressionAST
     tok_dot: SyntaxToken
     tok_name: SyntaxToken
@@ -892,4 +1139,4 @@ class AttributeExpressionAST(ExpressionAST):
 
     @property
     def children(self) -> Sequence[SyntaxSymbol]:
-        return [self.value, self.tok_dot, self.tok_name]
+        return (self.value, self.tok_dot, self.tok_name)
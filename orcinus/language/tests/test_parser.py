@@ -4,12 +4,14 @@
 # of the MIT license.  See the LICENSE file for details.
 from __future__ import annotations
 
+import pickle
 from io import StringIO
 from typing import Tuple
 
 from orcinus.core.diagnostics import DiagnosticManager
+from orcinus.core.locations import Position
 from orcinus.language.parser import Parser, SyntaxTree
-from orcinus.language.syntax import SyntaxToken, TokenID, SyntaxSymbol, ImportAST, AliasAST
+from orcinus.language.syntax import SyntaxToken, TokenID, SyntaxSymbol, SyntaxNode, ImportAST, AliasAST
 
 
 def parse_string(content) -> Tuple[SyntaxTree, DiagnosticManager]:
@@ -63,3 +65,56 @@ import        as name
     alias: AliasAST = node.aliases[0]
     assert alias.name == ''
     assert alias.alias == 'name'
+
+
+def test_parent_index():
+    document, diagnostics = parse_string("import system.io\n\ndef main() -> int:\n    return 0\n")
+    assert not diagnostics.has_error
+
+    func = document.members[0]
+    statement = func.statement.statements[0]
+    token = statement.tok_return
+
+    # parents are resolved by index of tree, syntax nodes don't contain references to parents
+    assert document.parents.parent(token) is statement
+    assert func in document.parents.ancestors(token)
+    assert document.parents.parent(document) is None
+    assert not hasattr(statement, '__dict__')
+
+    # index is not pickled with tree
+    restored = pickle.loads(pickle.dumps(document))
+    assert restored.members[0].name == func.name
+    assert restored.parents.parent(restored.members[0]) is restored.members
+
+
+def test_position_index():
+    document, diagnostics = parse_string("def main() -> int:\n    return   0\n")
+    assert not diagnostics.has_error
+
+    func = document.members[0]
+    statement = func.statement.statements[0]
+
+    # token and it's parent node
+    assert document.positions.find_symbol(Position(2, 6)) is statement.tok_return
+    assert document.find_position(Position(2, 6)) is statement
+
+    # whitespace between tokens is belonged to innermost node, that contains both tokens
+    assert document.positions.find_symbol(Position(2, 12)) is statement
+    assert document.find_position(Position(1, 4)) is func
+
+    # same result as search by recursive descent
+    for position in (Position(1, 1), Position(1, 5), Position(1, 15), Position(2, 14)):
+        assert document.find_position(position) is SyntaxNode.find_position(document, position)
+
+
+def test_cached_children():
+    document, diagnostics = parse_string("def main() -> int:\n    return 0\n")
+    assert not diagnostics.has_error
+
+    func = document.members[0]
+    assert func.nodes is func.nodes
+    assert func.tokens is func.tokens
+    assert all(isinstance(node, SyntaxNode) for node in func.nodes)
+    assert func.begin_location.begin == func.tok_def.location.begin
+    assert func.end_location == func.statement.end_location
+    assert document.members.location == func.begin_location + func.end_location
@@ -0,0 +1,49 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+from io import StringIO
+from typing import Sequence
+
+from orcinus.core.locations import LineIndex, Location, Position
+from orcinus.language.scanner import Scanner
+from orcinus.language.syntax import SyntaxToken, TokenID
+
+
+def tokenize_string(content) -> Sequence[SyntaxToken]:
+    return list(Scanner("test", StringIO(content)))
+
+
+def test_line_index():
+    lines = LineIndex("test", "ab\n\ncd")
+    assert lines.position(0) == Position(1, 1)
+    assert lines.position(2) == Position(1, 3)
+    assert lines.position(3) == Position(2, 1)
+    assert lines.position(5) == Position(3, 2)
+    assert lines.location(4, 6) == Location("test", Position(3, 1), Position(3, 2))
+    assert lines.location(6, 6) == Location("test", Position(3, 3), Position(3, 3))
+
+
+def test_tokens_locations():
+    tokens = tokenize_string("def main():\n    pass\n")
+    assert [token.id for token in tokens] == [
+        TokenID.Def, TokenID.Name, TokenID.LeftParenthesis, TokenID.RightParenthesis, TokenID.Colon, TokenID.NewLine,
+        TokenID.Indent, TokenID.Pass, TokenID.NewLine, TokenID.Undent, TokenID.EndFile
+    ]
+    assert tokens[1].value == 'main'
+    assert tokens[1].span == (4, 8)
+    assert tokens[1].location == Location("test", Position(1, 5), Position(1, 8))
+    assert tokens[5].location == Location("test", Position(1, 12), Position(1, 12))
+    assert tokens[6].location == Location("test", Position(2, 1), Position(2, 4))
+    assert tokens[-1].location == Location("test", Position(3, 1), Position(3, 1))
+
+
+def test_token_stream():
+    tokens = Scanner("test", StringIO("def main():\n    pass\n")).tokenize()
+    assert len(tokens) == 11
+    assert tokens.kinds[1] == TokenID.Name
+    assert tokens.value(1) == 'main'
+    assert tokens.value(6) == ''  # indent
+    assert tokens.location(1) == Location("test", Position(1, 5), Position(1, 8))
@@ -0,0 +1,192 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from orcinus.core.diagnostics import Diagnostic
+from orcinus.language.semantic import InferenceConstructor, InferenceContext, InferenceVariable, LexicalScope
+from orcinus.workspace import Workspace
+
+OPERATOR_SOURCE = """
+def main() -> int:
+    value = 1
+    value = value + 2
+    return value + 3
+"""
+
+
+def test_scope_versions(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    integer_type = workspace.load_document('__builtins__').module.scope.resolve('int')
+    parent = LexicalScope()
+    scope = LexicalScope(parent)
+    versions = scope.versions
+
+    parent.append(integer_type)
+    assert scope.versions != versions
+
+
+def test_find_function_cache(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    document = workspace.create_document(os.path.join(str(tmpdir), 'main.orx'), OPERATOR_SOURCE)
+    model = document.model
+
+    # both additions are resolved in same scope with same argument types
+    (key, (versions, func, generic_arguments)), = model.overloads.items()
+    scope, name, argument_types = key
+    assert name == '__add__'
+    assert func.name == '__add__' and generic_arguments is None
+
+    # changed scope invalidates resolved overload
+    scope.append(argument_types[0], 'alias')
+    assert scope.versions != versions
+    assert model.find_function(scope, name, [func.parameters[0], func.parameters[1]], func.location) is func
+    assert model.overloads[key][0] == scope.versions + argument_types[0].scope.versions
+
+
+GENERICS_SOURCE = """
+def identity[T](value: T) -> T:
+    return value
+"""
+
+INSTANCE_SOURCE = """from generics import identity
+
+def main() -> int:
+    return identity(1)
+"""
+
+
+def test_shared_instances(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    workspace.create_document(os.path.join(str(tmpdir), 'generics.orx'), GENERICS_SOURCE)
+    first = workspace.create_document(os.path.join(str(tmpdir), 'first.orx'), INSTANCE_SOURCE)
+    second = workspace.create_document(os.path.join(str(tmpdir), 'second.orx'), INSTANCE_SOURCE)
+
+    # both modules are used same instance of `identity[int]`
+    first_call = first.module.functions[0].statement.statements[0].value
+    second_call = second.module.functions[0].statement.statements[0].value
+    assert first_call.function is second_call.function
+    assert len(workspace.semantic_cache.instances) == 1
+
+
+CALLS_SOURCE = """from generics import identity
+
+def main() -> int:
+    return identity(1)
+    return identity(2)
+"""
+
+
+def test_find_generic_function_cache(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    generics = workspace.create_document(os.path.join(str(tmpdir), 'generics.orx'), GENERICS_SOURCE)
+    document = workspace.create_document(os.path.join(str(tmpdir), 'main.orx'), CALLS_SOURCE)
+    first_call, second_call = (statement.value for statement in document.module.functions[0].statement.statements)
+    assert first_call.function is second_call.function
+
+    # cache stores generic function without call site, instance is resolved for each call
+    (_, func, generic_arguments), = document.model.overloads.values()
+    assert func is generics.module.functions[0]
+    assert [str(arg) for arg in generic_arguments] == ['int']
+
+    # changed definition removes instances, that are created by dependent modules
+    workspace.semantic_cache.invalidate('generics')
+    assert not len(workspace.semantic_cache.instances)
+
+
+def test_instances_of_failed_module(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    generics = workspace.create_document(os.path.join(str(tmpdir), 'generics.orx'), GENERICS_SOURCE)
+    failed = workspace.create_document(os.path.join(str(tmpdir), 'failed.orx'), INSTANCE_SOURCE.replace(
+        "    return identity(1)\n", "    value = identity(1)\n    return value + undefined\n"))
+
+    # module is failed after instantiation of `identity[int]`, therefore it's not stored in cache
+    with pytest.raises(Exception):
+        failed.model
+    assert 'failed' not in workspace.semantic_cache
+    assert not len(workspace.semantic_cache.instances)
+
+    # changed definition is instantiated again
+    generics.source = GENERICS_SOURCE + "    return value\n"
+    other = workspace.create_document(os.path.join(str(tmpdir), 'other.orx'), INSTANCE_SOURCE)
+    instance = other.module.functions[0].statement.statements[0].value.function
+    assert instance.definition is generics.module.functions[0]
+    assert len(instance.statement.statements) == 2
+
+
+def test_unify_chain(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    integer_type = workspace.load_document('__builtins__').module.scope.resolve('int')
+    location = integer_type.location
+
+    # long chains of variables are unified without recursion
+    variables = [InferenceVariable(f'T{index}', location) for index in range(10000)]
+    for first, second in zip(variables, variables[1:]):
+        InferenceContext.unify(first, second)
+    InferenceContext.unify(variables[-1], InferenceConstructor(integer_type, [], location))
+
+    assert variables[0].instantiate(workspace.load_document('__builtins__').module) is integer_type
+    root = variables[0].find()
+    assert all(variable.find() is root for variable in variables)
+    assert root.rank == 1  # union by rank keeps sets flat
+
+
+def test_unify_errors(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    scope = workspace.load_document('__builtins__').module.scope
+    integer_type = scope.resolve('int')
+    boolean_type = scope.resolve('bool')
+    location = integer_type.location
+
+    with pytest.raises(Diagnostic):
+        InferenceContext.unify(
+            InferenceConstructor(integer_type, [], location),
+            InferenceConstructor(boolean_type, [], location),
+        )
+
+    # occurs check
+    variable = InferenceVariable('T', location)
+    with pytest.raises(Diagnostic):
+        InferenceContext.unify(variable, InferenceConstructor(integer_type, [variable], location))
+
+
+FUNCTIONS_SOURCE = """
+def first(value: int) -> bool:
+    return True
+
+def second(value: int) -> bool:
+    return False
+"""
+
+
+def test_interned_function_types(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    document = workspace.create_document(os.path.join(str(tmpdir), 'main.orx'), FUNCTIONS_SOURCE)
+    first, second = document.module.functions
+
+    # structurally equal function types are equal and share mangled name
+    assert first.type == second.type and hash(first.type) == hash(second.type)
+    assert first.type.mangled_name is second.type.mangled_name
+    assert first.parameters[0].name is second.parameters[0].name
+    assert len(workspace.semantic_cache.types) == 1
+
+    # types of invalidated module are still equal to types of new module, but names are not kept
+    workspace.semantic_cache.invalidate('main')
+    assert not workspace.semantic_cache.types
+    assert first.type in [func.type for func in workspace.load_document('main').module.functions]
+
+
+def test_slotted_symbols(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    document = workspace.create_document(os.path.join(str(tmpdir), 'main.orx'), OPERATOR_SOURCE)
+    func = document.module.functions[0]
+
+    # values and statements of function are not carried instance dictionaries
+    statement = func.statement.statements[-1]
+    for symbol in (statement, statement.value, *statement.value.arguments):
+        assert not hasattr(symbol, '__dict__'), symbol
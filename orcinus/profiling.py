@@ -0,0 +1,148 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import io
+import sys
+import threading
+import time
+import tracemalloc
+from typing import ContextManager, Dict, Mapping, Optional, Tuple
+
+# Key of statistic: phase name and module name
+StatisticKey = Tuple[str, str]
+
+
+class PhaseStatistic:
+    """
+    Attributes:
+        wall_time   - Total wall time of phase, in seconds
+        calls       - Count of phase executions
+        net_blocks  - Net change of count of allocated memory blocks during phase, it's negative if phase released
+                      more blocks than allocated
+    """
+
+    def __init__(self, wall_time: float = 0.0, calls: int = 0, net_blocks: int = 0):
+        self.wall_time = wall_time
+        self.calls = calls
+        self.net_blocks = net_blocks
+
+    def merge(self, other: PhaseStatistic):
+        self.wall_time += other.wall_time
+        self.calls += other.calls
+        self.net_blocks += other.net_blocks
+
+
+class PhaseMeasure:
+    """ Context manager, that measures single execution of phase """
+
+    def __init__(self, report: TimeReport, key: StatisticKey):
+        self.report = report
+        self.key = key
+        self.start_time = 0.0
+        self.start_blocks = 0
+
+    def __enter__(self):
+        self.start_blocks = sys.getallocatedblocks()
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        wall_time = time.perf_counter() - self.start_time
+        net_blocks = sys.getallocatedblocks() - self.start_blocks
+        self.report.add(self.key, PhaseStatistic(wall_time, 1, net_blocks))
+
+
+class TimeReport:
+    """
+    The TimeReport class is collected wall time, call counts and net counts of allocated memory blocks of compiler
+    phases per module.
+
+    Report is disabled by default and measuring of phase is no-op in this case. Times of nested phases are included
+    in times of outer phases, e.g. analysis of imported modules is included in `semantic.import`.
+
+    Statistics are collected per thread, therefore phases of concurrent workers, e.g. clients of language server, are
+    not mixed.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.__local = threading.local()
+
+    @property
+    def statistics(self) -> Dict[StatisticKey, PhaseStatistic]:
+        """ Returns statistics, that are collected in current thread """
+        try:
+            return self.__local.statistics
+        except AttributeError:
+            statistics = self.__local.statistics = {}
+            return statistics
+
+    def measure(self, phase: str, module: str = None) -> ContextManager:
+        """ Returns context manager, that measures execution of phase for module """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return PhaseMeasure(self, (phase, module or ''))
+
+    def add(self, key: StatisticKey, statistic: PhaseStatistic):
+        try:
+            self.statistics[key].merge(statistic)
+        except KeyError:
+            self.statistics[key] = PhaseStatistic(statistic.wall_time, statistic.calls, statistic.net_blocks)
+
+    def merge(self, statistics: Mapping[StatisticKey, PhaseStatistic]):
+        for key, statistic in statistics.items():
+            self.add(key, statistic)
+
+    def collect(self) -> Dict[StatisticKey, PhaseStatistic]:
+        """ Returns collected statistics and reset report """
+        statistics = self.statistics
+        self.__local.statistics = {}
+        return statistics
+
+    def format(self, statistics: Mapping[StatisticKey, PhaseStatistic] = None) -> str:
+        """ Format statistics as table, sorted by phase and module """
+        statistics = self.statistics if statistics is None else statistics
+        rows = [(phase, module, statistic) for (phase, module), statistic in sorted(statistics.items())]
+        width = max((len(phase) for phase, _, _ in rows), default=5)
+
+        stream = io.StringIO()
+        stream.write(f"{'Phase'.ljust(width)}  {'Calls':>8}  {'Wall time':>12}  {'Net blocks':>12}  Module\n")
+        for phase, module, statistic in rows:
+            wall_time = f'{statistic.wall_time * 1000:.3f} ms'
+            stream.write(
+                f"{phase.ljust(width)}  {statistic.calls:>8}  {wall_time:>12}  {statistic.net_blocks:>12}  {module}\n"
+            )
+        return stream.getvalue()
+
+
+# Global report of current process
+time_report = TimeReport()
+
+
+@contextlib.contextmanager
+def profile(filename: Optional[str] = None, *, trace_filename: Optional[str] = None):
+    """
+    Profile execution of block.
+
+    :param filename:        Filename for dump of `cProfile` statistics. Dump can be loaded by `pstats`
+    :param trace_filename:  Filename for dump of `tracemalloc` snapshot. Dump can be loaded by `tracemalloc.Snapshot`
+    """
+    profiler = cProfile.Profile() if filename else None
+    if trace_filename:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(filename)
+        if trace_filename:
+            tracemalloc.take_snapshot().dump(trace_filename)
+            tracemalloc.stop()
@@ -5,6 +5,13 @@
 from __future__ import annotations
 
 DOCUMENT_PUBLISH_DIAGNOSTICS = 'textDocument/publishDiagnostics'
+CANCEL_REQUEST = '$/cancelRequest'
+PROGRESS = '$/progress'
+WORK_DONE_PROGRESS_CREATE = 'window/workDoneProgress/create'
+
+
+class ErrorCodes:
+    RequestCancelled = -32800
 
 
 class TextDocumentSyncKind:
@@ -39,3 +46,32 @@ class CompletionItemKind:
     Event = 23
     Operator = 24
     TypeParameter = 25
+
+
+class SymbolKind:
+    File = 1
+    Module = 2
+    Namespace = 3
+    Package = 4
+    Class = 5
+    Method = 6
+    Property = 7
+    Field = 8
+    Constructor = 9
+    Enum = 10
+    Interface = 11
+    Function = 12
+    Variable = 13
+    Constant = 14
+    String = 15
+    Number = 16
+    Boolean = 17
+    Array = 18
+    Object = 19
+    Key = 20
+    Null = 21
+    EnumMember = 22
+    Struct = 23
+    Event = 24
+    Operator = 25
+    TypeParameter = 26
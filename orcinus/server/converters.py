@@ -6,6 +6,8 @@ from __future__ import annotations
 
 from orcinus.core.diagnostics import Diagnostic
 from orcinus.core.locations import Location, Position
+from orcinus.language.semantic import ClassType, Field, Function, NamedSymbol, Overload, OwnedSymbol, Type
+from orcinus.server.constants import CompletionItemKind, SymbolKind
 
 
 def to_lsp_position(value: Position, *, is_end=False) -> dict:
@@ -39,6 +41,45 @@ def to_lsp_diagnostic(value: Diagnostic) -> dict:
     }
 
 
+def to_lsp_symbol_kind(value: NamedSymbol) -> int:
+    if isinstance(value, Function):
+        return SymbolKind.Method if isinstance(value.owner, Type) else SymbolKind.Function
+    if isinstance(value, ClassType):
+        return SymbolKind.Class
+    if isinstance(value, Type):
+        return SymbolKind.Struct
+    if isinstance(value, Field):
+        return SymbolKind.Field
+    return SymbolKind.Variable
+
+
+def to_lsp_symbol(value: NamedSymbol) -> dict:
+    owner = value.owner if isinstance(value, OwnedSymbol) else None
+    return {
+        'name': value.name,
+        'kind': to_lsp_symbol_kind(value),
+        'location': to_lsp_location(value.location),
+        'containerName': owner.name if isinstance(owner, NamedSymbol) else None,
+    }
+
+
+def to_lsp_completion_item(name: str, value: NamedSymbol) -> dict:
+    if isinstance(value, (Function, Overload)):
+        kind = CompletionItemKind.Function
+    elif isinstance(value, ClassType):
+        kind = CompletionItemKind.Class
+    elif isinstance(value, Type):
+        kind = CompletionItemKind.Struct
+    elif isinstance(value, Field):
+        kind = CompletionItemKind.Field
+    else:
+        kind = CompletionItemKind.Variable
+    return {
+        'label': name,
+        'kind': kind,
+    }
+
+
 def from_lsp_position(position, *, is_end=False):
     return Position(position['line'] + 1, position['character'] if is_end else position['character'] + 1)
 
@@ -1,72 +1,173 @@
+import asyncio
+import concurrent.futures
+import itertools
 import json
 import logging
-import socket
-from typing import Optional
+import os
+import sys
+import time
+from typing import Dict, Optional, Union
 
 from jsonrpc import Dispatcher, JSONRPCResponseManager
+from jsonrpc.exceptions import JSONRPCDispatchException
 from jsonrpc.jsonrpc2 import JSONRPC20Request
 
 from orcinus.core.diagnostics import DiagnosticManager
-from orcinus.server.constants import TextDocumentSyncKind, DOCUMENT_PUBLISH_DIAGNOSTICS
-from orcinus.server.converters import from_lsp_position, to_lsp_diagnostic
-# from orcinus.syntax import AliasAST, ImportModuleAST
+from orcinus.profiling import time_report
+from orcinus.server.constants import TextDocumentSyncKind, DOCUMENT_PUBLISH_DIAGNOSTICS, CANCEL_REQUEST, ErrorCodes, \
+    PROGRESS, WORK_DONE_PROGRESS_CREATE
+from orcinus.server.converters import from_lsp_position, to_lsp_completion_item, to_lsp_diagnostic, to_lsp_symbol
 from orcinus.workspace import Workspace, Document
 
 logger = logging.getLogger('orcinus.server')
 
+# Delay between last change of document and start of its analysis, in seconds
+ANALYSIS_DELAY = 0.25
 
-class LanguageTCPServer:
-    def __init__(self):
-        # Create a TCP/IP socket
-        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM, 0)
-        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+# Token of progress, that is reported during indexing of workspace
+INDEXING_TOKEN = 'orcinus/indexing'
 
-    def listen(self, hostname='0.0.0.0', port=10000):
-        # Bind the socket to the port
-        server_address = (hostname, port)
-        logger.info('Starting Orcinus LSP server on {} port {}'.format(*server_address))
-        self.server.bind(server_address)
 
-        # Listen for incoming connections
-        self.server.listen(1)
+async def read_message(reader: asyncio.StreamReader) -> Optional[str]:
+    """ Read body of message. Returns `None` if stream is closed """
+    content_length = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            return None
+        line = line.decode('ascii').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'content-length':
+            try:
+                content_length = int(value.strip())
+            except ValueError:
+                raise ValueError("Invalid Content-Length header: {}".format(value))
+
+    if content_length is None:
+        raise ValueError("Missing Content-Length header")
+    try:
+        body = await reader.readexactly(content_length)
+    except asyncio.IncompleteReadError:
+        return None
+    return body.decode('utf-8')
+
+
+def write_message(writer: asyncio.StreamWriter, body: str):
+    """ Write message to stream. Length of content is length of body in bytes """
+    content = body.encode('utf-8')
+    writer.write(
+        "Content-Length: {}\r\n"
+        "Content-Type: application/vscode-jsonrpc; charset=utf-8\r\n\r\n".format(len(content)).encode('ascii')
+    )
+    writer.write(content)
+
+
+async def open_stdio_streams():
+    """ Returns reader and writer for standard input and output of process """
+    loop = asyncio.get_event_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    return reader, writer
+
+
+class LanguageServer:
+    """
+    The LanguageServer class is represented asyncio server of language server protocol.
+
+    Server is listened TCP socket or standard streams, and serves all connected clients concurrently. Messages are read
+    and written in event loop, and requests are processed in worker thread of client, therefore slow analysis of one
+    client doesn't stall other clients.
+
+    Attributes:
+        clients         - The connected clients
+        analysis_delay  - The delay between last change of document and start of its analysis, in seconds
+    """
+
+    def __init__(self, analysis_delay: float = ANALYSIS_DELAY):
+        self.clients = set()
+        self.analysis_delay = analysis_delay
 
+    def listen(self, hostname='0.0.0.0', port=10000):
+        """ Serve clients on TCP port, until process is interrupted """
         try:
-            while True:
-                # Wait for a connection
-                logger.debug('Waiting for a connection')
-                try:
-                    connection, client_address = self.server.accept()
-                    self.process(connection, client_address)
-                except KeyboardInterrupt:
-                    return
-        finally:
-            self.server.close()
+            asyncio.run(self.serve_tcp(hostname, port))
+        except KeyboardInterrupt:
+            return
+
+    def listen_stdio(self):
+        """ Serve single client on standard input and output """
+        try:
+            asyncio.run(self.serve_stdio())
+        except KeyboardInterrupt:
+            return
 
-    def process(self, connection, client_address):
+    async def start_tcp(self, hostname='0.0.0.0', port=10000) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self.process, hostname, port)
+        for sock in server.sockets:
+            logger.info('Starting Orcinus LSP server on {} port {}'.format(*sock.getsockname()[:2]))
+        return server
+
+    async def serve_tcp(self, hostname='0.0.0.0', port=10000):
+        server = await self.start_tcp(hostname, port)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_stdio(self):
+        logger.info('Starting Orcinus LSP server on standard streams')
+        reader, writer = await open_stdio_streams()
+        await self.process(reader, writer)
+
+    async def process(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername') or 'stdio'
+        logger.debug(f'Connection from {peer}')
+        client = LanguageClient(self, reader, writer)
+        self.clients.add(client)
         try:
-            logger.debug('Connection from {}:{}'.format(*client_address))
-            client = LanguageTCPClient(self, connection)
-            client.handle()
-        except EOFError:
-            logger.debug('Connection {}:{} closed'.format(*client_address))
+            await client.handle()
+            logger.debug(f'Connection {peer} closed')
+        except ConnectionError:
+            logger.debug(f'Connection {peer} reset')
         except Exception:
-            logger.error("Language server shutting down for uncaught exception")
-            raise
+            logger.exception(f"Connection {peer} is closed for uncaught exception")
         finally:
-            # Clean up the connection
-            connection.close()
+            self.clients.discard(client)
+            writer.close()
 
 
 # noinspection PyPep8Naming
-class LanguageTCPClient:
-    def __init__(self, server, connection) -> None:
-        super().__init__()
-
-        self.__server = server  # type: LanguageTCPServer
-        self.__connection = connection
-        self.__reader = connection.makefile('r')
-        self.__writer = connection.makefile('w')
+class LanguageClient:
+    """
+    The LanguageClient class is represented connection of single client.
+
+    Requests of client are processed in order in own worker thread, because workspace of client is not thread-safe.
+    Responses and notifications are written in event loop.
+
+    Analysis of document is scheduled in event loop after changes of document are stopped for `analysis_delay`, and
+    each new version of document cancels scheduled analysis of previous version. Diagnostics are published only for
+    the latest received version of document.
+
+    After initialization all source files of workspace are indexed in background. Each file is analyzed in separate
+    job of worker, therefore requests of client are delayed by analysis of single file at most.
+    """
+
+    def __init__(self, server: LanguageServer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.__server = server
+        self.__reader = reader
+        self.__writer = writer
+        self.__loop = asyncio.get_event_loop()
+        self.__executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix='orcinus-client')
         self.__workspace = None
+        self.__client_capabilities = {}
+        self.__indexing: Optional[asyncio.Task] = None
+        self.__request_ids = itertools.count()
+        self.__responses: Dict[Union[int, str], asyncio.Future] = {}
+        self.__requests: Dict[Union[int, str], asyncio.Task] = {}
+        self.__analyses: Dict[str, Union[asyncio.TimerHandle, asyncio.Future]] = {}
+        self.__versions: Dict[str, Optional[int]] = {}
 
         dispatcher = Dispatcher()
         self.dispatcher = dispatcher
@@ -74,6 +175,7 @@ class LanguageTCPClient:
         dispatcher.add_method(self.initialize)
         dispatcher.add_method(self.initialized)
         dispatcher.add_method(self.workspace_change_config, 'workspace/didChangeConfiguration')
+        dispatcher.add_method(self.workspace_symbol, 'workspace/symbol')
         dispatcher.add_method(self.text_document_open, 'textDocument/didOpen')
         dispatcher.add_method(self.text_document_change, 'textDocument/didChange')
         dispatcher.add_method(self.text_document_close, 'textDocument/didClose')
@@ -83,14 +185,14 @@ class LanguageTCPClient:
     def capabilities(self):
         return {
             'capabilities': {
-                'textDocumentSync': TextDocumentSyncKind.Full,
+                'textDocumentSync': TextDocumentSyncKind.Incremental,
                 'completionProvider': {
                     'resolveProvider': False,
                     'triggerCharacters': ['.', ' ']
                 },
                 # 'definitionProvider': True,
                 # 'documentSymbolProvider': True,
-                # 'workspaceSymbolProvider': True,
+                'workspaceSymbolProvider': True,
                 'workspace': {
                     'workspaceFolders': {
                         'supported': True,
@@ -104,73 +206,245 @@ class LanguageTCPClient:
     def workspace(self) -> Optional[Workspace]:
         return self.__workspace
 
-    def handle(self):
-        while True:
-            data = self.__read_message()
-            logger.debug(f"Receive message: {data}")
-            response = JSONRPCResponseManager.handle(data, self.dispatcher)
-            if response is not None:
-                logger.debug(f"Send message: {response.data}")
-                self.__write_message(data=response.data)
+    async def handle(self):
+        """ Read messages until stream is closed """
+        pending = set()
+        try:
+            while True:
+                data = await self.__read_message()
+                if data is None:
+                    break
+                logger.debug(f"Receive message: {data}")
+                try:
+                    message = json.loads(data)
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict):
+                    message = {}
+
+                method = message.get('method')
+                params = message.get('params')
+                if method is None and 'id' in message and ('result' in message or 'error' in message):
+                    self.__resolve_response(message)
+                    continue
+                if method == CANCEL_REQUEST:
+                    self.__cancel_request(params.get('id') if isinstance(params, dict) else None)
+                    continue
+                if method in ('textDocument/didOpen', 'textDocument/didChange', 'textDocument/didClose'):
+                    self.__track_version(method, params)
+
+                request_id = message.get('id')
+                task = asyncio.ensure_future(self.__respond(data, request_id))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                if request_id is not None:
+                    self.__requests[request_id] = task
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            if self.__indexing:
+                self.__indexing.cancel()
+            for analysis in self.__analyses.values():
+                analysis.cancel()
+            for future in self.__responses.values():
+                future.cancel()
+            self.__executor.shutdown(wait=False)
+
+    async def request(self, method: str, params=None):
+        """ Send a request to the client and wait for result. Error of client is raised as exception """
+        request_id = f'orcinus-{next(self.__request_ids)}'
+        future = self.__loop.create_future()
+        self.__responses[request_id] = future
+        try:
+            self.__write_message(data={'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params})
+            await self.__writer.drain()
+            return await future
+        finally:
+            self.__responses.pop(request_id, None)
+
+    def __resolve_response(self, message: dict):
+        future = self.__responses.get(message['id'])
+        if not future or future.done():
+            logger.debug(f"Receive response for unknown request {message['id']}")
+        elif 'error' in message:
+            error = message['error'] or {}
+            future.set_exception(JSONRPCDispatchException(error.get('code'), error.get('message'), error.get('data')))
+        else:
+            future.set_result(message['result'])
+
+    def __track_version(self, method: str, params):
+        """ Remember the latest received version of document, therefore worker can drop stale analyses """
+        try:
+            text_document = params['textDocument']
+            uri = text_document['uri']
+        except (KeyError, TypeError):
+            return
+        if method == 'textDocument/didClose':
+            self.__versions.pop(uri, None)
+            analysis = self.__analyses.pop(uri, None)
+            if analysis:
+                analysis.cancel()
+        else:
+            self.__versions[uri] = text_document.get('version')
+
+    def __cancel_request(self, request_id):
+        """ Cancel request, that is not processed yet. Response of request in processing is dropped """
+        task = self.__requests.pop(request_id, None)
+        if task and task.cancel():
+            logger.debug(f"Cancel request {request_id}")
+            self.__write_message(data={
+                'jsonrpc': '2.0',
+                'id': request_id,
+                'error': {'code': ErrorCodes.RequestCancelled, 'message': 'Request cancelled'}
+            })
+
+    async def __respond(self, data: str, request_id=None):
+        try:
+            response = await self.__loop.run_in_executor(self.__executor, self.__process, data)
+        finally:
+            if self.__requests.get(request_id) is asyncio.current_task():
+                del self.__requests[request_id]
+
+        if response is not None:
+            logger.debug(f"Send message: {response.data}")
+            self.__write_message(data=response.data)
+            await self.__writer.drain()
+
+    def __process(self, data: str):
+        """ Process request in worker thread """
+        start = time.perf_counter()
+        response = JSONRPCResponseManager.handle(data, self.dispatcher)
+        try:
+            method = json.loads(data).get('method')
+        except (ValueError, AttributeError):
+            method = None
+        self.__log_timings(f"Processed request `{method}`", time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def __log_timings(action: str, wall_time: float):
+        """
+        Log wall time of job in worker thread and statistics of compiler phases, that were collected during job.
+        Statistics are collected per thread, therefore they are not mixed with jobs of other clients.
+        """
+        logger.info(f"{action} in {wall_time * 1000:.3f} ms")
+        if time_report.enabled:
+            statistics = time_report.collect()
+            if statistics:
+                logger.info(time_report.format(statistics))
 
     def notify(self, method, params=None):
-        """ Send a notification to the client, expects no response. """
+        """ Send a notification to the client, expects no response. Can be called from worker thread """
         request = JSONRPC20Request(method=method, params=params, is_notification=True)
         logger.debug(f"Sending notification {method} {request.data}")
-        self.__write_message(data=request.data)
-
-    @staticmethod
-    def __get_content_length(line):
-        if line.startswith('Content-Length: '):
-            _, value = line.split('Content-Length: ')
-            value = value.strip()
-            try:
-                return int(value)
-            except ValueError:
-                raise ValueError("Invalid Content-Length header: {}".format(value))
-
-    def __read_line(self):
-        pass
-
-    def __read_message(self) -> bytes:
-        line = self.__reader.readline()
-        if not line:
-            raise EOFError()
+        self.__loop.call_soon_threadsafe(lambda: self.__write_message(data=request.data))
+
+    def schedule_analysis(self, document: Document):
+        """ Schedule analysis of current version of document. Can be called from worker thread """
+        self.__loop.call_soon_threadsafe(self.__schedule_analysis, document.uri, document.version)
+
+    def __schedule_analysis(self, uri: str, version: Optional[int]):
+        analysis = self.__analyses.get(uri)
+        if analysis:
+            analysis.cancel()
+        self.__analyses[uri] = self.__loop.call_later(self.__server.analysis_delay, self.__start_analysis, uri, version)
+
+    def __start_analysis(self, uri: str, version: Optional[int]):
+        future = self.__loop.run_in_executor(self.__executor, self.__analyze, uri, version)
+        future.add_done_callback(lambda _: self.__finish_analysis(uri, future))
+        self.__analyses[uri] = future
+
+    def __finish_analysis(self, uri: str, future: asyncio.Future):
+        if self.__analyses.get(uri) is future:
+            del self.__analyses[uri]
+        if not future.cancelled() and future.exception():
+            logger.error(f"Analysis of document {uri} is failed", exc_info=future.exception())
+
+    def __is_latest_version(self, uri: str, version: Optional[int]) -> bool:
+        return uri in self.__versions and self.__versions[uri] == version
+
+    def __analyze(self, uri: str, version: Optional[int]):
+        """ Analyze document in worker thread, if version of document is not stale """
+        document = self.workspace.get_document(uri)
+        if not document or document.version != version or not self.__is_latest_version(uri, version):
+            return
 
-        content_length = self.__get_content_length(line)
+        start = time.perf_counter()
+        try:
+            self.analyze(document, version)
+        finally:
+            self.__log_timings(f"Analyzed document {uri}", time.perf_counter() - start)
 
-        # Blindly consume all header lines
-        while line and line.strip():
-            line = self.__reader.readline()
+    def __start_indexing(self):
+        if not self.__indexing:
+            self.__indexing = self.__loop.create_task(self.__index_workspace())
 
-        if not line:
-            raise EOFError()
+    async def __create_progress(self) -> Optional[str]:
+        """ Create token of progress, if it's supported by client """
+        if not (self.__client_capabilities.get('window') or {}).get('workDoneProgress'):
+            return None
+        try:
+            await self.request(WORK_DONE_PROGRESS_CREATE, {'token': INDEXING_TOKEN})
+        except JSONRPCDispatchException as ex:
+            logger.debug(f"Client rejected progress: {ex.error.message}")
+            return None
+        return INDEXING_TOKEN
+
+    def __report_progress(self, token: Optional[str], value: dict):
+        if token is not None:
+            self.notify(PROGRESS, params={'token': token, 'value': value})
+
+    async def __index_workspace(self):
+        """ Analyze all source files of workspace, therefore first interaction with document is not stalled """
+        start = time.perf_counter()
+        filenames = await self.__loop.run_in_executor(self.__executor, self.workspace.find_sources)
+        token = await self.__create_progress()
+        self.__report_progress(token, {'kind': 'begin', 'title': 'Indexing', 'cancellable': False, 'percentage': 0})
+
+        count = 0
+        for index, filename in enumerate(filenames):
+            self.__report_progress(token, {
+                'kind': 'report',
+                'message': os.path.basename(filename),
+                'percentage': index * 100 // len(filenames)
+            })
+            if await self.__loop.run_in_executor(self.__executor, self.__index_document, filename):
+                count += 1
+
+        self.__report_progress(token, {'kind': 'end', 'message': f'Indexed {count} files'})
+        logger.info(f"Indexed {count} of {len(filenames)} files in {(time.perf_counter() - start) * 1000:.3f} ms")
+
+    def __index_document(self, filename: str) -> bool:
+        """ Index source file in worker thread """
+        start = time.perf_counter()
+        try:
+            return self.workspace.index_document(filename)
+        except Exception:  # broken file must not stop indexing of other files
+            logger.exception(f"Indexing of file {filename} is failed")
+            return False
+        finally:
+            self.__log_timings(f"Indexed file {filename}", time.perf_counter() - start)
 
-        # Grab the body
-        return self.__reader.read(content_length)
+    async def __read_message(self) -> Optional[str]:
+        return await read_message(self.__reader)
 
     def __write_message(self, *, data: dict = None, body: str = None):
         if data:
             body = json.dumps(data, separators=(",", ":"))
         elif not body:
             return
-        # log.debug("Send message: %s", data)
-        content_length = len(body)
-        response = (
-            "Content-Length: {}\r\n"
-            "Content-Type: application/vscode-jsonrpc; charset=utf8\r\n\r\n"
-            "{}".format(content_length, body)
-        )
-        self.__writer.write(response)
-        self.__writer.flush()
-
-    def initialize(self, processId, rootPath, rootUri, initializationOptions=None, workspaceFolders=None, **kwargs):
+        if not self.__writer.is_closing():
+            write_message(self.__writer, body)
+
+    def initialize(self, processId, rootPath, rootUri, initializationOptions=None, workspaceFolders=None,
+                   capabilities=None, **kwargs):
         logger.info("Receive IDE initialize parameters")
+        self.__client_capabilities = capabilities or {}
         if processId:
             logger.debug(f"Start from process {processId}")
 
         if workspaceFolders:
-            self.__workspace = Workspace(workspaceFolders)
+            self.__workspace = Workspace([folder['uri'] for folder in workspaceFolders])
         else:
             self.__workspace = Workspace([rootUri])
 
@@ -179,22 +453,33 @@ class LanguageTCPClient:
 
     def initialized(self):
         logger.info("Server initialized for IDE")
-        pass
+        self.__loop.call_soon_threadsafe(self.__start_indexing)
 
     def workspace_change_config(self, *args, **kwargs):
         logger.info("Receive workspace configuration changes")
         pass
 
+    def workspace_symbol(self, query):
+        symbols = self.workspace.semantic_cache.symbols.search(query)
+        return [to_lsp_symbol(symbol) for symbol in symbols]
+
     def text_document_open(self, textDocument):
         logger.info(f"Open document: {textDocument['uri']}")
         document = self.workspace.update_document(textDocument['uri'], textDocument['text'], textDocument['version'])
-        self.analyze(document)
+        self.schedule_analysis(document)
 
     def text_document_change(self, textDocument, contentChanges):
         logger.debug(f"Change document: {textDocument['uri']}")
         document = self.workspace.get_or_create_document(textDocument['uri'])
-        document.source = contentChanges[0]['text']
-        self.analyze(document)
+        for change in contentChanges:
+            if 'range' in change:
+                begin = document.offset(from_lsp_position(change['range']['start']))
+                end = document.offset(from_lsp_position(change['range']['end']))
+                document.replace(begin, end, change['text'])
+            else:
+                document.source = change['text']
+        document.version = textDocument.get('version')
+        self.schedule_analysis(document)
 
     def text_document_close(self, textDocument):
         logger.info(f"Close document: {textDocument['uri']}")
@@ -205,33 +490,49 @@ class LanguageTCPClient:
         position = from_lsp_position(position, is_end=True)
         logger.debug(f"Completion document: {textDocument['uri']} on position {position}")
 
-        # node = document.tree.find_position(position)
         items = []
-
-        # if isinstance(node, (AliasAST, ImportModuleAST)):
-        #     items.append({
-        #         'label': 'system',
-        #         'kind': CompletionItemKind.Module
-        #     })
-        #     items.append({
-        #         'label': 'io',
-        #         'kind': CompletionItemKind.Module
-        #     })
-        #     items.append({
-        #         'label': '_io',
-        #         'kind': CompletionItemKind.Module,
-        #         'deprecated': True,
-        #     })
+        model = document.model
+        if model:
+            # cached model can be analyzed from other document with same source, therefore it's own tree is used
+            tree = model.tree
+            node = tree.positions.find_node(position) or tree
+            scope = None
+            for symbol in itertools.chain((node,), tree.parents.ancestors(node)):
+                scope = model.scopes.get(symbol)
+                if scope is not None:
+                    break
+
+            # builtins are implicitly visible in all modules after module scope
+            scopes = []
+            while scope is not None:
+                scopes.append(scope)
+                scope = scope.parent
+            scopes.append(model.context.builtins_module.scope)
+
+            # symbols of inner scopes hide symbols of outer scopes with same name
+            names = set()
+            for scope in scopes:
+                for name, symbol in scope.defined.items():
+                    if name not in names:
+                        names.add(name)
+                        items.append(to_lsp_completion_item(name, symbol))
 
         return {
             'isIncomplete': False,
             'items': items
         }
 
-    def publish_diagnostics(self, doc_uri: str, diagnostics: DiagnosticManager):
+    def publish_diagnostics(self, doc_uri: str, diagnostics: DiagnosticManager, version: int = None):
         diagnostics = tuple(map(to_lsp_diagnostic, diagnostics))
-        self.notify(DOCUMENT_PUBLISH_DIAGNOSTICS, params={'uri': doc_uri, 'diagnostics': diagnostics})
+        params = {'uri': doc_uri, 'diagnostics': diagnostics}
+        if version is not None:
+            params['version'] = version
+        self.notify(DOCUMENT_PUBLISH_DIAGNOSTICS, params=params)
 
-    def analyze(self, document: Document):
+    def analyze(self, document: Document, version: int = None):
         document.model
-        self.publish_diagnostics(document.uri, document.diagnostics)
+
+        # newer version of document is received during analysis, therefore diagnostics are stale
+        if version is not None and not self.__is_latest_version(document.uri, version):
+            return
+        self.publish_diagnostics(document.uri, document.diagnostics, version)
@@ -0,0 +1,215 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+
+from orcinus.server.constants import DOCUMENT_PUBLISH_DIAGNOSTICS, CANCEL_REQUEST, ErrorCodes, PROGRESS, \
+    WORK_DONE_PROGRESS_CREATE
+from orcinus.server.server import LanguageServer, read_message, write_message
+
+SOURCE = """
+def main() -> int
+    return 0
+"""
+
+
+async def send(writer: asyncio.StreamWriter, method: str, params: dict, id: int = None):
+    message = {'jsonrpc': '2.0', 'method': method, 'params': params}
+    if id is not None:
+        message['id'] = id
+    write_message(writer, json.dumps(message))
+    await writer.drain()
+
+
+async def receive(reader: asyncio.StreamReader) -> dict:
+    return json.loads(await asyncio.wait_for(read_message(reader), 30))
+
+
+async def connect(server: LanguageServer, tcp_server: asyncio.AbstractServer, root: str):
+    port = tcp_server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    await send(writer, 'initialize', {'processId': None, 'rootPath': None, 'rootUri': root}, 0)
+    assert (await receive(reader))['id'] == 0
+    return reader, writer
+
+
+def test_concurrent_clients(tmpdir):
+    async def main():
+        server = LanguageServer()
+        tcp_server = await server.start_tcp('127.0.0.1', 0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        try:
+            clients = [await asyncio.open_connection('127.0.0.1', port) for _ in range(2)]
+
+            # all clients are served at same time
+            for index, (_, writer) in enumerate(clients):
+                await send(writer, 'initialize', {'processId': None, 'rootPath': None, 'rootUri': str(tmpdir)}, index)
+            for index, (reader, _) in enumerate(clients):
+                response = await receive(reader)
+                assert response['id'] == index
+                assert 'capabilities' in response['result']
+            assert len(server.clients) == 2
+
+            # diagnostics are published after analysis of opened document
+            reader, writer = clients[0]
+            uri = os.path.join(str(tmpdir), 'main.orx')
+            await send(writer, 'textDocument/didOpen', {'textDocument': {'uri': uri, 'text': SOURCE, 'version': 1}})
+            notification = await receive(reader)
+            assert notification['method'] == DOCUMENT_PUBLISH_DIAGNOSTICS
+            assert notification['params']['uri'] == uri
+            assert notification['params']['diagnostics']
+
+            for _, writer in clients:
+                writer.close()
+        finally:
+            tcp_server.close()
+            await tcp_server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_debounced_analysis(tmpdir):
+    async def main():
+        server = LanguageServer(analysis_delay=0.1)
+        tcp_server = await server.start_tcp('127.0.0.1', 0)
+        try:
+            reader, writer = await connect(server, tcp_server, str(tmpdir))
+            uri = os.path.join(str(tmpdir), 'main.orx')
+
+            # burst of changes is analyzed once, and diagnostics are published only for the latest version
+            await send(writer, 'textDocument/didOpen', {'textDocument': {'uri': uri, 'text': '', 'version': 1}})
+            for version in range(2, 10):
+                await send(writer, 'textDocument/didChange', {
+                    'textDocument': {'uri': uri, 'version': version},
+                    'contentChanges': [{'text': SOURCE if version == 9 else ''}]
+                })
+            notification = await receive(reader)
+            assert notification['method'] == DOCUMENT_PUBLISH_DIAGNOSTICS
+            assert notification['params']['version'] == 9
+            assert notification['params']['diagnostics']
+
+            try:
+                notification = await asyncio.wait_for(read_message(reader), 0.5)
+            except asyncio.TimeoutError:
+                notification = None
+            assert notification is None
+
+            writer.close()
+        finally:
+            tcp_server.close()
+            await tcp_server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_cancel_request(tmpdir):
+    async def main():
+        server = LanguageServer()
+        tcp_server = await server.start_tcp('127.0.0.1', 0)
+        try:
+            reader, writer = await connect(server, tcp_server, str(tmpdir))
+            client, = server.clients
+            client.dispatcher.add_method(lambda: time.sleep(0.2), 'test/sleep')
+
+            # second request is waited for worker and cancelled before processing
+            uri = os.path.join(str(tmpdir), 'main.orx')
+            await send(writer, 'test/sleep', {}, 1)
+            await send(writer, 'textDocument/completion', {'textDocument': {'uri': uri}, 'position': {
+                'line': 0, 'character': 0
+            }}, 2)
+            await send(writer, CANCEL_REQUEST, {'id': 2})
+
+            responses = {response['id']: response for response in [await receive(reader), await receive(reader)]}
+            assert 'result' in responses[1]
+            assert responses[2]['error']['code'] == ErrorCodes.RequestCancelled
+
+            writer.close()
+        finally:
+            tcp_server.close()
+            await tcp_server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_workspace_indexing(tmpdir):
+    tmpdir.join('point.orx').write("\nstruct Point:\n    x: int\n    y: int\n")
+
+    async def main():
+        server = LanguageServer()
+        tcp_server = await server.start_tcp('127.0.0.1', 0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            await send(writer, 'initialize', {
+                'processId': None,
+                'rootPath': None,
+                'rootUri': None,
+                'workspaceFolders': [{'uri': f'file://{tmpdir}', 'name': 'package'}],
+                'capabilities': {'window': {'workDoneProgress': True}},
+            }, 0)
+            assert (await receive(reader))['id'] == 0
+            await send(writer, 'initialized', {})
+
+            # progress of indexing is reported with token, that is created by server
+            request = await receive(reader)
+            assert request['method'] == WORK_DONE_PROGRESS_CREATE
+            write_message(writer, json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': None}))
+
+            kinds = []
+            while not kinds or kinds[-1] != 'end':
+                notification = await receive(reader)
+                assert notification['method'] == PROGRESS
+                assert notification['params']['token'] == request['params']['token']
+                kinds.append(notification['params']['value']['kind'])
+            assert kinds[0] == 'begin' and 'report' in kinds
+
+            # symbols of indexed files are found before documents are opened
+            await send(writer, 'workspace/symbol', {'query': 'point'}, 1)
+            response = await receive(reader)
+            assert [symbol['name'] for symbol in response['result']] == ['Point']
+            assert response['result'][0]['location']['uri'] == str(tmpdir.join('point.orx'))
+
+            writer.close()
+        finally:
+            tcp_server.close()
+            await tcp_server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_completion(tmpdir):
+    source = "def helper(count: int) -> int:\n    return count\n\ndef main() -> int:\n    return helper(1)\n"
+
+    async def main():
+        server = LanguageServer()
+        tcp_server = await server.start_tcp('127.0.0.1', 0)
+        try:
+            reader, writer = await connect(server, tcp_server, str(tmpdir))
+            uri = os.path.join(str(tmpdir), 'main.orx')
+            await send(writer, 'textDocument/didOpen', {'textDocument': {'uri': uri, 'text': source, 'version': 1}})
+
+            # parameters are visible only in own function, and builtins are visible everywhere
+            labels = []
+            for index, line in enumerate((1, 4)):
+                await send(writer, 'textDocument/completion', {'textDocument': {'uri': uri}, 'position': {
+                    'line': line, 'character': 11
+                }}, index + 1)
+                response = await receive(reader)
+                while response.get('method') == DOCUMENT_PUBLISH_DIAGNOSTICS:
+                    response = await receive(reader)
+                labels.append({item['label'] for item in response['result']['items']})
+            assert {'count', 'helper', 'main', 'int'} <= labels[0]
+            assert {'helper', 'main', 'int'} <= labels[1] and 'count' not in labels[1]
+
+            writer.close()
+        finally:
+            tcp_server.close()
+            await tcp_server.wait_closed()
+
+    asyncio.run(main())
@@ -0,0 +1,235 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import subprocess
+import tempfile
+import time
+from typing import Iterator, Optional, Sequence
+
+from orcinus.builder import BuildOptions, compile_module, emit_document, initialize_llvm, link_executable
+from orcinus.core.diagnostics import Diagnostic
+from orcinus.exceptions import OrcinusError
+from orcinus.workspace import Workspace
+
+# Default limit of execution time of single test program, in seconds
+DEFAULT_TIMEOUT = 10.0
+
+
+def find_fixtures(path: str) -> Iterator[str]:
+    """ Find all source files in directory """
+    for path, _, filenames in os.walk(path):
+        for filename in filenames:
+            if os.path.splitext(filename)[1] == '.orx':
+                yield os.path.join(path, filename)
+
+
+class FixtureCase:
+    """
+    The FixtureCase class is represented test program with expectations, that are written in comments of source, e.g.
+
+    ```
+    # EXIT: 10
+    # ARG: value
+    # INPUT: line
+    # OUTPUT: line
+    # ERROR: message
+    # WARNING: message
+    ```
+
+    Attributes:
+        filename    - The source filename
+        name        - The name of program, e.g. source filename without extension
+        arguments   - The command line arguments of program
+        input       - The standard input of program
+        output      - The expected substring of standard output
+        error       - The expected substring of standard error
+        code        - The expected exit code
+        warnings    - The warnings about fixture itself
+    """
+
+    def __init__(self, filename: str, name: str = None, arguments: Sequence[str] = None, input: str = None,
+                 output: str = None, error: str = None, code: Optional[int] = 0, warnings: Sequence[str] = None):
+        self.filename = filename
+        self.name = name or os.path.splitext(filename)[0]
+        self.arguments = list(arguments or ())
+        self.input = input
+        self.output = output
+        self.error = error
+        self.code = code
+        self.warnings = list(warnings or ())
+
+    @staticmethod
+    def load(filename: str, name: str = None) -> FixtureCase:
+        """ Load test case from comments in source """
+        values = {'WARNING': [], 'EXIT': [], 'ARG': [], 'INPUT': [], 'OUTPUT': [], 'ERROR': []}
+        with open(filename, 'r', encoding='utf-8') as stream:
+            for line in stream:
+                line = line.strip()
+                if not line.startswith('#'):
+                    continue
+                key, separator, value = line[1:].strip().partition(':')
+                if separator and key in values:
+                    values[key].append(value[1:] if value.startswith(' ') else value)
+
+        def join(items):
+            return "\n".join(items) if items else None
+
+        return FixtureCase(
+            filename,
+            name,
+            arguments=[value.strip() for value in values['ARG']],
+            input=join(values['INPUT']),
+            output=join(values['OUTPUT']),
+            error=join(values['ERROR']),
+            code=int(values['EXIT'][-1].strip()) if values['EXIT'] else 0,
+            warnings=[value.strip() for value in values['WARNING']],
+        )
+
+
+class FixtureResult:
+    """
+    Attributes:
+        case            - The executed test case
+        diagnostics     - The diagnostics, that were reported during compilation
+        code            - The exit code of program, or `1` if program is not compiled, linked or is timed out
+        output          - The standard output of program
+        error           - The standard error of program, or error message if program is not compiled or linked
+        compile_time    - The time of parsing, analysis and emitting of object file, in seconds
+        link_time       - The time of linking executable, in seconds
+        run_time        - The time of program execution, in seconds
+        is_timeout      - Is program killed, because it's execution time is exceeded limit
+    """
+
+    def __init__(self, case: FixtureCase, diagnostics: Sequence[Diagnostic], code: int, output: str = '',
+                 error: str = '', compile_time: float = 0.0, link_time: float = 0.0, run_time: float = 0.0,
+                 is_timeout: bool = False):
+        self.case = case
+        self.diagnostics = diagnostics
+        self.code = code
+        self.output = output
+        self.error = error
+        self.compile_time = compile_time
+        self.link_time = link_time
+        self.run_time = run_time
+        self.is_timeout = is_timeout
+
+    @property
+    def failures(self) -> Sequence[str]:
+        """ Returns messages of failed expectations """
+        failures = []
+        if self.is_timeout:
+            failures.append(f'Timed out after {self.run_time:.2f} s')
+        if self.case.code is not None and self.code != self.case.code:
+            failures.append(f'Expected exit code {self.case.code}, got {self.code}')
+        if self.case.error is not None and self.case.error not in self.error:
+            failures.append(f'Expected error `{self.case.error}`')
+        if self.case.output is not None and self.case.output not in self.output:
+            failures.append(f'Expected output `{self.case.output}`')
+        return failures
+
+    @property
+    def is_passed(self) -> bool:
+        return not self.failures
+
+
+class FixtureEngine:
+    """
+    The FixtureEngine class is used for batch execution of test programs.
+
+    All programs are compiled to object files in current process with single workspace, therefore standard library
+    and shared modules are parsed and analyzed only once. After that programs are linked and executed in worker pool.
+    """
+
+    def __init__(self, path: str = None, *, jobs: int = None, options: BuildOptions = None,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """
+        :param path:    Path of package with test programs
+        :param jobs:    Count of workers, that link and execute programs
+        :param options: Build options of programs
+        :param timeout: Limit of execution time of single program, in seconds
+        """
+        self.workspace = Workspace(paths=[path or os.getcwd()])
+        self.jobs = jobs or os.cpu_count() or 1
+        self.options = options or BuildOptions()
+        self.timeout = timeout
+
+    def run(self, cases: Sequence[FixtureCase]) -> Sequence[FixtureResult]:
+        """ Compile and execute all test programs. Returns results in order of cases """
+        initialize_llvm()
+        with tempfile.TemporaryDirectory() as path:
+            compiled = [self.compile(case, os.path.join(path, f'{index}.o')) for index, case in enumerate(cases)]
+            with concurrent.futures.ThreadPoolExecutor(self.jobs) as pool:
+                return list(pool.map(lambda args: self.execute(*args), compiled))
+
+    def compile(self, case: FixtureCase, filename: str):
+        """ Compile test program to object file """
+        start = time.perf_counter()
+        try:
+            diagnostics, llvm_ir = emit_document(self.workspace, case.filename)
+            if llvm_ir is None:
+                return case, diagnostics, None, None, time.perf_counter() - start
+
+            llvm_module, machine = compile_module(llvm_ir, self.options)
+            with open(filename, 'wb') as stream:
+                stream.write(machine.emit_object(llvm_module))
+        except Diagnostic as ex:
+            return case, (ex,), None, None, time.perf_counter() - start
+        except Exception as ex:  # same as in command line, e.g. invalid LLVM IR is compilation error
+            return case, (), None, str(ex), time.perf_counter() - start
+        return case, diagnostics, filename, None, time.perf_counter() - start
+
+    def execute(self, case: FixtureCase, diagnostics: Sequence[Diagnostic], filename: Optional[str],
+                message: Optional[str], compile_time: float) -> FixtureResult:
+        """ Link and execute test program """
+        if not filename:
+            error = message or '\n'.join(map(str, diagnostics))
+            return FixtureResult(case, diagnostics, 1, error=error, compile_time=compile_time)
+
+        start = time.perf_counter()
+        executable = os.path.splitext(filename)[0]
+        try:
+            link_executable([filename], executable)
+        except OrcinusError as ex:
+            link_time = time.perf_counter() - start
+            return FixtureResult(case, diagnostics, 1, error=str(ex), compile_time=compile_time, link_time=link_time)
+        link_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            process = subprocess.run(
+                [case.name] + case.arguments,
+                executable=executable,
+                input=case.input.encode('utf-8') if case.input is not None else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired as ex:
+            run_time = time.perf_counter() - start
+            return FixtureResult(
+                case,
+                diagnostics,
+                1,
+                (ex.stdout or b'').decode('utf-8', errors='replace').rstrip(),
+                (ex.stderr or b'').decode('utf-8', errors='replace').rstrip(),
+                compile_time,
+                link_time,
+                run_time,
+                is_timeout=True,
+            )
+        run_time = time.perf_counter() - start
+        return FixtureResult(
+            case,
+            diagnostics,
+            process.returncode,
+            process.stdout.decode('utf-8', errors='replace').rstrip(),
+            process.stderr.decode('utf-8', errors='replace').rstrip(),
+            compile_time,
+            link_time,
+            run_time,
+        )
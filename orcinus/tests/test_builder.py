@@ -0,0 +1,112 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from orcinus.builder import BuildOptions, build_documents, get_output_kind, get_outputs, initialize_llvm, run_document
+from orcinus.builder import sort_by_imports
+from orcinus.exceptions import OrcinusError
+from orcinus.workspace import Workspace
+
+SOURCES = {
+    'main.orx': "from point import Point\n\ndef main() -> int:\n    return 0\n",
+    'point.orx': "struct Point:\n    x: int\n",
+    'other.orx': "def main() -> int:\n    return 1\n",
+}
+
+
+def write_sources(tmpdir):
+    for filename, source in SOURCES.items():
+        tmpdir.join(filename).write(source)
+    return list(SOURCES)
+
+
+def test_sort_by_imports(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    filenames = write_sources(tmpdir)
+    workspace = Workspace(paths=[str(tmpdir)])
+    assert sort_by_imports(workspace, filenames) == ['point.orx', 'main.orx', 'other.orx']
+
+
+def test_build_documents_parallel(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    filenames = write_sources(tmpdir)
+    serial = build_documents(filenames)
+    parallel = build_documents(filenames, jobs=2)
+    assert [result.filename for result in parallel] == filenames
+    assert [result.llvm_ir for result in parallel] == [result.llvm_ir for result in serial]
+    assert not any(result.has_error for result in parallel)
+
+
+def test_get_output_kind():
+    assert get_output_kind('main.ll') == 'ir'
+    assert get_output_kind('main.o') == 'obj'
+    assert get_output_kind('main') == 'exe'
+
+
+def test_build_object_files(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    filenames = write_sources(tmpdir)
+    results = build_documents(filenames, output='out', kind='obj')
+    outputs = [os.path.join('out', os.path.splitext(name)[0] + '.o') for name in SOURCES]
+    assert [result.output for result in results] == outputs
+    assert tmpdir.join('out', 'main.o').read_binary().startswith(b'\x7fELF')
+
+
+def test_get_outputs(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    filenames = [os.path.join('a', 'main.orx'), os.path.join('b', 'main.orx')]
+    assert get_outputs(filenames, 'out', 'obj') == [
+        (os.path.join('out', 'a', 'main.o'), 'obj'),
+        (os.path.join('out', 'b', 'main.o'), 'obj'),
+    ]
+    assert tmpdir.join('out', 'b').isdir()
+
+    with pytest.raises(OrcinusError):
+        get_outputs(['main.orx', os.path.join('.', 'main.orx')], 'out', 'obj')
+
+
+@pytest.mark.skipif(not shutil.which('cc'), reason="requires system compiler driver")
+def test_build_executable(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    write_sources(tmpdir)
+    result, = build_documents(['other.orx'], output='other')
+    assert subprocess.call([os.path.abspath(result.output)]) == 1
+
+
+def test_build_optimized(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    write_sources(tmpdir)
+    options = BuildOptions.from_level('2', time_passes=True)
+    result, = build_documents(['other.orx'], options=options)
+    assert 'ret i32 1' in result.llvm_ir
+    assert 'Pass execution timing report' in result.timings
+
+
+def test_run_document(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    write_sources(tmpdir)
+    initialize_llvm()
+    workspace = Workspace(paths=[str(tmpdir)])
+    diagnostics, code = run_document(workspace, 'other.orx', [])
+    assert not diagnostics
+    assert code == 1
+
+
+def test_build_generic_instances(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    tmpdir.join('generics.orx').write("def identity[T](value: T) -> T:\n    return value\n")
+    tmpdir.join('first.orx').write("from generics import identity\n\ndef main() -> int:\n    return identity(1)\n")
+    tmpdir.join('second.orx').write("from generics import identity\n\ndef main() -> int:\n    return identity(2)\n")
+
+    # instance is emitted in each module, that uses it
+    first, second = build_documents(['first.orx', 'second.orx'])
+    assert 'define linkonce_odr i64 @"9ORX_FUNC_1M8generics2::1F88identity1G1int' in first.llvm_ir
+    assert 'define linkonce_odr i64 @"9ORX_FUNC_1M8generics2::1F88identity1G1int' in second.llvm_ir
@@ -0,0 +1,70 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import concurrent.futures
+import pstats
+import tracemalloc
+
+from orcinus.builder import BuildOptions, build_documents
+from orcinus.profiling import TimeReport, profile
+
+
+def test_time_report_disabled():
+    report = TimeReport()
+    with report.measure('parse', 'main'):
+        pass
+    assert not report.statistics
+
+
+def test_time_report_measure():
+    report = TimeReport()
+    report.enabled = True
+    for _ in range(3):
+        with report.measure('parse', 'main'):
+            pass
+
+    statistics = report.collect()
+    assert statistics[('parse', 'main')].calls == 3
+    assert not report.statistics
+    assert 'parse' in report.format(statistics)
+
+
+def test_time_report_threads():
+    report = TimeReport()
+    report.enabled = True
+    with report.measure('parse', 'main'):
+        pass
+
+    def measure():
+        with report.measure('scan', 'other'):
+            pass
+        return report.collect()
+
+    # statistics of other thread are not collected
+    with concurrent.futures.ThreadPoolExecutor(1) as pool:
+        statistics = pool.submit(measure).result()
+    assert list(statistics) == [('scan', 'other')]
+    assert list(report.collect()) == [('parse', 'main')]
+
+
+def test_build_time_report(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    tmpdir.join('main.orx').write("def main() -> int:\n    return 0\n")
+
+    result, = build_documents(['main.orx'], options=BuildOptions(time_report=True))
+    phases = {phase for phase, _ in result.statistics}
+    assert {'scan', 'parse', 'semantic.emit', 'codegen'} <= phases
+    assert result.statistics[('codegen', 'main')].calls == 1
+
+
+def test_profile_dumps(tmpdir):
+    profile_path = str(tmpdir.join('build.prof'))
+    trace_path = str(tmpdir.join('build.trace'))
+    with profile(profile_path, trace_filename=trace_path):
+        sorted(range(1000))
+
+    assert pstats.Stats(profile_path).total_calls
+    assert tracemalloc.Snapshot.load(trace_path).traces is not None
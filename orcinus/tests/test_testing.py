@@ -0,0 +1,61 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import shutil
+
+import pytest
+
+from orcinus.testing import FixtureCase, FixtureEngine
+
+SOURCE = """# EXIT: 3
+# ARG: first
+# OUTPUT: line
+def main() -> int:
+    return 3
+"""
+
+
+def test_load_fixture_case(tmpdir):
+    filename = tmpdir.join('main.orx')
+    filename.write(SOURCE)
+    case = FixtureCase.load(str(filename))
+    assert case.code == 3
+    assert case.arguments == ['first']
+    assert case.output == 'line'
+    assert case.input is None
+
+
+@pytest.mark.skipif(not shutil.which('cc'), reason="requires system compiler driver")
+def test_fixture_engine(tmpdir):
+    tmpdir.join('main.orx').write(SOURCE)
+    tmpdir.join('broken.orx').write("def main( -> int:\n    return 1\n")
+    cases = [FixtureCase.load(str(tmpdir.join('main.orx'))), FixtureCase.load(str(tmpdir.join('broken.orx')))]
+
+    main, broken = FixtureEngine(str(tmpdir), jobs=2).run(cases)
+    assert main.code == 3
+    assert main.failures == ['Expected output `line`']
+    assert broken.code == 1
+    assert broken.diagnostics
+
+
+def test_fixture_engine_link_error(tmpdir, monkeypatch):
+    tmpdir.join('main.orx').write(SOURCE)
+    monkeypatch.setenv('CC', 'false')
+
+    result, = FixtureEngine(str(tmpdir), jobs=1).run([FixtureCase.load(str(tmpdir.join('main.orx')))])
+    assert result.code == 1
+    assert 'Can not link executable' in result.error
+    assert not result.is_passed
+
+
+@pytest.mark.skipif(not shutil.which('cc'), reason="requires system compiler driver")
+def test_fixture_engine_timeout(tmpdir):
+    tmpdir.join('main.orx').write(SOURCE)
+
+    result, = FixtureEngine(str(tmpdir), jobs=1, timeout=1e-6).run([FixtureCase.load(str(tmpdir.join('main.orx')))])
+    assert result.is_timeout
+    assert result.code == 1
+    assert not result.is_passed
@@ -0,0 +1,78 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import concurrent.futures
+
+import pytest
+
+from orcinus.utils import DispatchError, dispatchmethod
+
+
+class Node:
+    pass
+
+
+class Expression(Node):
+    pass
+
+
+class Integer(Expression):
+    pass
+
+
+class Visitor:
+    @dispatchmethod
+    def visit(self, node: Node, suffix: str = '') -> str:
+        return 'node' + suffix
+
+    @dispatchmethod
+    def visit(self, node: Integer, suffix: str = '') -> str:
+        return 'integer' + suffix
+
+    @dispatchmethod
+    def name(self, value: int) -> str:
+        return 'int'
+
+
+def test_dispatch_by_class():
+    visitor = Visitor()
+    assert visitor.visit(Node()) == 'node'
+    assert visitor.visit(Integer(), '!') == 'integer!'
+    assert visitor.visit(Expression(), suffix='?') == 'node?'
+
+
+def test_dispatch_cache():
+    visitor = Visitor()
+    visitor.visit(Expression())
+    assert Visitor.visit.table.cache[Expression] is Visitor.visit.table.implementations[Node]
+
+
+def test_dispatch_error():
+    with pytest.raises(DispatchError):
+        Visitor().name('value')
+
+
+def test_dispatch_from_threads():
+    class Dispatcher:
+        @dispatchmethod
+        def visit(self, node: Node) -> str:
+            return 'node'
+
+        @dispatchmethod
+        def visit(self, node: Expression) -> str:
+            return 'expression'
+
+        @dispatchmethod
+        def visit(self, node: Integer) -> str:
+            return 'integer'
+
+    # first dispatches are resolved concurrently
+    dispatcher = Dispatcher()
+    nodes = [Node(), Expression(), Integer()] * 100
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(dispatcher.visit, nodes))
+    assert results == ['node', 'expression', 'integer'] * 100
+    assert Dispatcher.visit.table.cache[Integer] is Dispatcher.visit.table.implementations[Integer]
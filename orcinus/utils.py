@@ -2,7 +2,11 @@
 #
 # This software may be modified and distributed under the terms
 # of the MIT license.  See the LICENSE file for details.
+import functools
 import re
+import sys
+import threading
+from typing import Callable, Dict, List
 
 
 # noinspection PyPep8Naming
@@ -17,6 +21,94 @@ class cached_property(object):
         return None  # ABC
 
 
+class DispatchError(TypeError):
+    pass
+
+
+class DispatchTable:
+    """
+    The DispatchTable class is contained implementations of dispatched method, that are keyed by class of argument.
+
+    Implementations are resolved by MRO of argument's class on first call with this class and cached, therefore next
+    calls with same class are resolved by single lookup in dictionary. Resolving is guarded by lock, because methods
+    are dispatched from worker threads of language server.
+
+    Attributes:
+        name            - The name of dispatched method
+        implementations - The registered implementations, that are keyed by annotation of argument
+        cache           - The resolved implementations, that are keyed by exact class of argument
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.implementations: Dict[type, Callable] = {}
+        self.cache: Dict[type, Callable] = {}
+        self.pending: List[Callable] = []
+        self.lock = threading.Lock()
+
+    def register(self, func: Callable):
+        # annotations are resolved on first dispatch, because they can reference classes that are not declared yet
+        with self.lock:
+            self.pending.append(func)
+            self.cache.clear()
+
+    def resolve(self, cls: type) -> Callable:
+        with self.lock:
+            for func in self.pending:
+                self.implementations[self.get_dispatch_type(func)] = func
+            self.pending.clear()
+
+            for base in cls.__mro__:
+                func = self.implementations.get(base)
+                if func is not None:
+                    self.cache[cls] = func
+                    return func
+        raise DispatchError(f"Not found implementation of `{self.name}` for `{cls.__name__}`")
+
+    @staticmethod
+    def get_dispatch_type(func: Callable) -> type:
+        """ Returns annotation of first argument after `self` """
+        name = func.__code__.co_varnames[1]
+        annotation = func.__annotations__.get(name, object)
+        if isinstance(annotation, str):
+            annotation = eval(annotation, func.__globals__)
+        return annotation
+
+
+def dispatchmethod(func: Callable) -> Callable:
+    """
+    Method, that is dispatched by exact class of first argument after `self`. Implementations are registered by
+    repeated definitions of method with same name in class, e.g.
+
+    ```
+    @dispatchmethod
+    def emit_value(self, node: ExpressionAST) -> Value: ...
+
+    @dispatchmethod
+    def emit_value(self, node: IntegerExpressionAST) -> Value: ...
+    ```
+    """
+    namespace = sys._getframe(1).f_locals
+    dispatcher = namespace.get(func.__name__)
+    table = getattr(dispatcher, 'table', None)
+    if not isinstance(table, DispatchTable):
+        table = DispatchTable(func.__qualname__)
+        cache = table.cache
+
+        @functools.wraps(func)
+        def dispatcher(self, arg, *args, **kwargs):
+            try:
+                implementation = cache[arg.__class__]
+            except KeyError:
+                implementation = table.resolve(arg.__class__)
+            return implementation(self, arg, *args, **kwargs)
+
+        dispatcher.table = table
+
+    table.register(func)
+    return dispatcher
+
+
 def camel_case_to_lower_space(label):
     label = re.sub("([a-z])([A-Z])", "\g<1> \g<2>", label)
     return label.lower()
@@ -0,0 +1,127 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import bisect
+from array import array
+from typing import List, Tuple
+
+from orcinus.core.locations import LineIndex, Position
+
+
+class TextBuffer:
+    """
+    The TextBuffer class is represented editable source of document as piece table.
+
+    Each piece is a span of immutable string: original source or inserted text. Replacement of range splits at most
+    two pieces and never copies whole source. Offsets of line starts are updated on each edit, therefore positions
+    in source are converted to offsets without rescanning of source.
+    """
+
+    # Maximal count of pieces, after that buffer is collapsed to single piece
+    MAX_PIECES = 256
+
+    def __init__(self, text: str = ''):
+        self.__pieces: List[Tuple[str, int, int]] = [(text, 0, len(text))] if text else []
+        self.__length = len(text)
+        self.__text = text
+        self.__starts = LineIndex('', text).starts
+
+    @property
+    def text(self) -> str:
+        """ Returns whole content of buffer """
+        if self.__text is None:
+            self.__text = ''.join(string[begin:end] for string, begin, end in self.__pieces)
+            self.__pieces = [(self.__text, 0, self.__length)] if self.__length else []
+        return self.__text
+
+    @property
+    def starts(self) -> array:
+        """ Returns offsets of line starts in buffer """
+        return self.__starts
+
+    def lines(self, filename: str) -> LineIndex:
+        """ Create line index for current content of buffer """
+        return LineIndex(filename, starts=self.__starts[:])
+
+    def offset(self, position: Position) -> int:
+        """ Convert position in buffer to offset. Position after end of line is clamped to end of line """
+        if position.line > len(self.__starts):
+            return self.__length
+
+        begin = self.__starts[position.line - 1]
+        end = self.__starts[position.line] - 1 if position.line < len(self.__starts) else self.__length
+        return min(begin + max(position.column - 1, 0), end)
+
+    def replace(self, begin: int, end: int, text: str):
+        """ Replace range [begin, end) of buffer with text """
+        if not 0 <= begin <= end <= self.__length:
+            raise ValueError(f'Range [{begin}, {end}) is out of buffer')
+
+        # replace pieces
+        left = self.__split(begin)
+        right = self.__split(end)
+        self.__pieces[left:right] = [(text, 0, len(text))] if text else []
+
+        # update line starts: starts in (begin, end] are removed and starts after range are shifted
+        delta = len(text) - (end - begin)
+        starts = array('I')
+        offset = text.find('\n')
+        while offset != -1:
+            starts.append(begin + offset + 1)
+            offset = text.find('\n', offset + 1)
+
+        left = bisect.bisect_right(self.__starts, begin)
+        right = bisect.bisect_right(self.__starts, end)
+        if delta:
+            starts.extend(start + delta for start in self.__starts[right:])
+        else:
+            starts.extend(self.__starts[right:])
+        self.__starts[left:] = starts
+
+        self.__length += delta
+        self.__text = None
+        if len(self.__pieces) > self.MAX_PIECES:
+            self.__text = self.text
+
+    def __split(self, offset: int) -> int:
+        """ Split piece at offset and returns index of piece that is started at offset """
+        position = 0
+        for index, (string, begin, end) in enumerate(self.__pieces):
+            if position == offset:
+                return index
+            size = end - begin
+            if offset < position + size:
+                middle = begin + offset - position
+                self.__pieces[index:index + 1] = [(string, begin, middle), (string, middle, end)]
+                return index + 1
+            position += size
+        return len(self.__pieces)
+
+    def __getitem__(self, item: slice) -> str:
+        """ Returns substring of buffer """
+        if self.__text is not None:
+            return self.__text[item]
+
+        start, stop, step = item.indices(self.__length)
+        if step != 1:
+            return self.text[item]
+
+        parts = []
+        position = 0
+        for string, begin, end in self.__pieces:
+            size = end - begin
+            if stop <= position:
+                break
+            if start < position + size:
+                parts.append(string[begin + max(start - position, 0):begin + min(stop - position, size)])
+            position += size
+        return ''.join(parts)
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __str__(self) -> str:
+        return self.text
@@ -0,0 +1,169 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import functools
+import hashlib
+import logging
+import os
+import pickle
+import stat
+import tempfile
+from typing import Optional, Sequence, Tuple
+
+from orcinus import __version__ as version
+from orcinus.core import locations
+from orcinus.core.locations import LineAnchor, LineIndex
+from orcinus.language import SyntaxTree, scanner, parser, syntax
+
+logger = logging.getLogger('orcinus.workspace')
+
+# Parsed document: syntax tree, line index, anchor of module and anchors of top-level members
+ParseResult = Tuple[SyntaxTree, LineIndex, LineAnchor, Sequence[LineAnchor]]
+
+# Modules, that define format of cached entries. If one of them is changed, then stored entries are not loaded
+FORMAT_MODULES = (locations, scanner, parser, syntax)
+
+# Default limit of total size of entries in cache directory
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+
+
+def get_default_cache_path() -> str:
+    """ Returns default path for cache directory """
+    path = os.environ.get('ORCINUS_CACHE_DIR')
+    if path:
+        return path
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'orcinus')
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache_format() -> str:
+    """ Returns fingerprint of scanner, parser and syntax tree, e.g. hash of their sources """
+    digest = hashlib.sha256()
+    for module in FORMAT_MODULES:
+        with open(module.__file__, 'rb') as stream:
+            digest.update(stream.read())
+    return digest.hexdigest()
+
+
+def is_trusted_path(path: str) -> bool:
+    """ Returns true, if directory is owned by current user and is not writable by group or other users """
+    try:
+        status = os.stat(path)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(status.st_mode):
+        return False
+    if hasattr(os, 'getuid') and status.st_uid != os.getuid():
+        return False
+    return not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class ParseCache:
+    """
+    The ParseCache class is represented persistent on-disk cache of parsed documents.
+
+    Entries are keyed by compiler version, format of syntax tree, document's uri and hash of source, therefore changed
+    document or compiler never loads stale syntax tree. Broken or unreadable entries are ignored and document is parsed
+    again. If total size of entries is exceeded limit, then least recently used entries are removed.
+
+    Entries are unpickled, therefore cache directory is used only if it's owned by current user and is not writable by
+    other users.
+    """
+
+    def __init__(self, path: str, max_size: int = DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.__size = None  # estimated total size of entries, it's computed on first prune
+        self.__is_reported = False
+
+    def get_filename(self, uri: str, source: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(version.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(get_cache_format().encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(uri.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(source.encode('utf-8'))
+        return os.path.join(self.path, digest.hexdigest() + '.pickle')
+
+    def load(self, uri: str, source: str) -> Optional[ParseResult]:
+        """ Load parsed document from cache """
+        if not self.is_trusted():
+            return None
+
+        filename = self.get_filename(uri, source)
+        try:
+            with open(filename, 'rb') as stream:
+                result = pickle.load(stream)
+            os.utime(filename)  # mark entry as recently used
+            return result
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            logger.debug(f"Can not load parse cache for `{uri}`: {ex}")
+            return None
+
+    def store(self, uri: str, source: str, result: ParseResult):
+        """ Store parsed document in cache """
+        filename = self.get_filename(uri, source)
+        temp_filename = None
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            os.makedirs(self.path, mode=0o700, exist_ok=True)
+            if not self.is_trusted():
+                return
+
+            # write to temporary file and replace, so concurrent readers never see partial entries
+            fd, temp_filename = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as stream:
+                stream.write(data)
+            os.replace(temp_filename, filename)
+        except Exception as ex:
+            logger.debug(f"Can not store parse cache for `{uri}`: {ex}")
+            if temp_filename and os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            return
+
+        if self.__size is not None:
+            self.__size += len(data)
+        if self.__size is None or self.__size > self.max_size:
+            self.prune()
+
+    def is_trusted(self) -> bool:
+        """ Returns true, if entries can be loaded from cache directory """
+        if is_trusted_path(self.path):
+            return True
+        if not self.__is_reported and os.path.exists(self.path):
+            self.__is_reported = True
+            logger.warning(f"Parse cache is disabled: directory `{self.path}` is not owned by current user or is "
+                           f"writable by other users")
+        return False
+
+    def prune(self):
+        """ Remove least recently used entries, while total size of entries is exceeded limit """
+        entries = []
+        try:
+            with os.scandir(self.path) as iterator:
+                for entry in iterator:
+                    if entry.name.endswith('.pickle') and entry.is_file(follow_symlinks=False):
+                        status = entry.stat(follow_symlinks=False)
+                        entries.append((status.st_mtime, status.st_size, entry.path))
+        except OSError as ex:
+            logger.debug(f"Can not prune parse cache: {ex}")
+            return
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, filename in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                continue
+            size -= entry_size
+        self.__size = size
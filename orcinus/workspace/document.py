@@ -9,10 +9,17 @@ import os
 import urllib.parse
 import weakref
 
-from orcinus.core.diagnostics import DiagnosticManager, Diagnostic
+from typing import Optional, Sequence
+
+from orcinus.core.diagnostics import DiagnosticManager, Diagnostic, DiagnosticSeverity
+from orcinus.core.locations import Position
 from orcinus.language import SyntaxTree, SemanticModel, Module, Parser
 from orcinus.language.semantic import SemanticContext
+from orcinus.language.syntax import MemberAST, SyntaxCollection, SyntaxNode, SyntaxToken, TokenID
+from orcinus.profiling import time_report
 from orcinus.utils import cached_property
+from orcinus.workspace.buffer import TextBuffer
+from orcinus.workspace.utils import find_changed_range
 
 
 class Document:
@@ -22,11 +29,14 @@ class Document:
         self.__diagnostics = diagnostics if diagnostics is not None else DiagnosticManager()
         self.__uri = uri
         self.__name = name
-        self.__source = source
+        self.__buffer = TextBuffer(source) if source is not None else None
         self.__version = version
         self.__tree = None
+        self.__lines = None  # line index of source, that is used by syntax tree
+        self.__module_anchor = None  # anchor of imports and end of file
+        self.__anchors = None  # anchors of top-level members. Is `None` if tree can not be reparsed incrementally
+        self.__syntax_diagnostics = ()  # diagnostics, that were reported during parsing of tree
         self.__model = None
-        self.__module = None
 
     @property
     def package(self) -> Package:
@@ -52,16 +62,32 @@ class Document:
         filename = os.path.abspath(url.path)
         return os.path.relpath(filename, self.package.path)
 
+    @property
+    def version(self) -> Optional[int]:
+        """ Returns version of source, that is set by editor """
+        return self.__version
+
+    @version.setter
+    def version(self, value: Optional[int]):
+        self.__version = value
+
     @property
     def source(self) -> str:
         """ Returns source of document """
-        return self.__source
+        return self.__buffer.text if self.__buffer is not None else None
 
     @source.setter
     def source(self, value: str):
         """ Change source of document """
-        self.__source = value
-        self.invalidate()
+        if self.__buffer is not None and self.__buffer.text == value:
+            return  # same source, e.g. editor opens document that is already indexed
+
+        if self.__tree and self.__buffer is not None:
+            begin, end, text = find_changed_range(self.__buffer.text, value)
+            self.replace(begin, end, text)
+        else:
+            self.__buffer = TextBuffer(value) if value is not None else None
+            self.invalidate()
 
     @property
     def diagnostics(self) -> DiagnosticManager:
@@ -72,13 +98,41 @@ class Document:
     def tree(self) -> SyntaxTree:
         """ Returns syntax tree """
         if not self.__tree:
-            parser = Parser(self.uri, io.StringIO(self.source), diagnostics=self.diagnostics)
-            self.__tree = parser.parse()
+            cache = self.workspace.parse_cache if self.package else None
+            result = cache.load(self.uri, self.source) if cache else None
+            if result:
+                self.__tree, self.__lines, self.__module_anchor, anchors = result
+                self.__anchors = list(anchors)
+                return self.__tree
+
+            count = len(self.diagnostics)
+            lines = self.__buffer.lines(self.uri)
+            with time_report.measure('scan', self.name):
+                parser = Parser(self.uri, io.StringIO(self.source), diagnostics=self.diagnostics, lines=lines)
+            with time_report.measure('parse', self.name):
+                self.__tree = parser.parse()
+            self.__syntax_diagnostics = tuple(self.diagnostics[count:])
+
+            # Syntax tree with errors can not be reparsed incrementally or stored in cache
+            if not any(diagnostic.severity == DiagnosticSeverity.Error for diagnostic in self.diagnostics[count:]):
+                self.__lines = parser.tokens.lines
+                self.__module_anchor = parser.anchor
+                self.__anchors = list(parser.anchors)
+                if cache:
+                    result = self.__tree, self.__lines, self.__module_anchor, parser.anchors
+                    cache.store(self.uri, self.source, result)
         return self.__tree
 
     @property
     def model(self) -> SemanticModel:
         """ Returns semantic model """
+        # model is invalidated, if one of imported modules is changed. Source is not changed, therefore syntax tree and
+        # it's diagnostics are kept
+        if self.__model and self.name not in self.workspace.semantic_cache:
+            self.__invalidate_model()
+            for diagnostic in self.__syntax_diagnostics:
+                self.diagnostics.add(diagnostic.location, diagnostic.severity, diagnostic.message, diagnostic.source)
+
         if not self.__model:
             try:
                 context = SemanticContext(self.workspace, diagnostics=self.diagnostics)
@@ -92,16 +146,122 @@ class Document:
     @property
     def module(self) -> Module:
         """ Return semantic module for this document """
-        if not self.__module:
-            self.__module = self.model.module if self.model else None
-        return self.__module
+        model = self.model
+        return model.module if model else None
 
-    def invalidate(self):
-        """ Invalidate document, e.g. detach syntax tree or semantic model from this document """
+    def replace(self, begin: int, end: int, text: str):
+        """
+        Replace range [begin, end) of source with text.
+
+        If range is contained in single top-level member, then only this member is scanned and parsed again and spliced
+        to existed syntax tree. Otherwise syntax tree is invalidated.
+        """
+        length = len(self.__buffer)
+        self.__buffer.replace(begin, end, text)
+        tree = self.__reparse(length, begin, end, len(text) - (end - begin))
+        if tree:
+            self.__invalidate_model()
+            self.__tree = tree
+            self.__syntax_diagnostics = ()
+        else:
+            self.invalidate()
+
+    def offset(self, position: Position) -> int:
+        """ Convert position in source to offset """
+        return self.__buffer.offset(position)
+
+    def __reparse(self, length: int, begin: int, end: int, delta: int) -> Optional[SyntaxTree]:
+        if not self.__tree or self.__anchors is None:
+            return None
+
+        # find top-level member, that contains changed range
+        members = tuple(self.__tree.members.children)
+        index = self.__find_member(members, begin, end)
+        if index is None:
+            return None
+
+        # member's region is started at begin of member and finished at begin of next member
+        region_begin = self.__get_offset(members[index])
+        region_end = self.__get_offset(members[index + 1]) if index + 1 < len(members) else length
+        region = self.__buffer[region_begin:region_end + delta]
+        if index + 1 < len(members) and not region.endswith('\n'):
+            return None
+
+        # parse members from region. If region contains errors, then it must be parsed with whole source
+        lines = self.__buffer.lines(self.uri)
+        diagnostics = DiagnosticManager()
+        try:
+            with time_report.measure('scan', self.name):
+                parser = Parser(self.uri, io.StringIO(region), diagnostics=diagnostics, lines=lines,
+                                offset=region_begin)
+            with time_report.measure('parse', self.name):
+                region_members = parser.parse_module_members()
+                parser.consume(TokenID.EndFile)
+        except Exception:
+            return None  # fallback to parse of whole source, that reports errors
+        if diagnostics.has_error:
+            return None
+
+        # move anchors of other members
+        self.__module_anchor.relocate(lines)
+        for anchor in self.__anchors[:index]:
+            anchor.relocate(lines)
+        for anchor in self.__anchors[index + 1:]:
+            anchor.relocate(lines, delta)
+
+        self.__lines = lines
+        self.__anchors[index:index + 1] = parser.anchors
+
+        # splice members to syntax tree
+        children = members[:index] + tuple(region_members.children) + members[index + 1:]
+        offset = len(self.__buffer)
+        return SyntaxTree(
+            imports=self.__tree.imports,
+            members=SyntaxCollection(children, span=(offset, offset), lines=self.__module_anchor),
+            tok_eof=SyntaxToken(TokenID.EndFile, '', span=(offset, offset), lines=self.__module_anchor)
+        )
+
+    def __find_member(self, members: Sequence[MemberAST], begin: int, end: int) -> Optional[int]:
+        """ Find index of top-level member, that contains range [begin, end) but not begin of member """
+        low, high = 0, len(members)
+        while low < high:
+            middle = (low + high) // 2
+            if self.__get_offset(members[middle]) < begin:
+                low = middle + 1
+            else:
+                high = middle
+
+        index = low - 1
+        if index < 0:
+            return None
+        if index + 1 < len(members) and end >= self.__get_offset(members[index + 1]):
+            return None
+        return index
+
+    @staticmethod
+    def __get_offset(node: SyntaxNode) -> int:
+        """ Returns offset of first token in node """
+        for child in node.children:
+            if isinstance(child, SyntaxToken):
+                return child.span[0]
+            elif isinstance(child, SyntaxNode) and child.children:
+                return Document.__get_offset(child)
+        raise ValueError(u'Syntax node does not contains tokens')
+
+    def __invalidate_model(self):
         self.diagnostics.clear()
-        self.__module = None
+        if self.package:
+            self.workspace.semantic_cache.invalidate(self.name)
         self.__model = None
+
+    def invalidate(self):
+        """ Invalidate document, e.g. detach syntax tree or semantic model from this document """
+        self.__invalidate_model()
         self.__tree = None
+        self.__syntax_diagnostics = ()
+        self.__lines = None
+        self.__module_anchor = None
+        self.__anchors = None
 
     def __str__(self) -> str:
         return f'{self.package.name}::{self.name} [{self.path}]'
@@ -7,7 +7,7 @@ from __future__ import annotations
 import os
 import urllib.parse
 import weakref
-from typing import Optional, MutableMapping
+from typing import Optional, MutableMapping, Sequence
 
 from orcinus.exceptions import OrcinusError
 from orcinus.workspace.document import Document
@@ -37,6 +37,13 @@ class Package:
 
         raise OrcinusError(f"Not found file `{filename}` in packages")
 
+    def find_sources(self) -> Sequence[str]:
+        """ Returns filenames of all source files in package """
+        filenames = []
+        for path, _, names in os.walk(self.path):
+            filenames.extend(os.path.join(path, name) for name in names if os.path.splitext(name)[1] == '.orx')
+        return sorted(filenames)
+
     def get_or_create_document(self, doc_uri: str) -> Document:
         """
         Return a managed document if-present, else create one pointing at disk.
@@ -64,6 +71,7 @@ class Package:
         """ Update source of document """
         document = self.get_document(doc_uri) or self.create_document(doc_uri, source, version)
         document.source = source
+        document.version = version
         self.documents[doc_uri] = document
         return document
 
@@ -0,0 +1,46 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import random
+
+from orcinus.core.locations import LineIndex, Position
+from orcinus.workspace.buffer import TextBuffer
+
+
+def test_buffer_replace():
+    buffer = TextBuffer("def main():\n    pass\n")
+    buffer.replace(4, 8, "start")
+    buffer.replace(0, 0, "# comment\n")
+    buffer.replace(len(buffer), len(buffer), "\nmain()")
+    assert buffer[10:19] == "def start"
+    assert buffer.text == "# comment\ndef start():\n    pass\n\nmain()"
+    assert list(buffer.starts) == [0, 10, 23, 32, 33]
+
+
+def test_buffer_offset():
+    buffer = TextBuffer("ab\n\ncd")
+    assert buffer.offset(Position(1, 1)) == 0
+    assert buffer.offset(Position(1, 10)) == 2
+    assert buffer.offset(Position(2, 1)) == 3
+    assert buffer.offset(Position(3, 3)) == 6
+    assert buffer.offset(Position(10, 1)) == 6
+
+
+def test_buffer_random_edits():
+    rnd = random.Random(0)
+    source = "def main():\n    pass\n"
+    buffer = TextBuffer(source)
+    for _ in range(1000):
+        begin = rnd.randint(0, len(source))
+        end = rnd.randint(begin, min(len(source), begin + 5))
+        text = rnd.choice(["", "a", "\n", "b\nc", "\n\n"])
+        source = source[:begin] + text + source[end:]
+        buffer.replace(begin, end, text)
+
+        begin = rnd.randint(0, len(source))
+        assert buffer[begin:begin + 7] == source[begin:begin + 7]
+        assert list(buffer.starts) == list(LineIndex("test", source).starts)
+    assert buffer.text == source
@@ -0,0 +1,86 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import os
+
+from orcinus.workspace import Workspace
+from orcinus.workspace import cache as cache_module
+from orcinus.workspace.cache import ParseCache
+from orcinus.workspace.tests.test_document import SOURCE, dump_tokens
+
+
+def create_document(tmpdir, source: str):
+    workspace = Workspace(paths=[str(tmpdir)], cache_path=str(tmpdir.join('cache')))
+    return workspace, workspace.create_document(os.path.join(str(tmpdir), 'example.orx'), source)
+
+
+def test_parse_cache(tmpdir):
+    _, document = create_document(tmpdir, SOURCE)
+    cache = ParseCache(str(tmpdir.join('cache')))
+    assert cache.load(document.uri, SOURCE) is None
+    expected = dump_tokens(document)
+    assert cache.load(document.uri, SOURCE) is not None
+
+    _, document = create_document(tmpdir, SOURCE)
+    assert dump_tokens(document) == expected
+    assert cache.load(document.uri, SOURCE + "\n") is None
+
+    # cached tree can be reparsed incrementally
+    tree = document.tree
+    document.source = SOURCE.replace("return 1", "return 2")
+    assert document.tree.imports is tree.imports
+
+
+def test_parse_cache_broken(tmpdir):
+    _, document = create_document(tmpdir, SOURCE)
+    cache = ParseCache(str(tmpdir.mkdir('cache')))
+    with open(cache.get_filename(document.uri, SOURCE), 'wb') as stream:
+        stream.write(b'broken')
+
+    assert cache.load(document.uri, SOURCE) is None
+    assert document.tree
+
+
+def test_parse_cache_format(tmpdir, monkeypatch):
+    _, document = create_document(tmpdir, SOURCE)
+    assert document.tree
+    cache = ParseCache(str(tmpdir.join('cache')))
+    assert cache.load(document.uri, SOURCE) is not None
+
+    # entries of another parser are not loaded
+    monkeypatch.setattr(cache_module, 'get_cache_format', lambda: 'changed')
+    assert cache.load(document.uri, SOURCE) is None
+
+
+def test_parse_cache_prune(tmpdir):
+    _, document = create_document(tmpdir, SOURCE)
+    result = document.tree, None, None, ()
+    cache = ParseCache(str(tmpdir.join('cache')), max_size=0)
+    cache.store(document.uri, SOURCE, result)
+    assert not os.listdir(cache.path)
+
+    cache = ParseCache(cache.path)
+    cache.store(document.uri, SOURCE, result)
+    size = os.path.getsize(cache.get_filename(document.uri, SOURCE))
+    os.utime(cache.get_filename(document.uri, SOURCE), (0, 0))
+
+    # least recently used entry is removed
+    cache.max_size = size + size // 2
+    cache.store(document.uri, SOURCE + "\n", result)
+    assert cache.load(document.uri, SOURCE) is None
+    assert cache.load(document.uri, SOURCE + "\n") is not None
+
+
+def test_parse_cache_untrusted(tmpdir):
+    _, document = create_document(tmpdir, SOURCE)
+    assert document.tree
+    cache = ParseCache(str(tmpdir.join('cache')))
+    assert cache.load(document.uri, SOURCE) is not None
+
+    # directory, that is writable by other users, is not used
+    os.chmod(cache.path, 0o777)
+    assert cache.load(document.uri, SOURCE) is None
+    assert create_document(tmpdir, SOURCE)[1].tree
@@ -0,0 +1,117 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import os
+from typing import Iterator
+
+from orcinus.core.locations import Position
+from orcinus.language.syntax import SyntaxNode, SyntaxSymbol, SyntaxToken
+from orcinus.workspace import Workspace, Document
+
+SOURCE = """from system import exit
+
+def first() -> int:
+    return 1
+
+class Point:
+    x: int
+    y: int
+
+def second() -> int:
+    return first()
+"""
+
+
+def create_document(tmpdir, source: str) -> Document:
+    workspace = Workspace(paths=[str(tmpdir)])
+    return workspace.create_document(os.path.join(str(tmpdir), 'example.orx'), source)
+
+
+def iterate_tokens(symbol: SyntaxSymbol) -> Iterator[SyntaxToken]:
+    if isinstance(symbol, SyntaxToken):
+        yield symbol
+    elif isinstance(symbol, SyntaxNode):
+        for child in symbol.children:
+            yield from iterate_tokens(child)
+
+
+def dump_tokens(document: Document):
+    return [(token.id, token.value, token.location) for token in iterate_tokens(document.tree)]
+
+
+def assert_reparsed(tmpdir, source: str, changed_source: str, is_incremental: bool):
+    document = create_document(tmpdir, source)
+    tree = document.tree
+    document.source = changed_source
+
+    expected = create_document(tmpdir, changed_source)
+    assert dump_tokens(document) == dump_tokens(expected)
+    assert (document.tree.imports is tree.imports) == is_incremental
+    assert not document.diagnostics.has_error
+
+
+def test_reparse_function(tmpdir):
+    assert_reparsed(tmpdir, SOURCE, SOURCE.replace("return 1", "return 1 + 2\n    return 3"), True)
+
+
+def test_reparse_new_member(tmpdir):
+    assert_reparsed(tmpdir, SOURCE, SOURCE.replace("y: int\n", "y: int\n\ndef third():\n    pass\n"), True)
+
+
+def test_reparse_last_member(tmpdir):
+    assert_reparsed(tmpdir, SOURCE, SOURCE + "\ndef main() -> int:\n    return second()\n", True)
+
+
+def test_reparse_imports(tmpdir):
+    assert_reparsed(tmpdir, SOURCE, SOURCE.replace("exit", "exit as quit"), False)
+
+
+def test_reparse_with_errors(tmpdir):
+    document = create_document(tmpdir, SOURCE)
+    assert document.tree
+    document.source = SOURCE.replace("return 1", "return (1")
+    assert document.tree
+    assert document.diagnostics.has_error
+
+
+def test_reparse_with_missed_expression(tmpdir):
+    document = create_document(tmpdir, SOURCE)
+    assert document.tree
+    changed_source = SOURCE.replace("return 1", "return 1 +")
+    document.source = changed_source
+
+    expected = create_document(tmpdir, changed_source)
+    assert document.source == changed_source
+    assert dump_tokens(document) == dump_tokens(expected)
+    assert document.diagnostics.has_error
+
+
+def test_replace_range(tmpdir):
+    document = create_document(tmpdir, SOURCE)
+    tree = document.tree
+    begin = document.offset(Position(4, 12))
+    document.replace(begin, begin + 1, "2")
+
+    expected = create_document(tmpdir, SOURCE.replace("return 1", "return 2"))
+    assert document.source == expected.source
+    assert dump_tokens(document) == dump_tokens(expected)
+    assert document.tree.imports is tree.imports
+
+
+def test_reparse_same_length(tmpdir):
+    source = SOURCE.replace("return 1", "return 1  # a comment")
+    document = create_document(tmpdir, source)
+    assert dump_tokens(document)  # locations of tokens are resolved before change
+
+    # length of source is not changed, but lines of next members are moved
+    changed_source = source.replace("# a comment", "#\n# comment")
+    assert len(changed_source) == len(source)
+    tree = document.tree
+    document.source = changed_source
+
+    expected = create_document(tmpdir, changed_source)
+    assert dump_tokens(document) == dump_tokens(expected)
+    assert document.tree.imports is tree.imports
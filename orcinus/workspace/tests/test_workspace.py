@@ -0,0 +1,91 @@
+# Copyright (C) 2019 Vasiliy Sheredeko
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+from __future__ import annotations
+
+import os
+
+from orcinus.workspace import Workspace
+
+POINT_SOURCE = """
+struct Point:
+    x: int
+    y: int
+"""
+
+MAIN_SOURCE = """from point import Point
+
+def main() -> int:
+    return 0
+"""
+
+
+def test_semantic_cache(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    point = workspace.create_document(os.path.join(str(tmpdir), 'point.orx'), POINT_SOURCE)
+    main = workspace.create_document(os.path.join(str(tmpdir), 'main.orx'), MAIN_SOURCE)
+    other = workspace.create_document(os.path.join(str(tmpdir), 'other.orx'), MAIN_SOURCE)
+
+    assert main.module
+    assert all(name in workspace.semantic_cache for name in ('__builtins__', 'point', 'main'))
+
+    # imported modules are shared between documents
+    assert other.module
+    assert other.model.context.models[point.uri] is main.model.context.models[point.uri]
+    assert other.model.context.builtins_module is main.model.context.builtins_module
+
+    # change of imported module invalidates dependent modules
+    point.source = POINT_SOURCE + "    z: int\n"
+    assert 'point' not in workspace.semantic_cache
+    assert 'main' not in workspace.semantic_cache
+    assert 'other' not in workspace.semantic_cache
+    assert '__builtins__' in workspace.semantic_cache
+
+    # dependent document is analyzed again
+    assert main.module
+    assert main.model.context.models[point.uri].module.scope.resolve('Point').members[-1].name == 'z'
+
+
+def test_index_document(tmpdir):
+    tmpdir.join('point.orx').write(POINT_SOURCE)
+    tmpdir.join('main.orx').write(MAIN_SOURCE)
+    workspace = Workspace(paths=[str(tmpdir)])
+    filenames = workspace.find_sources()
+    assert str(tmpdir.join('main.orx')) in filenames
+
+    # imported modules are analyzed with dependent module, therefore they are skipped
+    assert [workspace.index_document(filename) for filename in filenames if filename.startswith(str(tmpdir))] == [
+        True, False
+    ]
+    symbols = workspace.semantic_cache.symbols
+    assert [symbol.name for symbol in symbols.find('Point')] == ['Point']
+    assert [symbol.name for symbol in symbols.search('MAI')] == ['main']
+
+    # indexed document is not managed by package, and opened document with same source uses indexed model
+    assert not workspace.get_document(str(tmpdir.join('main.orx')))
+    indexed_module = symbols.find('main')[0].module
+    main = workspace.update_document(f'file://{tmpdir.join("main.orx")}', MAIN_SOURCE, 1)
+    assert 'main' in workspace.semantic_cache
+    assert main.module is indexed_module
+
+    # symbols of changed module are removed from table
+    main.source = "def start() -> int:\n    return 0\n"
+    assert not symbols.find('main')
+    assert symbols.find('Point')
+
+
+def test_invalidate_dependent_model(tmpdir):
+    workspace = Workspace(paths=[str(tmpdir)])
+    point = workspace.create_document(os.path.join(str(tmpdir), 'point.orx'), POINT_SOURCE)
+    main = workspace.create_document(os.path.join(str(tmpdir), 'main.orx'), MAIN_SOURCE + "def broken(")
+    model = main.model
+    tree = main.tree
+    syntax_diagnostics = [diagnostic.message for diagnostic in main.diagnostics]
+    assert syntax_diagnostics
+
+    # source of dependent document is not changed, therefore only it's model is analyzed again
+    point.source = POINT_SOURCE + "    z: int\n"
+    assert main.model is not model
+    assert main.tree is tree
+    assert [diagnostic.message for diagnostic in main.diagnostics] == syntax_diagnostics
@@ -1,4 +1,5 @@
 import os
+from typing import Tuple
 
 from orcinus.exceptions import OrcinusError
 
@@ -18,3 +19,37 @@ def convert_module_name(filename, path):
 def convert_filename(module_name, path):
     filename = module_name.replace('.', os.path.sep) + '.orx'
     return os.path.join(path, filename)
+
+
+def find_changed_range(source: str, changed_source: str) -> Tuple[int, int, str]:
+    """
+    Find changed range between two versions of source.
+
+    Common prefix and suffix are searched by bisection on slices, that is faster than char-by-char comparison.
+
+    :return: begin and end offsets of replaced range in source and text, that is inserted in range
+    """
+    length = min(len(source), len(changed_source))
+
+    # find length of common prefix
+    low, high = 0, length
+    while low < high:
+        middle = (low + high + 1) // 2
+        if source[low:middle] == changed_source[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+
+    # find length of common suffix, that is not intersected with prefix
+    source_end, changed_end = len(source), len(changed_source)
+    low, high = 0, length - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if source[source_end - middle:source_end - low] == changed_source[changed_end - middle:changed_end - low]:
+            low = middle
+        else:
+            high = middle - 1
+    suffix = low
+
+    return prefix, source_end - suffix, changed_source[prefix:changed_end - suffix]
@@ -10,7 +10,9 @@ import urllib.parse
 from typing import Sequence, Optional
 
 from orcinus.exceptions import OrcinusError
+from orcinus.language.semantic import SemanticCache
 from orcinus.signals import Signal
+from orcinus.workspace.cache import ParseCache
 from orcinus.workspace.document import Document
 from orcinus.workspace.package import Package
 from orcinus.workspace.utils import convert_filename
@@ -23,12 +25,18 @@ class Workspace:
     Active representation of collection of projects
     """
     packages: Sequence[Package]
+    semantic_cache: SemanticCache
+    parse_cache: Optional[ParseCache]
 
     on_document_create: Signal  # (document: Document) -> void
     on_document_remove: Signal  # (document: Document) -> void
     on_document_analyze: Signal  # (document: Document) -> void
 
-    def __init__(self, paths: Sequence[str] = None):
+    def __init__(self, paths: Sequence[str] = None, *, cache_path: str = None):
+        """
+        :param paths:       Paths of packages
+        :param cache_path:  Path of directory for persistent cache. If it is not set, then cache is disabled
+        """
         paths = list(() or paths)
 
         # Standard library path
@@ -40,6 +48,12 @@ class Workspace:
             Package(self, os.path.abspath(urllib.parse.urlparse(path).path)) for path in paths
         ]
 
+        # analyzed semantic models, that are shared between documents
+        self.semantic_cache = SemanticCache()
+
+        # parsed documents, that are shared between runs
+        self.parse_cache = ParseCache(cache_path) if cache_path else None
+
         # signals
         self.on_document_create = Signal()
         self.on_document_remove = Signal()
@@ -81,6 +95,31 @@ class Workspace:
         package = self.get_package_for_document(doc_uri)
         return package.unload_document(doc_uri)
 
+    def find_sources(self) -> Sequence[str]:
+        """ Returns filenames of all source files in packages """
+        return [filename for package in self.packages for filename in package.find_sources()]
+
+    def index_document(self, filename: str) -> bool:
+        """
+        Analyze source file, therefore it's model is stored in semantic cache and it's symbols are added to symbol
+        table.
+
+        Already analyzed modules are skipped, also document of module that is managed by editor is not replaced by
+        source on disk. Source file is analyzed through transient document, that is not added to package, therefore
+        only semantic model is kept in workspace.
+
+        :return: True, if source file is analyzed
+        """
+        package = self.get_package_for_document(filename)
+        name = package.get_module_name(filename)
+        if name in self.semantic_cache or any(document.name == name for document in package.documents.values()):
+            return False
+
+        with open(filename, 'r', encoding='utf-8') as stream:
+            source = stream.read()
+        Document(package, filename, name, source).model
+        return True
+
     def load_document(self, module_name: str) -> Document:
         """
         Load document for module
@@ -23,9 +23,8 @@ setup(
     },
     install_requires=[
         'attrs==18.1.0',
-        'llvmlite==0.26',
+        'llvmlite==0.41.1',
         'multidict==4.5.2',
-        'multimethod==1.0',
         'colorlog==3.1.4',
         'json-rpc == 1.11.1',
         'pytest==3.6.1',